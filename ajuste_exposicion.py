@@ -0,0 +1,128 @@
+"""Espera de ajuste (AE/AWB) guiada por los metadatos de cada frame.
+
+En lugar de un time.sleep(2) fijo antes de cada foto, se leen los
+metadatos frame a frame y se vuelve en cuanto exposición, ganancia y
+balance de blancos dejan de moverse, con un tope de tiempo configurable.
+Con buena luz bastan unos pocos frames.
+
+Si los metadatos traen AeLocked, manda AeLocked. Si no, "quieto" quiere
+decir que en los últimos frames_estables + 1 frames cada valor se movió,
+en total (máximo - mínimo), menos de 'tolerancia', contando también lo
+que le falta recorrer si va en rampa: mirar solo el cambio entre frames
+seguidos daba por convergida una rampa lenta del AE. Sin
+ExposureTime, AnalogueGain o ColourGains no se puede saber: no converge
+y se espera hasta el tope.
+
+La fuente de metadatos es cualquier función sin argumentos que devuelva
+un dict como el de Picamera2.capture_metadata(); MetadatosSimulados
+imita un sensor que converge y permite probar la lógica sin cámara.
+"""
+import collections
+import time
+
+# --- Constantes ---
+ESPERA_MAXIMA = 2.0   # Tope en segundos (lo que antes era el sleep fijo)
+TOLERANCIA = 0.01     # Deriva relativa máxima (en toda la ventana) para considerar "quieto"
+FRAMES_ESTABLES = 3   # Frames seguidos (después del primero de la ventana) dentro de tolerancia
+MINIMO_FRAMES = 2     # Siempre mirar al menos estos frames (el primero puede ser viejo)
+
+
+def _deriva_relativa(valores):
+    """Deriva relativa de una serie de valores de un mismo metadato: la ya vista más la que falta.
+
+    La vista es (máximo - mínimo) / |primero|. Si la serie va siempre en
+    el mismo sentido (una rampa del AE) se suma lo que le falta suponiendo
+    que los pasos siguen achicándose al mismo ritmo; si no se achican, no
+    está quieta.
+    """
+    escala = max(abs(valores[0]), 1e-6)
+    vista = (max(valores) - min(valores)) / escala
+    pasos = [b - a for a, b in zip(valores, valores[1:])]
+    if len(pasos) < 2 or not (all(p > 0 for p in pasos) or all(p < 0 for p in pasos)):
+        return vista # Quieta o con ruido en los dos sentidos: no es una rampa
+    razon = pasos[-1] / pasos[-2]
+    if razon >= 1:
+        return float("inf")
+    return vista + abs(pasos[-1]) * razon / (1 - razon) / escala
+
+
+def _valores_ajuste(metadatos):
+    """Extrae (exposición, ganancia, gain_r, gain_b) de un dict de metadatos."""
+    ganancias = metadatos.get("ColourGains") or (None, None)
+    return (metadatos.get("ExposureTime"), metadatos.get("AnalogueGain"),
+            ganancias[0], ganancias[1])
+
+
+def esperar_convergencia(leer_metadatos, espera_maxima=ESPERA_MAXIMA,
+                         tolerancia=TOLERANCIA, frames_estables=FRAMES_ESTABLES,
+                         reloj=time.monotonic):
+    """Lee metadatos hasta que AE/AWB converjan o se agote espera_maxima.
+
+    Devuelve un dict con: convergido (bool), frames (leídos), segundos
+    (esperados) y metadatos (los del último frame).
+    """
+    inicio = reloj()
+    ventana = collections.deque(maxlen=frames_estables + 1) # Valores de los últimos frames
+    frames = 0
+    metadatos = {}
+    while True:
+        metadatos = leer_metadatos() or {}
+        frames += 1
+        if "AeLocked" in metadatos:
+            quieto = metadatos["AeLocked"] is True
+        else:
+            actuales = _valores_ajuste(metadatos)
+            if any(valor is None for valor in actuales):
+                ventana.clear() # Sin el dato no hay forma de saber si se movió
+            else:
+                ventana.append(actuales)
+            quieto = (len(ventana) == ventana.maxlen
+                      and max(_deriva_relativa(serie) for serie in zip(*ventana)) <= tolerancia)
+
+        if frames >= MINIMO_FRAMES and quieto:
+            return {"convergido": True, "frames": frames,
+                    "segundos": reloj() - inicio, "metadatos": metadatos}
+        if reloj() - inicio >= espera_maxima:
+            return {"convergido": False, "frames": frames,
+                    "segundos": reloj() - inicio, "metadatos": metadatos}
+
+
+class MetadatosSimulados:
+    """Flujo de metadatos falso: la exposición se acerca al objetivo frame a frame.
+
+    Cada llamada avanza un frame (y un reloj simulado de 'intervalo'
+    segundos), de modo que esperar_convergencia(flujo, reloj=flujo.reloj)
+    corre sin sensor y sin dormir. 'paso' es la fracción del error que se
+    corrige por frame (1.0 = ya convergido desde el primer frame).
+    """
+
+    def __init__(self, exposicion_inicial=10000, exposicion_objetivo=33000,
+                 ganancia_inicial=1.0, ganancia_objetivo=4.0, paso=0.5,
+                 intervalo=1 / 30, informar_ae_locked=False):
+        self.exposicion = float(exposicion_inicial)
+        self.ganancia = float(ganancia_inicial)
+        self.exposicion_objetivo = float(exposicion_objetivo)
+        self.ganancia_objetivo = float(ganancia_objetivo)
+        self.paso = paso
+        self.intervalo = intervalo
+        self.informar_ae_locked = informar_ae_locked
+        self.tiempo = 0.0
+        self.frames = 0
+
+    def reloj(self):
+        return self.tiempo
+
+    def __call__(self):
+        self.frames += 1
+        self.tiempo += self.intervalo
+        self.exposicion += (self.exposicion_objetivo - self.exposicion) * self.paso
+        self.ganancia += (self.ganancia_objetivo - self.ganancia) * self.paso
+        metadatos = {
+            "ExposureTime": int(round(self.exposicion)),
+            "AnalogueGain": self.ganancia,
+            "ColourGains": (1.8, 1.5),
+        }
+        if self.informar_ae_locked:
+            error = abs(self.exposicion_objetivo - self.exposicion) / self.exposicion_objetivo
+            metadatos["AeLocked"] = error < 0.01
+        return metadatos
@@ -0,0 +1,334 @@
+"""Capa común de captura con backends intercambiables.
+
+Los scripts capturan de tres maneras distintas (Picamera2, libcamera-jpeg
+y raspistill). Aquí las tres comparten la misma interfaz que SesionCamara:
+
+    backend = crear_backend("picamera2" | "libcamera" | "raspistill" | "replay", ...)
+    backend.abrir()
+    frame = backend.capturar_array("main")   # array NumPy RGB (H, W, 3)
+    backend.capturar_archivo("foto.jpg")
+    backend.cerrar()
+
+El stream "lores" es el frame pequeño para IA y previsualización
+(TAMANO_LORES, cerca de la entrada del modelo). En Picamera2 lo escala el
+ISP; en los demás backends se escala desde el main.
+
+El backend "replay" sirve frames desde una carpeta de JPEGs o un .npy
+(N, H, W, 3) a un ritmo configurable, para correr todo el flujo
+captura→clasificación→pantalla en un Linux cualquiera sin cámara.
+"""
+import glob
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+import camara_sesion
+from camara_sesion import SesionCamara, TAMANO_LORES
+from captura_memoria import array_a_imagen
+from libcamera_trabajador import TrabajadorLibcamera
+
+# --- Constantes ---
+EXTENSIONES_IMAGEN = ("*.jpg", "*.jpeg", "*.png")
+CALIDAD_JPEG = 90
+PRECARGA_REPLAY = 64    # Frames que el replay decodifica al abrir; los demás, al servirlos
+
+
+class ReplayTerminado(EOFError):
+    """El replay sin bucle ya sirvió todos sus frames (fin de la fuente, no un error de captura)."""
+
+
+def _leer_imagen(ruta):
+    with Image.open(ruta) as img:
+        return np.asarray(img.convert('RGB'))
+
+
+class BackendCaptura:
+    """Interfaz común. Las subclases implementan _abrir, _capturar y _cerrar."""
+
+    nombre = "base"
+
+    def __init__(self, tamano_lores=TAMANO_LORES):
+        self.tamano_lores = tamano_lores
+        self.abierto = False
+        self.frames_servidos = 0
+
+    @property
+    def disponible(self):
+        """True si el backend puede funcionar en esta máquina."""
+        return True
+
+    def abrir(self):
+        if not self.abierto:
+            self._abrir()
+            self.abierto = True
+
+    def cerrar(self):
+        if self.abierto:
+            self._cerrar()
+            self.abierto = False
+
+    def capturar_array(self, stream="main"):
+        """Devuelve el siguiente frame como array NumPy RGB (H, W, 3)."""
+        return self.capturar_arrays((stream,))[0]
+
+    def capturar_arrays(self, streams=("main", "lores")):
+        """Devuelve un array por stream, todos del mismo frame."""
+        self.abrir()
+        frames = self._capturar(streams)
+        self.frames_servidos += 1
+        return frames
+
+    def _escalar_lores(self, frame):
+        imagen = Image.fromarray(frame).resize(self.tamano_lores, Image.Resampling.BILINEAR)
+        return np.asarray(imagen)
+
+    def _desde_main(self, main, streams):
+        """Arma la respuesta de _capturar a partir del frame main."""
+        return [main if stream == "main" else self._escalar_lores(main) for stream in streams]
+
+    def capturar_archivo(self, ruta):
+        """Captura un frame y lo guarda como JPEG en 'ruta'. Devuelve la ruta."""
+        array_a_imagen(self.capturar_array("main")).save(ruta, "JPEG", quality=CALIDAD_JPEG)
+        return ruta
+
+    def _abrir(self):
+        pass
+
+    def _cerrar(self):
+        pass
+
+    def _capturar(self, streams):
+        raise NotImplementedError
+
+    def __enter__(self):
+        self.abrir()
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+        return False
+
+
+class BackendPicamera2(BackendCaptura):
+    """Picamera2 a través de la sesión persistente (camara_sesion)."""
+
+    nombre = "picamera2"
+
+    def __init__(self, tamano_lores=TAMANO_LORES, **opciones_sesion):
+        super().__init__(tamano_lores)
+        self.sesion = SesionCamara(tamano_lores=tamano_lores, **opciones_sesion)
+
+    @property
+    def disponible(self):
+        return camara_sesion.picamera2_available # Instalada (picamera2 se importa en _abrir)
+
+    def _abrir(self):
+        self.sesion.abrir()
+
+    def _cerrar(self):
+        self.sesion.cerrar()
+
+    def _capturar(self, streams):
+        # El ISP ya entrega el lores escalado y SesionCamara lo pasa a RGB: sin copias,
+        # solo se descarta (como vista) el cuarto canal de los formatos de 32 bits
+        return [a[..., :3] if a.ndim == 3 and a.shape[2] == 4 else a
+                for a in self.sesion.capturar_arrays(streams)]
+
+    def capturar_archivo(self, ruta):
+        # Picamera2 codifica el JPEG por su cuenta (más rápido que PIL)
+        self.abrir()
+        self.sesion.capturar_archivo(ruta)
+        self.frames_servidos += 1
+        return ruta
+
+
+class BackendLibcamera(BackendCaptura):
+    """libcamera-still persistente (libcamera_trabajador), esperando cada foto."""
+
+    nombre = "libcamera"
+
+    def __init__(self, ejecutable="libcamera-still", argumentos_extra=(), timeout=10.0,
+                 tamano_lores=TAMANO_LORES):
+        super().__init__(tamano_lores)
+        self.trabajador = TrabajadorLibcamera(ejecutable, argumentos_extra=argumentos_extra)
+        self.timeout = timeout
+        self._directorio = None
+
+    def _abrir(self):
+        self._directorio = tempfile.mkdtemp(prefix="backend_libcamera_")
+        self.trabajador.iniciar()
+
+    def _cerrar(self):
+        self.trabajador.detener()
+        if self._directorio:
+            shutil.rmtree(self._directorio, ignore_errors=True)
+            self._directorio = None
+
+    def _foto(self, ruta):
+        self.trabajador.solicitar_foto(ruta)
+        resultado = self.trabajador.obtener_resultado(timeout=self.timeout)
+        if resultado["error"]:
+            raise RuntimeError(resultado["error"])
+        return resultado["ruta"]
+
+    def _capturar(self, streams):
+        ruta = self._foto(os.path.join(self._directorio, "frame.jpg"))
+        try:
+            return self._desde_main(_leer_imagen(ruta), streams)
+        finally:
+            os.remove(ruta)
+
+    def capturar_archivo(self, ruta):
+        self.abrir()
+        self._foto(ruta)
+        self.frames_servidos += 1
+        return ruta
+
+
+class BackendRaspistill(BackendCaptura):
+    """raspistill (cámara legacy), un proceso por foto como en resnet34/."""
+
+    nombre = "raspistill"
+
+    def __init__(self, ancho=640, alto=480, timeout_ms=1000, ejecutable="raspistill",
+                 tamano_lores=TAMANO_LORES):
+        super().__init__(tamano_lores)
+        self.ancho = ancho
+        self.alto = alto
+        self.timeout_ms = timeout_ms
+        self.ejecutable = ejecutable
+
+    def capturar_archivo(self, ruta):
+        subprocess.run([self.ejecutable, "-o", ruta, "-w", str(self.ancho), "-h", str(self.alto),
+                        "-t", str(self.timeout_ms)], check=True)
+        self.frames_servidos += 1
+        return ruta
+
+    def _capturar(self, streams):
+        descriptor, ruta = tempfile.mkstemp(suffix=".jpg")
+        os.close(descriptor)
+        try:
+            subprocess.run([self.ejecutable, "-o", ruta, "-w", str(self.ancho), "-h", str(self.alto),
+                            "-t", str(self.timeout_ms)], check=True)
+            return self._desde_main(_leer_imagen(ruta), streams)
+        finally:
+            os.remove(ruta)
+
+
+class BackendReplay(BackendCaptura):
+    """Reproduce frames grabados (carpeta de JPEG/PNG o .npy) a 'fps' por segundo.
+
+    fps=None sirve los frames tan rápido como se pidan. Con bucle=True se
+    vuelve al primero al terminar; si no, se lanza ReplayTerminado.
+
+    Los primeros 'precarga' frames (y su lores) se decodifican al abrir,
+    como si los entregara el ISP; los demás se leen al servirlos, así una
+    carpeta grande no llena la RAM de la Pi.
+    """
+
+    nombre = "replay"
+
+    def __init__(self, origen, fps=30.0, bucle=True, tamano_lores=TAMANO_LORES, precarga=PRECARGA_REPLAY):
+        super().__init__(tamano_lores)
+        self.origen = origen
+        self.fps = fps
+        self.bucle = bucle
+        self.precarga = precarga
+        self.total = 0
+        self._leer = None       # leer(indice) -> array RGB (H, W, 3) del frame
+        self._precargados = {}  # indice -> (main, lores)
+        self._indice = 0
+        self._proximo = None
+        self._lock = threading.Lock()
+
+    def _abrir(self):
+        if os.path.isdir(self.origen):
+            rutas = sorted(r for patron in EXTENSIONES_IMAGEN
+                           for r in glob.glob(os.path.join(self.origen, patron)))
+            if not rutas:
+                raise FileNotFoundError(f"No hay imágenes en {self.origen}")
+            self._leer, self.total = lambda i: _leer_imagen(rutas[i]), len(rutas)
+        elif self.origen.endswith(".npy"):
+            pila = np.load(self.origen, mmap_mode="r") # Solo se lee del disco el frame que se sirve
+            if pila.ndim != 4 or pila.shape[3] not in (3, 4):
+                raise ValueError(f"Se esperaba una pila (N, H, W, 3), no {pila.shape}")
+            self._leer, self.total = lambda i: np.ascontiguousarray(pila[i, :, :, :3]), pila.shape[0]
+        else:
+            frame = _leer_imagen(self.origen)
+            self._leer, self.total = lambda i: frame, 1
+        self._precargados = {i: self._decodificar(i) for i in range(min(self.precarga, self.total))}
+        self._indice = 0
+        self._proximo = time.monotonic()
+        print(f"Replay: {self.total} frames desde {self.origen} a {self.fps or 'máx.'} fps "
+              f"({len(self._precargados)} precargados)")
+
+    def _decodificar(self, indice):
+        main = self._leer(indice)
+        return main, self._escalar_lores(main)
+
+    def _cerrar(self):
+        self._leer = None
+        self._precargados = {}
+
+    def _capturar(self, streams):
+        with self._lock:
+            if self._indice >= self.total:
+                if not self.bucle:
+                    raise ReplayTerminado(f"Replay terminado ({self.total} frames)")
+                self._indice = 0
+            if self.fps:
+                # Ritmo de cámara: los frames salen en una rejilla fija (reloj del sensor)
+                periodo = 1.0 / self.fps
+                ahora = time.monotonic()
+                if ahora > self._proximo:
+                    # Consumidor atrasado: no se acumulan frames, se espera al siguiente de la rejilla
+                    self._proximo += math.ceil((ahora - self._proximo) / periodo) * periodo
+                espera = self._proximo - time.monotonic()
+                if espera > 0:
+                    time.sleep(espera)
+                self._proximo += periodo
+            indice = self._indice
+            self._indice += 1
+            if indice in self._precargados:
+                main, lores = self._precargados[indice]
+            else:
+                main = self._leer(indice)
+                lores = self._escalar_lores(main) if "lores" in streams else None
+            return [main if stream == "main" else lores for stream in streams]
+
+
+BACKENDS = {
+    BackendPicamera2.nombre: BackendPicamera2,
+    BackendLibcamera.nombre: BackendLibcamera,
+    BackendRaspistill.nombre: BackendRaspistill,
+    BackendReplay.nombre: BackendReplay,
+}
+
+
+def crear_backend(nombre, **opciones):
+    """Crea el backend 'nombre' (ver BACKENDS) con sus opciones."""
+    clase = BACKENDS.get(nombre)
+    if clase is None:
+        raise ValueError(f"Backend de captura desconocido: {nombre} (opciones: {', '.join(BACKENDS)})")
+    return clase(**opciones) # Un KeyError de un constructor no se confunde con un nombre desconocido
+
+
+def generar_replay_sintetico(ruta, frames=30, tamano=(1920, 1080), semilla=0):
+    """Crea un .npy (N, H, W, 3) de frames sintéticos para probar sin cámara."""
+    generador = np.random.default_rng(semilla)
+    ancho, alto = tamano
+    pila = np.lib.format.open_memmap(ruta, mode="w+", dtype=np.uint8, shape=(frames, alto, ancho, 3))
+    base = generador.integers(0, 256, size=(alto // 8, ancho // 8, 3), dtype=np.uint8)
+    for i in range(frames):
+        # Imagen suave (como una escena real) que cambia un poco en cada frame
+        pequena = np.roll(base, i, axis=1)
+        pila[i] = np.asarray(Image.fromarray(pequena).resize((ancho, alto), Image.Resampling.BILINEAR))
+    pila.flush()
+    return ruta
@@ -0,0 +1,124 @@
+"""Mide el arranque en frío: imports pesados al principio vs. diferidos al hilo de carga.
+
+Cada escenario corre en un proceso nuevo (así los módulos no están ya en
+sys.modules) y reporta, contando desde que arrancó el proceso:
+
+    ventana   cuándo el script llega a crear tk.Tk() (la ventana puede aparecer)
+    modelo    cuándo el modelo está listo para la primera clasificación
+
+"antes" importa torch/torchvision arriba del todo, como hacían las GUIs;
+"diferido" solo importa lo ligero y deja torch a CargadorModelo. Con
+--importtime muestra además el desglose de python -X importtime de los
+frameworks (los módulos más lentos y el total por paquete).
+
+    python benchmark_arranque.py
+    python benchmark_arranque.py --repeticiones 5 --importtime
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from carga_modelo import disponible
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+LIGEROS = "import tkinter, tkinter.font, datetime, numpy\nfrom PIL import Image, ImageTk\n"
+
+CONSTRUIR_MODELO = """
+def construir(progreso=lambda mensaje: None):
+    import torch
+    from torchvision import models
+    progreso("Cargando modelo...")
+    modelo = models.resnet18(weights=None).eval() # Sin descargar pesos: el coste de arranque es el mismo
+    with torch.inference_mode():
+        modelo(torch.zeros((1, 3, 224, 224)))
+    return modelo
+"""
+
+ANTES = LIGEROS + """import torch
+import torchvision
+from carga_modelo import MetricasArranque
+""" + CONSTRUIR_MODELO + """
+metricas = MetricasArranque()
+metricas.marcar("ventana")
+construir()
+metricas.marcar("modelo")
+"""
+
+DIFERIDO = LIGEROS + """from carga_modelo import CargadorModelo, MetricasArranque
+""" + CONSTRUIR_MODELO + """
+metricas = MetricasArranque()
+cargador = CargadorModelo(construir)
+cargador.iniciar()
+metricas.marcar("ventana")
+cargador.esperar()
+metricas.marcar("modelo")
+"""
+
+ESCENARIOS = {"antes (imports arriba)": ANTES, "diferido (CargadorModelo)": DIFERIDO}
+
+
+def correr(codigo):
+    """Ejecuta 'codigo' en un intérprete nuevo y devuelve {evento: segundos}."""
+    codigo += "\nimport json; print('@@' + json.dumps(metricas.eventos))\n"
+    salida = subprocess.run([sys.executable, "-c", codigo], cwd=DIRECTORIO, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(salida.rsplit("@@", 1)[1])
+
+
+def desglose_importtime(modulos, top):
+    """python -X importtime de los módulos: los 'top' más lentos (acumulado) y el total por paquete."""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {', '.join(modulos)}"],
+                            cwd=DIRECTORIO, check=True, capture_output=True, text=True).stderr
+    filas = []
+    for linea in stderr.splitlines():
+        if not linea.startswith("import time:") or "[us]" in linea:
+            continue
+        propio, acumulado, nombre = linea[len("import time:"):].split("|")
+        filas.append((int(propio), int(acumulado), nombre.rstrip()))
+    print(f"\npython -X importtime -c 'import {', '.join(modulos)}'")
+    print(f"  {'acumulado':>10} {'propio':>10}  módulo")
+    for propio, acumulado, nombre in sorted(filas, key=lambda f: -f[1])[:top]:
+        print(f"  {acumulado / 1000:8.1f} ms {propio / 1000:7.1f} ms  {nombre}")
+    por_paquete = {}
+    for propio, _, nombre in filas:
+        paquete = nombre.strip().split(".")[0]
+        por_paquete[paquete] = por_paquete.get(paquete, 0) + propio
+    print("  Total por paquete (tiempo propio):")
+    for paquete, propio in sorted(por_paquete.items(), key=lambda p: -p[1])[:top]:
+        print(f"    {paquete:<24}{propio / 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--importtime", action="store_true", help="Desglose de python -X importtime")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    if not disponible("torch", "torchvision"):
+        sys.exit("Hace falta torch y torchvision para medir su import.")
+
+    correr(ANTES) # Calentar la caché de disco: las repeticiones miden el intérprete, no el disco
+    resultados = {}
+    for nombre, codigo in ESCENARIOS.items():
+        corridas = [correr(codigo) for _ in range(args.repeticiones)]
+        resultados[nombre] = {evento: statistics.median(c[evento] for c in corridas) for evento in ("ventana", "modelo")}
+
+    print(f"Arranque en frío (mediana de {args.repeticiones}, segundos desde que arranca el proceso):")
+    print(f"  {'escenario':<28}{'ventana':>10}{'modelo':>10}")
+    for nombre, tiempos in resultados.items():
+        print(f"  {nombre:<28}{tiempos['ventana']:10.2f}{tiempos['modelo']:10.2f}")
+    antes, diferido = resultados.values()
+    print(f"  La ventana aparece {antes['ventana'] - diferido['ventana']:.2f} s antes "
+          f"({antes['ventana'] / diferido['ventana']:.1f}x)")
+
+    if args.importtime:
+        desglose_importtime(["torch", "torchvision"], args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Compara los backends de ejecución con entradas idénticas: torch eager, TorchScript y ONNX Runtime.
+
+Para ResNet18, la ResNet34 de 9 clases (R23) y MobileNetV2 reporta la
+latencia por lote y la diferencia máxima de logits contra torch eager,
+con una comprobación de tolerancia (np.allclose con --atol/--rtol). Los
+artefactos se generan en una carpeta temporal con pesos aleatorios (o el
+R23.pth dado con --r23): las cachés reales no se tocan.
+
+    python benchmark_backends.py
+    python benchmark_backends.py --lotes 1 4 --r23 resnet34/R23.pth
+"""
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+from torchvision import models
+
+from cache_modelos import cargar_modelo
+from motor_onnx import onnxruntime_available
+
+
+def constructores():
+    def r23():
+        red = models.resnet34(weights=None)
+        red.fc = nn.Linear(red.fc.in_features, 9)
+        return red
+    return [
+        ("resnet18", lambda: models.resnet18(weights=None)),
+        ("resnet34 R23 (9 clases)", r23),
+        ("mobilenet_v2", lambda: models.mobilenet_v2(weights=None)),
+    ]
+
+
+def latencia_ms(modelo, entrada, repeticiones):
+    with torch.inference_mode():
+        for _ in range(3): # Calentamiento (TorchScript optimiza en las primeras llamadas)
+            modelo(entrada)
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            modelo(entrada)
+            tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lotes", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--r23", default=os.path.join("resnet34", "R23.pth"))
+    parser.add_argument("--atol", type=float, default=1e-3)
+    parser.add_argument("--rtol", type=float, default=1e-3)
+    args = parser.parse_args()
+
+    backends = ["torch", "torchscript"] + (["onnx"] if onnxruntime_available else [])
+    if not onnxruntime_available:
+        print("Aviso: onnxruntime no instalado (pip install onnxruntime); solo torch y TorchScript.")
+    print(f"Hilos de torch: {torch.get_num_threads()}   tolerancia: atol={args.atol} rtol={args.rtol}")
+
+    generador = torch.Generator().manual_seed(0)
+    entradas = {k: torch.randn((k, 3, 224, 224), generator=generador) for k in args.lotes}
+    todo_ok = True
+    with tempfile.TemporaryDirectory() as temporal:
+        for nombre, constructor in constructores():
+            ruta = os.path.join(temporal, nombre.split()[0] + ".pth")
+            if nombre.startswith("resnet34") and os.path.exists(args.r23):
+                shutil.copy(args.r23, ruta)
+            else:
+                torch.save(constructor().state_dict(), ruta)
+
+            def construir():
+                red = constructor()
+                red.load_state_dict(torch.load(ruta, map_location="cpu"))
+                return red.eval()
+
+            modelos = {backend: cargar_modelo(construir, ruta, backend) for backend in backends}
+            print(f"\n{nombre}")
+            print(f"  {'backend':<14}" + "".join(f"{f'lote {k}':>12}" for k in args.lotes)
+                  + f"{'dif. máx. logits':>20}{'tolerancia':>12}")
+            with torch.inference_mode():
+                referencia = {k: modelos["torch"](x).numpy() for k, x in entradas.items()}
+            for backend, modelo in modelos.items():
+                tiempos = [latencia_ms(modelo, entradas[k], args.repeticiones) for k in args.lotes]
+                with torch.inference_mode():
+                    salidas = {k: modelo(x).numpy() for k, x in entradas.items()}
+                diferencia = max(float(np.abs(salidas[k] - referencia[k]).max()) for k in args.lotes)
+                ok = all(np.allclose(salidas[k], referencia[k], atol=args.atol, rtol=args.rtol) for k in args.lotes)
+                todo_ok &= ok
+                print(f"  {backend:<14}" + "".join(f"{ms:9.1f} ms" for ms in tiempos)
+                      + f"{diferencia:20.2e}{'OK' if ok else 'FALLA':>12}")
+
+    print(f"\nLogits dentro de tolerancia en todos los backends: {'sí' if todo_ok else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Mide cuánto se congela la ventana al tomar una foto: todo en el hilo de Tk vs. EjecutorFondo.
+
+Simula --clics pulsaciones de "Foto" (una cada --cada-ms) con el flujo de
+prueba_pytorch.tomar_foto: captura main + lores (backend replay a --fps),
+JPEG del main, miniatura para el label y forward de una ResNet18 sobre el
+lores. Mientras tanto MonitorBucleTk programa un tick cada 16 ms y mide:
+
+    latencia     cuánto tarde llega cada tick (lo que espera un clic o un redibujado)
+    frame        tiempo entre ticks (frame time de la UI; 16 ms si nada bloquea)
+    clic→foto    desde el clic hasta que la foto está en el label
+    clic→result. desde el clic hasta que el resultado está en la ventana
+
+    antes        el manejador del clic hace todo (el tomar_foto original)
+    después      el manejador encola el trabajo en EjecutorFondo; la foto y el
+                 resultado vuelven por la cola que Tk revisa con root.after
+
+Con pantalla usa Tk de verdad (ventana oculta). Sin pantalla (o con
+--sin-pantalla) usa BucleSinPantalla: un bucle de temporizadores en un
+solo hilo con la misma interfaz after/mainloop; mide lo mismo (cuánto
+bloquea el hilo del bucle) pero sin el coste de dibujar de Tk.
+--espera-ms añade a cada clic la apertura y el time.sleep de ajuste de
+las versiones intento_*_camera.py.
+
+    python benchmark_bucle_tk.py
+    python benchmark_bucle_tk.py --clics 5 --espera-ms 2000   # abrir la cámara y esperar en cada clic
+"""
+import argparse
+import heapq
+import itertools
+import os
+import statistics
+import tempfile
+import time
+
+from backends_captura import crear_backend, generar_replay_sintetico
+from captura_memoria import GuardadorJPEG, array_a_imagen
+from miniaturas import miniatura
+from trabajo_fondo import EjecutorFondo, MonitorBucleTk
+
+TAMANO_LABEL = (590, 440)
+
+
+class BucleSinPantalla:
+    """after/after_cancel/mainloop/quit como los de Tk, sin pantalla: temporizadores en un solo hilo."""
+
+    def __init__(self):
+        self._temporizadores = [] # (instante, id, funcion, argumentos)
+        self._ids = itertools.count()
+        self._cancelados = set()
+        self._fin = False
+
+    def after(self, ms, funcion, *argumentos):
+        identificador = next(self._ids)
+        heapq.heappush(self._temporizadores, (time.monotonic() + ms / 1000, identificador, funcion, argumentos))
+        return identificador
+
+    def after_cancel(self, identificador):
+        self._cancelados.add(identificador)
+
+    def quit(self):
+        self._fin = True
+
+    def mainloop(self):
+        self._fin = False
+        while not self._fin and self._temporizadores:
+            instante, identificador, funcion, argumentos = heapq.heappop(self._temporizadores)
+            if identificador in self._cancelados:
+                self._cancelados.discard(identificador)
+                continue
+            espera = instante - time.monotonic()
+            if espera > 0:
+                time.sleep(espera)
+            funcion(*argumentos)
+
+
+def crear_bucle(sin_pantalla):
+    if not sin_pantalla:
+        try:
+            import tkinter as tk
+            root = tk.Tk()
+            root.withdraw()
+            return root, "Tk"
+        except Exception as e: # Sin DISPLAY: TclError
+            print(f"Sin Tk ({e}); se usa BucleSinPantalla")
+    return BucleSinPantalla(), "sin pantalla"
+
+
+def medir(modo, bucle, backend, clasificar, guardador, carpeta, args):
+    """Corre los clics en 'modo' y devuelve (estadísticas del monitor, clic→foto, clic→resultado) en ms."""
+    monitor = MonitorBucleTk(bucle)
+    ejecutor = EjecutorFondo(bucle)
+    ejecutor.iniciar()
+    a_foto, a_resultado = [], []
+    pendientes = [args.clics]
+
+    def terminado(clic):
+        a_resultado.append((time.monotonic() - clic) * 1000)
+        pendientes[0] -= 1
+        if pendientes[0] == 0:
+            bucle.after(args.cada_ms, bucle.quit) # Medir también un rato de calma después
+
+    def capturar(n):
+        if args.espera_ms:
+            time.sleep(args.espera_ms / 1000) # Picamera2().start() + time.sleep(2) de los intento_*
+        main, lores = backend.capturar_arrays(("main", "lores"))
+        guardador.guardar(main, os.path.join(carpeta, f"{modo}_{n}.jpg"))
+        return lores
+
+    def mostrar(lores):
+        miniatura([array_a_imagen(lores)], TAMANO_LABEL, ampliar=True) # PhotoImage aparte
+
+    def clic(n):
+        instante = time.monotonic()
+        if modo == "antes":
+            lores = capturar(n)
+            mostrar(lores)
+            a_foto.append((time.monotonic() - instante) * 1000)
+            clasificar(lores)
+            terminado(instante)
+        else:
+            def trabajo(tarea):
+                lores = capturar(n)
+                tarea.progreso(lores)
+                return clasificar(lores)
+
+            def foto(lores):
+                mostrar(lores)
+                a_foto.append((time.monotonic() - instante) * 1000)
+            ejecutor.enviar(trabajo, al_terminar=lambda resultado, error: terminado(instante), al_progresar=foto)
+
+    for n in range(args.clics):
+        bucle.after(args.cada_ms * (n + 1), clic, n)
+    bucle.after(0, monitor.iniciar)
+    bucle.mainloop()
+    monitor.detener()
+    ejecutor.detener()
+    guardador.esperar()
+    return monitor.estadisticas(), a_foto, a_resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clics", type=int, default=8)
+    parser.add_argument("--cada-ms", type=int, default=1000, help="Tiempo entre clics")
+    parser.add_argument("--fps", type=float, default=30.0, help="Ritmo de la cámara simulada")
+    parser.add_argument("--espera-ms", type=int, default=0, help="Apertura y ajuste de la cámara en cada clic")
+    parser.add_argument("--sin-pantalla", action="store_true", help="No usar Tk aunque haya pantalla")
+    args = parser.parse_args()
+
+    from torchvision import models
+    from motor_inferencia import MotorInferencia
+    motor = MotorInferencia(modelo=models.resnet18(weights=None)) # Pesos aleatorios: el coste por llamada es el mismo
+
+    with tempfile.TemporaryDirectory() as temporal:
+        origen = generar_replay_sintetico(os.path.join(temporal, "replay.npy"), frames=10)
+        backend = crear_backend("replay", origen=origen, fps=args.fps)
+        guardador = GuardadorJPEG()
+        bucle, tipo = crear_bucle(args.sin_pantalla)
+        resultados = {}
+        with backend:
+            for modo in ("antes", "después"):
+                resultados[modo] = medir(modo, bucle, backend, motor.classify_con_probabilidad,
+                                         guardador, temporal, args)
+        guardador.cerrar()
+
+    print(f"Bucle: {tipo}   clics: {args.clics} cada {args.cada_ms} ms   cámara: replay a {args.fps:g} fps"
+          + (f", +{args.espera_ms} ms de apertura/ajuste por clic" if args.espera_ms else ""))
+    print(f"\n  {'':<9}{'latencia p50':>13}{'p95':>9}{'máx.':>9}{'frame p95':>11}{'máx.':>9}"
+          f"{'clic→foto':>11}{'clic→result.':>14}")
+    for modo, (e, a_foto, a_resultado) in resultados.items():
+        print(f"  {modo:<9}{e['latencia_p50']:10.1f} ms{e['latencia_p95']:6.1f} ms{e['latencia_max']:6.0f} ms"
+              f"{e['frame_p95']:8.1f} ms{e['frame_max']:6.0f} ms"
+              f"{statistics.median(a_foto):8.0f} ms{statistics.median(a_resultado):11.0f} ms")
+    print(f"\n(ms; tick cada 16 ms. 'latencia' es lo que esperan los clics y redibujados mientras tanto)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Mide la caché de modelos compilados: arranque y latencia frente al nn.Module de siempre.
+
+Usa la ResNet34 de 9 clases. Con --pesos se prueba con el R23.pth real
+(se copia a una carpeta temporal: la caché de verdad no se toca); sin él
+se generan pesos aleatorios con la misma forma. Reporta:
+
+    construir + load_state_dict   lo que hace cada arranque hoy
+    primera vez (compilar)        construir + trazar + congelar + guardar
+    desde caché                   torch.jit.load del artefacto
+    latencia por imagen           nn.Module vs. TorchScript congelado
+
+y comprueba que al cambiar el .pth el artefacto viejo se invalida.
+
+    python benchmark_cache_modelos.py
+    python benchmark_cache_modelos.py --pesos resnet34/R23.pth --repeticiones 20
+"""
+import argparse
+import glob
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import torch
+import torch.nn as nn
+from torchvision import models
+
+from cache_modelos import cargar_compilado, ruta_artefacto
+
+
+def resnet34_9_clases():
+    red = models.resnet34(weights=None)
+    red.fc = nn.Linear(red.fc.in_features, 9)
+    return red
+
+
+def cronometrar(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pesos", help="R23.pth real (por defecto pesos aleatorios)")
+    parser.add_argument("--repeticiones", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporal:
+        ruta = os.path.join(temporal, "R23.pth")
+        if args.pesos:
+            shutil.copy(args.pesos, ruta)
+        else:
+            torch.save(resnet34_9_clases().state_dict(), ruta)
+
+        def construir():
+            red = resnet34_9_clases()
+            red.load_state_dict(torch.load(ruta, map_location="cpu"))
+            return red.eval()
+
+        r = args.repeticiones
+        ms_construir, eager = cronometrar(construir, r)
+        ms_compilar, _ = cronometrar(lambda: cargar_compilado(construir, ruta, calentar=False), 1)
+        ms_cache, compilado = cronometrar(lambda: cargar_compilado(construir, ruta, calentar=False), r)
+
+        entrada = torch.randn(1, 3, 224, 224)
+        latencias = {}
+        with torch.inference_mode():
+            for nombre, modelo in (("nn.Module", eager), ("TorchScript congelado", compilado)):
+                for _ in range(3): # Calentamiento (TorchScript optimiza en las primeras llamadas)
+                    modelo(entrada)
+                latencias[nombre], _ = cronometrar(lambda: modelo(entrada), r)
+            diferencia = float((eager(entrada) - compilado(entrada)).abs().max())
+
+        # Invalidación: otros pesos → otro artefacto, y el viejo se borra
+        viejo = ruta_artefacto(ruta)
+        torch.save(resnet34_9_clases().state_dict(), ruta)
+        cargar_compilado(construir, ruta, calentar=False)
+        nuevo = ruta_artefacto(ruta)
+        artefactos = glob.glob(os.path.join(temporal, "*.pt"))
+
+    print(f"\nArranque (mediana de {r}):")
+    print(f"  {'construir + load_state_dict':<30}{ms_construir:8.1f} ms")
+    print(f"  {'primera vez (compilar)':<30}{ms_compilar:8.1f} ms")
+    print(f"  {'desde caché':<30}{ms_cache:8.1f} ms   ({ms_construir / ms_cache:.1f}x)")
+    print("Latencia por imagen:")
+    for nombre, ms in latencias.items():
+        print(f"  {nombre:<30}{ms:8.1f} ms")
+    print(f"  Diferencia máx. de salidas: {diferencia:.2e}")
+    print(f"Invalidación al cambiar el .pth: {'OK' if viejo != nuevo and len(artefactos) == 1 else 'FALLÓ'} "
+          f"({os.path.basename(viejo)} → {os.path.basename(nuevo)})")
+
+
+if __name__ == "__main__":
+    main()
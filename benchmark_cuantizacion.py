@@ -0,0 +1,129 @@
+"""Compara cada modelo float32 con su versión int8: latencia, tamaño y acuerdo top-1.
+
+Modelos: ResNet18 y MobileNetV2 de ImageNet (chequeo perro/gato) y la
+ResNet34 de 9 clases con R23.pth. El conjunto de imágenes es fijo: la
+carpeta dada con --imagenes (mitad para calibrar, mitad para evaluar) o
+frames sintéticos con semilla fija. El acuerdo top-1 es el porcentaje de
+imágenes de evaluación en las que el int8 elige la misma clase que el
+float32 (y, para ImageNet, la misma etiqueta Perro/Gato/Ni perro ni gato).
+
+    python benchmark_cuantizacion.py
+    python benchmark_cuantizacion.py --imagenes fotos_capturadas --r23 resnet34/R23.pth
+    python benchmark_cuantizacion.py --sin-pesos   # sin descargar pesos de ImageNet
+"""
+import argparse
+import glob
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+from PIL import Image
+from torchvision import models
+
+from backends_captura import generar_replay_sintetico
+from cuantizacion import cuantizar, motor_cuantizacion, tamano_mb, MODO_ESTATICA, MODO_DINAMICA
+from motor_inferencia import etiqueta_perro_gato
+from preproceso_tensor import PreprocesadorTensor
+
+
+def cargar_imagenes(carpeta, cantidad):
+    """(calibración, evaluación) como listas de tensores (1, 3, 224, 224) normalizados."""
+    preprocesador = PreprocesadorTensor()
+    if carpeta:
+        rutas = sorted(glob.glob(os.path.join(carpeta, "*.jpg")) + glob.glob(os.path.join(carpeta, "*.jpeg")))
+        if len(rutas) < 2:
+            raise SystemExit(f"Hacen falta al menos 2 JPEG en {carpeta}")
+        frames = [np.asarray(Image.open(r).convert('RGB')) for r in rutas[:2 * cantidad]]
+    else:
+        with tempfile.TemporaryDirectory() as temporal:
+            frames = []
+            for semilla in range(2 * cantidad): # Escenas distintas, siempre las mismas
+                ruta = generar_replay_sintetico(os.path.join(temporal, f"s{semilla}.npy"), frames=1,
+                                                tamano=(448, 256), semilla=semilla)
+                frames.append(np.array(np.load(ruta)[0]))
+    tensores = [preprocesador.preparar(f).clone() for f in frames]
+    return tensores[0::2], tensores[1::2]
+
+
+def modelos_a_comparar(sin_pesos, ruta_r23):
+    """(nombre, modelo float32, etiquetar o None)."""
+    def imagenet(constructor, pesos):
+        try:
+            return constructor(weights=None if sin_pesos else pesos)
+        except Exception as e: # Sin red para descargar los pesos
+            print(f"Aviso: sin pesos de ImageNet para {constructor.__name__} ({e}); se usan aleatorios.")
+            return constructor(weights=None)
+
+    r23 = models.resnet34(weights=None)
+    r23.fc = nn.Linear(r23.fc.in_features, 9)
+    if ruta_r23 and os.path.exists(ruta_r23):
+        r23.load_state_dict(torch.load(ruta_r23, map_location="cpu"))
+    else:
+        print(f"Aviso: no se encontró {ruta_r23}; la ResNet34 de 9 clases usa pesos aleatorios.")
+    return [
+        ("resnet18 (perro/gato)", imagenet(models.resnet18, models.ResNet18_Weights.IMAGENET1K_V1), etiqueta_perro_gato),
+        ("mobilenet_v2 (perro/gato)", imagenet(models.mobilenet_v2, models.MobileNet_V2_Weights.IMAGENET1K_V1),
+         etiqueta_perro_gato),
+        ("resnet34 R23 (9 clases)", r23, None),
+    ]
+
+
+def latencia_ms(modelo, entrada, repeticiones):
+    with torch.inference_mode():
+        modelo(entrada) # Calentamiento
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            modelo(entrada)
+            tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000
+
+
+def top1(modelo, imagenes):
+    with torch.inference_mode():
+        return [int(modelo(x).argmax(dim=1)) for x in imagenes]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--imagenes", help="Carpeta de JPEG (por defecto frames sintéticos)")
+    parser.add_argument("--cantidad", type=int, default=16, help="Imágenes de calibración (y de evaluación)")
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--r23", default=os.path.join("resnet34", "R23.pth"))
+    parser.add_argument("--sin-pesos", action="store_true", help="Pesos aleatorios para los modelos de ImageNet")
+    args = parser.parse_args()
+
+    motor = motor_cuantizacion()
+    calibracion, evaluacion = cargar_imagenes(args.imagenes, args.cantidad)
+    print(f"Motor de cuantización: {motor}   hilos: {torch.get_num_threads()}   "
+          f"imágenes: {len(calibracion)} calibración / {len(evaluacion)} evaluación")
+
+    for nombre, modelo, etiquetar in modelos_a_comparar(args.sin_pesos, args.r23):
+        modelo.eval()
+        referencia = top1(modelo, evaluacion)
+        variantes = {
+            "float32": modelo,
+            "int8 estática": cuantizar(modelo, calibracion, MODO_ESTATICA, motor),
+            "int8 dinámica": cuantizar(modelo, modo=MODO_DINAMICA, motor=motor),
+        }
+        print(f"\n{nombre}")
+        print(f"  {'variante':<16}{'latencia':>12}{'tamaño':>11}{'acuerdo top-1':>16}"
+              + (f"{'acuerdo etiqueta':>19}" if etiquetar else ""))
+        base_ms = None
+        for variante, m in variantes.items():
+            ms = latencia_ms(m, evaluacion[0], args.repeticiones)
+            base_ms = base_ms or ms
+            clases = top1(m, evaluacion)
+            acuerdo = np.mean([a == b for a, b in zip(clases, referencia)])
+            linea = f"  {variante:<16}{ms:9.1f} ms{tamano_mb(m):8.1f} MB{acuerdo:15.0%}"
+            if etiquetar:
+                linea += f"{np.mean([etiquetar(a) == etiquetar(b) for a, b in zip(clases, referencia)]):18.0%}"
+            print(linea + (f"   ({base_ms / ms:.1f}x)" if m is not modelo else ""))
+
+
+if __name__ == "__main__":
+    main()
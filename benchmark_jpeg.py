@@ -0,0 +1,122 @@
+"""Compara abrir los JPEG enteros con la decodificación reducida de decodificacion_jpeg.py.
+
+Con fotos sintéticas de 1920x1080 (como las de la cámara) y para cada
+destino:
+
+    clasificador   Resize(256) + CenterCrop(224) de torchvision
+    mobilenet      resize((224, 224)) nearest (prueba_modelo_deteccion_perros)
+    miniatura      resize LANCZOS para encajar en un label de --label
+
+reporta el tamaño al que se decodifica, la mediana de decodificar y
+redimensionar, la memoria de la imagen decodificada y el pico de memoria
+del proceso (VmHWM) por encima de lo que ocupaba antes de abrir la
+primera imagen (cada modo en un proceso nuevo), y cuánto difiere el
+resultado final del de decodificar entero (diferencia media y máxima de
+los píxeles, en 0-255).
+
+    python benchmark_jpeg.py
+    python benchmark_jpeg.py --fotos 8 --calidad 95 --label 800x600
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+from backends_captura import generar_replay_sintetico
+from decodificacion_jpeg import abrir_reducida
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+MEDIR = """
+import json, time
+import numpy as np
+from benchmark_jpeg import destinos
+abrir, terminar = destinos({label!r}, {reducida!r})[{destino!r}]
+fotos = {fotos!r}
+def memoria(campo):
+    with open("/proc/self/status") as f:
+        return next(int(linea.split()[1]) for linea in f if linea.startswith(campo + ":"))
+antes = memoria("VmRSS")
+tiempos = []
+for i in range({repeticiones}):
+    inicio = time.perf_counter()
+    with abrir(fotos[i % len(fotos)]) as img:
+        decodificada = img.size
+        terminar(img.convert("RGB"))
+    tiempos.append(time.perf_counter() - inicio)
+print("@@" + json.dumps({{"tiempos": tiempos, "decodificada": decodificada, "pico": memoria("VmHWM") - antes}}))
+"""
+
+
+def destinos(label, reducida):
+    """{destino: (abrir(ruta), terminar(imagen RGB) → array final)} con o sin decodificación reducida."""
+    from torchvision import transforms
+    clasificador = transforms.Compose([transforms.Resize(256), transforms.CenterCrop(224), transforms.PILToTensor()])
+
+    def miniatura(img):
+        escala = min(label[0] / img.width, label[1] / img.height)
+        return np.asarray(img.resize((max(1, int(img.width * escala)), max(1, int(img.height * escala))),
+                                     Image.Resampling.LANCZOS))
+
+    def abrir(**destino):
+        return (lambda ruta: abrir_reducida(ruta, **destino)) if reducida else Image.open
+
+    return {
+        "clasificador": (abrir(lado_menor=256), lambda img: clasificador(img).permute(1, 2, 0).numpy()),
+        "mobilenet": (abrir(tamano=(224, 224)),
+                      lambda img: np.asarray(img.resize((224, 224), Image.Resampling.NEAREST))),
+        "miniatura": (abrir(caja=label), miniatura),
+    }
+
+
+def correr(codigo):
+    """Ejecuta 'codigo' en un intérprete nuevo y devuelve lo que reporta MEDIR."""
+    salida = subprocess.run([sys.executable, "-c", codigo], cwd=DIRECTORIO, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(salida.rsplit("@@", 1)[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fotos", type=int, default=4)
+    parser.add_argument("--repeticiones", type=int, default=30)
+    parser.add_argument("--calidad", type=int, default=90, help="Calidad JPEG de las fotos sintéticas")
+    parser.add_argument("--label", default="590x440", help="Tamaño del label de la miniatura (ANCHOxALTO)")
+    args = parser.parse_args()
+
+    label = tuple(int(v) for v in args.label.split("x"))
+    with tempfile.TemporaryDirectory() as temporal:
+        replay = generar_replay_sintetico(os.path.join(temporal, "replay.npy"), frames=args.fotos, semilla=0)
+        fotos = []
+        for i, frame in enumerate(np.load(replay)):
+            fotos.append(os.path.join(temporal, f"foto_{i}.jpg"))
+            Image.fromarray(frame).save(fotos[-1], quality=args.calidad)
+        print(f"Fotos: {args.fotos} JPEG de 1920x1080 (calidad {args.calidad})   repeticiones: {args.repeticiones}")
+
+        print(f"\n  {'destino':<14}{'modo':<10}{'decodifica':>12}{'tiempo':>11}{'imagen':>10}{'pico':>10}"
+              f"{'dif. media':>12}{'dif. máx.':>11}")
+        for destino in ("clasificador", "mobilenet", "miniatura"):
+            salidas = {}
+            for reducida in (False, True):
+                r = correr(MEDIR.format(label=label, reducida=reducida, destino=destino, fotos=fotos,
+                                        repeticiones=args.repeticiones))
+                abrir, terminar = destinos(label, reducida)[destino]
+                with abrir(fotos[0]) as img:
+                    salidas[reducida] = terminar(img.convert("RGB")).astype(np.int16)
+                diferencia = np.abs(salidas[reducida] - salidas[False]) if salidas[reducida].shape == salidas[False].shape else None
+                ancho, alto = r["decodificada"]
+                ms = statistics.median(r["tiempos"]) * 1000
+                print(f"  {destino:<14}{'reducida' if reducida else 'entera':<10}{f'{ancho}x{alto}':>12}"
+                      f"{ms:8.1f} ms{ancho * alto * 3 / 2**20:7.1f} MB{r['pico'] / 1024:7.1f} MB"
+                      + (f"{diferencia.mean():12.2f}{int(diferencia.max()):11d}" if diferencia is not None
+                         else f"{'(otro tamaño)':>23}"))
+
+
+if __name__ == "__main__":
+    main()
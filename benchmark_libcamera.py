@@ -0,0 +1,84 @@
+"""Compara el coste por foto: subprocess.run por clic vs. trabajador libcamera.
+
+Por defecto usa stub_libcamera_still.py en lugar del binario real, así se
+puede correr en cualquier Linux. En la Raspberry Pi:
+    python benchmark_libcamera.py --real
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from libcamera_trabajador import TrabajadorLibcamera
+
+STUB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub_libcamera_still.py")
+
+
+def resumen(nombre, tiempos):
+    print(f"{nombre:<28} media {statistics.mean(tiempos) * 1000:8.1f} ms   "
+          f"mediana {statistics.median(tiempos) * 1000:8.1f} ms   "
+          f"máx {max(tiempos) * 1000:8.1f} ms")
+
+
+def medir_subprocess(comando, directorio, fotos, timeout_ms):
+    tiempos = []
+    for i in range(fotos):
+        ruta = os.path.join(directorio, f"run_{i}.jpg")
+        inicio = time.perf_counter()
+        subprocess.run(comando + ["-n", "-o", ruta, "-t", str(timeout_ms)], check=True)
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+def medir_trabajador(comando, directorio, fotos):
+    trabajador = TrabajadorLibcamera(comando)
+    inicio = time.perf_counter()
+    trabajador.iniciar()
+    # La primera foto incluye el arranque; se reporta aparte
+    trabajador.solicitar_foto(os.path.join(directorio, "calentamiento.jpg"))
+    primera = trabajador.obtener_resultado(timeout=30)
+    arranque = time.perf_counter() - inicio
+    if primera["error"]:
+        raise RuntimeError(primera["error"])
+    tiempos = []
+    try:
+        for i in range(fotos):
+            inicio = time.perf_counter()
+            trabajador.solicitar_foto(os.path.join(directorio, f"trabajador_{i}.jpg"))
+            resultado = trabajador.obtener_resultado(timeout=30)
+            if resultado["error"]:
+                raise RuntimeError(resultado["error"])
+            tiempos.append(time.perf_counter() - inicio)
+    finally:
+        trabajador.detener()
+    return arranque, tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fotos", type=int, default=10)
+    parser.add_argument("--timeout-ms", type=int, default=200, help="-t usado por la ruta subprocess.run")
+    parser.add_argument("--real", action="store_true", help="Usar libcamera-jpeg/libcamera-still reales")
+    args = parser.parse_args()
+
+    if args.real:
+        comando_run, comando_trabajador = ["libcamera-jpeg"], ["libcamera-still"]
+    else:
+        comando_run = comando_trabajador = [sys.executable, STUB]
+
+    with tempfile.TemporaryDirectory() as directorio:
+        tiempos_run = medir_subprocess(comando_run, directorio, args.fotos, args.timeout_ms)
+        arranque, tiempos_trabajador = medir_trabajador(comando_trabajador, directorio, args.fotos)
+
+    print(f"Fotos por ruta: {args.fotos} ({'binario real' if args.real else 'stub'})")
+    resumen("subprocess.run por foto", tiempos_run)
+    resumen("trabajador (por foto)", tiempos_trabajador)
+    print(f"{'trabajador (arranque+1ª)':<28} {arranque * 1000:8.1f} ms")
+    print(f"Ahorro por foto: {(statistics.mean(tiempos_run) - statistics.mean(tiempos_trabajador)) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
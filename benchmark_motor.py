@@ -0,0 +1,107 @@
+"""Mide el coste por llamada que elimina el motor de inferencia residente.
+
+Compara el classify_image() que tenían los scripts modelo_* (resolver
+torch.device, model.to(device) y construir transforms.Compose en cada
+foto) con MotorInferencia.classify(), con el mismo modelo y la misma
+imagen. Reporta el desglose del trabajo repetido y la latencia total.
+
+    python benchmark_motor.py
+    python benchmark_motor.py --repeticiones 50 --imagen fotos/captura.jpg
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import torch
+from PIL import Image
+from torchvision import models, transforms
+
+from backends_captura import generar_replay_sintetico
+from motor_inferencia import MotorInferencia, etiqueta_perro_gato
+
+
+def crear_clasificador_anterior(model):
+    """Réplica de preprocess_image()/classify_image() de los scripts modelo_*."""
+    def preprocess_image(image_path):
+        preprocess = transforms.Compose([
+            transforms.Resize(256),
+            transforms.CenterCrop(224),
+            transforms.ToTensor(),
+            transforms.Normalize(mean=[0.485, 0.456, 0.406],
+                                 std=[0.229, 0.224, 0.225]),
+        ])
+        img = Image.open(image_path).convert('RGB')
+        return preprocess(img).unsqueeze(0)
+
+    def classify_image(image_path):
+        device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        input_tensor = preprocess_image(image_path).to(device)
+        model.to(device)
+        with torch.no_grad():
+            outputs = model(input_tensor)
+            _, predicted = torch.max(outputs, 1)
+            idx = predicted.item()
+        return etiqueta_perro_gato(idx)
+    return classify_image
+
+
+def cronometrar(funcion, repeticiones):
+    funcion() # Calentamiento
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.mean(tiempos) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--imagen", help="JPEG de prueba (por defecto uno sintético de 1080p)")
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    modelo = models.resnet18(weights=None) # Pesos aleatorios: el coste por llamada es el mismo
+    modelo.eval()
+    motor = MotorInferencia(modelo=modelo)
+    anterior = crear_clasificador_anterior(modelo)
+
+    with tempfile.TemporaryDirectory() as temporal:
+        ruta = args.imagen
+        if not ruta:
+            frame = np.load(generar_replay_sintetico(os.path.join(temporal, "sintetico.npy"), frames=1))[0]
+            ruta = os.path.join(temporal, "captura.jpg")
+            Image.fromarray(frame).save(ruta, "JPEG", quality=90)
+        with Image.open(ruta) as img:
+            frame = np.asarray(img.convert('RGB'))
+        lores = np.asarray(Image.fromarray(frame).resize((448, 256), Image.Resampling.BILINEAR))
+
+        r = args.repeticiones
+        repetido = {
+            "torch.device(...)": cronometrar(lambda: torch.device('cuda' if torch.cuda.is_available() else 'cpu'), r * 10),
+            "model.to(device)": cronometrar(lambda: modelo.to(torch.device('cpu')), r * 10),
+            "transforms.Compose(...)": cronometrar(lambda: transforms.Compose([
+                transforms.Resize(256), transforms.CenterCrop(224), transforms.ToTensor(),
+                transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])]), r * 10),
+        }
+        totales = {
+            "classify_image (antes), ruta": cronometrar(lambda: anterior(ruta), r),
+            "motor.classify, ruta": cronometrar(lambda: motor.classify(ruta), r),
+            "motor.classify, array lores": cronometrar(lambda: motor.classify(lores), r),
+            "motor.classify_batch x4 (por img)": cronometrar(lambda: motor.classify_batch([lores] * 4), r) / 4,
+        }
+
+    print("Trabajo repetido en cada llamada de classify_image() (ya no se hace):")
+    for nombre, ms in repetido.items():
+        print(f"  {nombre:<28}{ms:8.3f} ms")
+    print(f"  {'total':<28}{sum(repetido.values()):8.3f} ms")
+    print("Latencia por clasificación:")
+    for nombre, ms in totales.items():
+        print(f"  {nombre:<36}{ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
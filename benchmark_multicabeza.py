@@ -0,0 +1,123 @@
+"""Compara el modo multicabeza con los dos modelos por separado, uno detrás del otro.
+
+Por separado: la ResNet18 de ImageNet (perro/gato agrupado) y la ResNet34
+de 9 clases con R23.pth, dos forwards por foto. Multicabeza: el backbone
+de R23 una vez, con la cabeza perro/gato (fc de la ResNet34 de ImageNet)
+y la de 9 clases. Reporta la memoria de pesos, la latencia por frame y
+cuánto coinciden las etiquetas con las de los modelos por separado.
+
+Sin --r23 se simula un R23 ajustado con el backbone de ImageNet congelado
+(solo la fc nueva): el caso en que compartir el backbone es exacto. Sin
+red para descargar los pesos de ImageNet se usan pesos aleatorios.
+
+    python benchmark_multicabeza.py
+    python benchmark_multicabeza.py --r23 resnet34/R23.pth --frames 16 --backend torch
+"""
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+from torchvision import models
+
+from backends_captura import generar_replay_sintetico
+from cuantizacion import tamano_mb
+from motor_inferencia import MotorInferencia
+from multicabeza import MotorMulticabeza, construir_multicabeza, ruta_pesos
+
+
+def pesos_imagenet(arquitectura, destino):
+    """Copia los pesos de ImageNet de 'arquitectura' a 'destino' (aleatorios si no se pueden descargar)."""
+    try:
+        shutil.copy(ruta_pesos("imagenet", arquitectura), destino)
+    except Exception as e:
+        print(f"Aviso: sin pesos de ImageNet para {arquitectura} ({e}); se usan aleatorios.")
+        torch.save(getattr(models, arquitectura)(weights=None).state_dict(), destino)
+    return destino
+
+
+def latencia_ms(funcion, frames, repeticiones):
+    funcion(frames[0]) # Calentamiento
+    tiempos = []
+    for i in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(frames[i % len(frames)])
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--r23", help="R23.pth real (por defecto uno simulado con el backbone congelado)")
+    parser.add_argument("--frames", type=int, default=8)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--backend", default="torchscript", choices=("torch", "torchscript"))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporal:
+        resnet18 = pesos_imagenet("resnet18", os.path.join(temporal, "resnet18.pth"))
+        resnet34 = pesos_imagenet("resnet34", os.path.join(temporal, "resnet34.pth"))
+        r23 = os.path.join(temporal, "R23.pth")
+        if args.r23:
+            shutil.copy(args.r23, r23)
+        else:
+            estado = torch.load(resnet34)
+            fc = nn.Linear(512, 9)
+            estado["fc.weight"], estado["fc.bias"] = fc.weight.detach(), fc.bias.detach()
+            torch.save(estado, r23)
+        replay = generar_replay_sintetico(os.path.join(temporal, "replay.npy"), frames=args.frames,
+                                          tamano=(320, 240), semilla=0)
+        frames = [np.array(f) for f in np.load(replay)]
+
+        def red_pesos(arquitectura, ruta, clases=1000):
+            def construir():
+                red = getattr(models, arquitectura)(weights=None)
+                red.fc = nn.Linear(red.fc.in_features, clases)
+                red.load_state_dict(torch.load(ruta, map_location="cpu"))
+                return red
+            return construir
+
+        etiquetas_r23 = [f"clase{i}" for i in range(9)]
+        perro_gato = MotorInferencia(red_pesos("resnet18", resnet18), perro_gato=True, pesos=resnet18,
+                                     backend=args.backend)
+        nueve = MotorInferencia(red_pesos("resnet34", r23, 9), etiquetar=etiquetas_r23.__getitem__, pesos=r23,
+                                backend=args.backend)
+        backbone = {"arquitectura": "resnet34", "pesos": r23}
+        cabezas = [{"nombre": "perro_gato", "tipo": "perro_gato", "pesos": resnet34},
+                   {"nombre": "r23", "tipo": "lineal", "pesos": r23, "etiquetas": etiquetas_r23}]
+        multicabeza = MotorMulticabeza(backbone, cabezas, backend=args.backend)
+        # La misma cabeza perro/gato sobre la ResNet34 de ImageNet completa: mide si compartir es exacto
+        perro_gato_34 = MotorInferencia(red_pesos("resnet34", resnet34), perro_gato=True, pesos=resnet34,
+                                        backend=args.backend)
+
+        separados_ms = latencia_ms(lambda f: (perro_gato.classify(f), nueve.classify(f)), frames, args.repeticiones)
+        multicabeza_ms = latencia_ms(multicabeza.classify, frames, args.repeticiones)
+        # Pesos del nn.Module (el TorchScript congelado los guarda como constantes, fuera del state_dict)
+        memoria_separados = tamano_mb(red_pesos("resnet18", resnet18)()) + tamano_mb(red_pesos("resnet34", r23, 9)())
+        memoria_multicabeza = tamano_mb(construir_multicabeza(backbone, cabezas))
+
+        resultados = multicabeza.classify_batch(frames)
+        comparaciones = (("r23", "ResNet34 R23", nueve), ("perro_gato", "ResNet34 ImageNet", perro_gato_34),
+                         ("perro_gato", "ResNet18 ImageNet", perro_gato))
+        coincidencias = {f"{cabeza} vs. {nombre}": np.mean([r[cabeza][0] == etiqueta for r, etiqueta
+                                                           in zip(resultados, motor.classify_batch(frames))])
+                         for cabeza, nombre, motor in comparaciones}
+
+    print(f"\nBackend: {args.backend}   hilos: {torch.get_num_threads()}   frames: {args.frames}")
+    print(f"  {'':<30}{'pesos':>10}{'latencia/frame':>17}")
+    print(f"  {'por separado (2 forwards)':<30}{memoria_separados:7.1f} MB{separados_ms:14.1f} ms")
+    print(f"  {'multicabeza (1 forward)':<30}{memoria_multicabeza:7.1f} MB{multicabeza_ms:14.1f} ms")
+    print(f"  Ahorro: {memoria_separados - memoria_multicabeza:.1f} MB de pesos, "
+          f"{separados_ms - multicabeza_ms:.1f} ms por frame ({separados_ms / multicabeza_ms:.1f}x)")
+    print("Etiquetas iguales a las del modelo por separado:")
+    for nombre, valor in coincidencias.items():
+        print(f"  {nombre:<36}{valor:6.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Mide el flujo completo captura → clasificación → pantalla sin cámara.
+
+Usa el backend "replay" (carpeta de JPEGs o .npy) y reporta latencia por
+etapa y extremo a extremo, y el rendimiento en frames por segundo.
+Sin --origen se genera una pila sintética de 1080p.
+
+Con --en-cadena mide además las mismas etapas (captura, preproceso a
+tensor, forward con MotorInferencia y pantalla) una detrás de otra y en
+PipelineCaptura, cada una en su hilo con colas de --capacidad lugares:
+frames/s, ocupación de cada etapa y cuánto se acerca cada modo al ritmo
+de la etapa más lenta (el techo). Con una cámara a ritmo fijo (--fps) el
+frame N+1 se espera y se prepara mientras el N está en el forward; sin
+--fps, en una CPU de un núcleo las etapas solo se reparten el mismo núcleo.
+
+    python benchmark_pipeline.py --frames 30
+    python benchmark_pipeline.py --en-cadena --fps 15 --frames 60
+    python benchmark_pipeline.py --origen fotos_capturadas/ --fps 15
+    python benchmark_pipeline.py --stream main            # IA sobre el 1080p (antes)
+    python benchmark_pipeline.py --backend picamera2      # en la Raspberry Pi
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from PIL import Image
+
+from backends_captura import crear_backend, generar_replay_sintetico
+from captura_memoria import array_a_imagen
+from pipeline_captura import CAPACIDAD, AnilloBuffers, Etapa, PipelineCaptura, estadisticas_etapas
+from trabajo_fondo import percentil
+
+TAMANO_PANTALLA = (590, 440) # Label de camera_sexta_prueba.py menos el margen
+
+
+def imprimir_etapas(tiempos):
+    print(f"{'etapa':<14}{'media ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for etapa, valores in tiempos.items():
+        print(f"{etapa:<14}{statistics.mean(valores) * 1000:>10.1f}"
+              f"{percentil(valores, 50) * 1000:>10.1f}{percentil(valores, 95) * 1000:>10.1f}")
+
+
+def construir_clasificador(pesos):
+    """Mismo modelo y transformaciones que los scripts modelo_* (ResNet18)."""
+    import torch
+    from torchvision import models, transforms
+    modelo = models.resnet18(weights=models.ResNet18_Weights.DEFAULT if pesos == "imagenet" else None)
+    modelo.eval()
+    preprocesado = transforms.Compose([
+        transforms.Resize(256),
+        transforms.CenterCrop(224),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
+    ])
+
+    def clasificar(imagen):
+        with torch.no_grad():
+            salida = modelo(preprocesado(imagen).unsqueeze(0))
+        return int(salida.argmax(1).item())
+    return clasificar
+
+
+def mostrar(imagen, tamano=TAMANO_PANTALLA):
+    """Equivalente a mostrar_imagen() sin Tk: ajustar al label con LANCZOS."""
+    ancho, alto = imagen.size
+    escala = min(tamano[0] / ancho, tamano[1] / alto)
+    return imagen.resize((max(1, int(ancho * escala)), max(1, int(alto * escala))), Image.Resampling.LANCZOS)
+
+
+def medir_en_cadena(backend, motor, args):
+    """Mismas etapas en serie (un hilo) y en cadena (PipelineCaptura). Devuelve las estadísticas de cada modo."""
+    anillo = AnilloBuffers(motor.buffers_entrada, args.capacidad)
+    etapas = [
+        ("captura", lambda: backend.capturar_array(args.stream)),
+        ("preproceso", lambda frame: (frame, motor.preparar([frame], anillo.siguiente()))),
+        ("inferencia", lambda par: (par[0], motor.probabilidades_entrada(par[1]))),
+        ("pantalla", lambda par: mostrar(array_a_imagen(par[0]))), # En la GUI, en el hilo de Tk
+    ]
+
+    en_serie = [Etapa(nombre, funcion) for nombre, funcion in etapas]
+    inicio = time.perf_counter()
+    for _ in range(args.frames):
+        valor = None
+        for etapa in en_serie:
+            t0 = time.perf_counter()
+            valor = etapa.funcion() if etapa is en_serie[0] else etapa.funcion(valor)
+            etapa.ocupado += time.perf_counter() - t0
+            etapa.frames += 1
+    serie = estadisticas_etapas(en_serie, args.frames, time.perf_counter() - inicio)
+
+    pipeline = PipelineCaptura(etapas, capacidad=args.capacidad, frames=args.frames)
+    pipeline.iniciar()
+    for _ in pipeline:
+        pass
+    pipeline.detener()
+    return {"serie": serie, "cadena": pipeline.estadisticas()}
+
+
+def imprimir_en_cadena(modos, args):
+    print(f"\nEn cadena: {args.frames} frames, colas de {args.capacidad} lugar(es)"
+          + (f", cámara a {args.fps:g} fps" if args.fps else ", cámara sin límite de ritmo"))
+    print(f"  {'modo':<8}{'frames/s':>10}{'cuello':>12}{'techo':>9}{'eficiencia':>12}")
+    for modo, e in modos.items():
+        print(f"  {modo:<8}{e['fps']:>10.2f}{e['cuello']:>12}{e['fps_cuello']:>9.2f}{e['eficiencia']:>12.0%}")
+    print(f"\n  {'etapa':<12}{'ms serie':>10}{'ms cadena':>11}{'ocup. serie':>13}{'ocup. cadena':>14}"
+          f"{'espera':>8}{'bloqueo':>9}")
+    serie, cadena = modos["serie"]["etapas"], modos["cadena"]["etapas"]
+    for nombre, datos in cadena.items():
+        print(f"  {nombre:<12}{serie[nombre]['ms_por_frame']:>10.1f}{datos['ms_por_frame']:>11.1f}"
+              f"{serie[nombre]['ocupacion']:>13.0%}{datos['ocupacion']:>14.0%}"
+              f"{datos['espera']:>8.0%}{datos['bloqueo']:>9.0%}")
+    print("  (techo: frames/s de la etapa más lenta; espera/bloqueo: fracción del tiempo en cadena"
+          " esperando entrada o lugar en la cola siguiente)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="replay")
+    parser.add_argument("--origen", help="Carpeta de JPEGs o .npy (N, H, W, 3) para replay")
+    parser.add_argument("--fps", type=float, default=0, help="Ritmo del replay (0 = sin límite)")
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--stream", choices=["lores", "main"], default="lores",
+                        help="Stream que alimenta IA y pantalla")
+    parser.add_argument("--pesos", choices=["ninguno", "imagenet"], default="ninguno",
+                        help="'imagenet' descarga los pesos; la latencia es la misma")
+    parser.add_argument("--en-cadena", action="store_true",
+                        help="Comparar además serie vs. PipelineCaptura (frames/s y ocupación por etapa)")
+    parser.add_argument("--capacidad", type=int, default=CAPACIDAD, help="Lugares por cola en --en-cadena")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporal:
+        opciones = {}
+        if args.backend == "replay":
+            origen = args.origen or generar_replay_sintetico(os.path.join(temporal, "sintetico.npy"), frames=10)
+            opciones = {"origen": origen, "fps": args.fps or None}
+        backend = crear_backend(args.backend, **opciones)
+        clasificar = construir_clasificador(args.pesos)
+
+        tiempos = {"captura": [], "conversion": [], "clasificacion": [], "pantalla": [], "total": []}
+        with backend:
+            clasificar(array_a_imagen(backend.capturar_array(args.stream))) # Calentamiento
+            inicio_total = time.perf_counter()
+            for _ in range(args.frames):
+                t0 = time.perf_counter()
+                frame = backend.capturar_array(args.stream)
+                t1 = time.perf_counter()
+                imagen = array_a_imagen(frame)
+                t2 = time.perf_counter()
+                clasificar(imagen)
+                t3 = time.perf_counter()
+                mostrar(imagen)
+                t4 = time.perf_counter()
+                for etapa, valor in zip(tiempos, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t4 - t0)):
+                    tiempos[etapa].append(valor)
+            duracion = time.perf_counter() - inicio_total
+            if args.en_cadena:
+                from torchvision import models
+                from motor_inferencia import MotorInferencia
+                motor = MotorInferencia(modelo=models.resnet18(
+                    weights=models.ResNet18_Weights.DEFAULT if args.pesos == "imagenet" else None))
+                modos = medir_en_cadena(backend, motor, args)
+
+    print(f"Backend: {args.backend}   stream: {args.stream}   frames: {args.frames}   "
+          f"tamaño: {frame.shape[1]}x{frame.shape[0]}")
+    imprimir_etapas(tiempos)
+    print(f"Rendimiento: {args.frames / duracion:.2f} frames/s")
+    if args.en_cadena:
+        imprimir_en_cadena(modos, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Mide cuánto cuesta mostrar una captura con y sin la caché de pirámides (miniaturas.CachePiramides).
+
+Con --fotos capturas sintéticas JPEG de 1920x1080, mide por foto
+mostrada en un label de --label:
+
+    entera        Image.open + LANCZOS de la foto entera (el mostrar_imagen original)
+    reducida      decodificación reducida (decodificacion_jpeg) + LANCZOS
+    en caché      nivel de la pirámide ya en memoria + LANCZOS
+    .miniaturas   pirámide leída de los JPEG junto a la foto (caché vacía, tras reiniciar)
+
+el coste de armar la pirámide al guardar (en el hilo de GuardadorJPEG) y
+la memoria por foto. Después simula recorrer la galería: --visitas fotos
+al azar (con más peso las recientes) alternando dos tamaños de ventana,
+con el tope de memoria de --memoria-mb, y reporta aciertos y tiempo total.
+
+    python benchmark_piramides.py
+    python benchmark_piramides.py --fotos 30 --memoria-mb 12 --label 800x600   # más fotos que caben
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+from backends_captura import generar_replay_sintetico
+from decodificacion_jpeg import abrir_reducida
+from miniaturas import MEMORIA_PIRAMIDES_MB, CachePiramides, memoria_niveles, miniatura
+
+
+def par(texto):
+    return tuple(int(v) for v in texto.split("x"))
+
+
+def mediana_ms(funcion, argumentos):
+    tiempos = []
+    for a in argumentos:
+        inicio = time.perf_counter()
+        funcion(a)
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fotos", type=int, default=12)
+    parser.add_argument("--label", default="590x440", help="Tamaño del label (ANCHOxALTO)")
+    parser.add_argument("--label-alternativo", default="300x220", help="Segundo tamaño de ventana al recorrer")
+    parser.add_argument("--visitas", type=int, default=60)
+    parser.add_argument("--memoria-mb", type=float, default=MEMORIA_PIRAMIDES_MB)
+    args = parser.parse_args()
+
+    caja, caja_alternativa = par(args.label), par(args.label_alternativo)
+    with tempfile.TemporaryDirectory() as temporal:
+        replay = generar_replay_sintetico(os.path.join(temporal, "replay.npy"), frames=args.fotos, semilla=0)
+        frames = np.load(replay)
+        rutas = [os.path.join(temporal, f"foto_{i}.jpg") for i in range(args.fotos)]
+        en_disco = CachePiramides(memoria_mb=10**6, en_disco=True)
+        for ruta, frame in zip(rutas, frames):
+            Image.fromarray(frame).save(ruta, quality=90)
+
+        # Al guardar: la pirámide sale de la captura que ya está en memoria (y en .miniaturas/ con en_disco)
+        imagenes = [Image.fromarray(f) for f in frames]
+        armar_ms = mediana_ms(lambda i: CachePiramides().agregar(rutas[i], imagenes[i]), range(args.fotos))
+        armar_disco_ms = mediana_ms(lambda i: en_disco.agregar(rutas[i], imagenes[i]), range(args.fotos))
+        memoria_foto = memoria_niveles(en_disco.obtener(rutas[0])) / 2**20
+
+        def entera(ruta):
+            with Image.open(ruta) as img:
+                img.thumbnail(caja, Image.Resampling.LANCZOS, reducing_gap=None) # Sin draft: la foto entera
+
+        def reducida(ruta):
+            with abrir_reducida(ruta, caja=caja) as img:
+                img.thumbnail(caja, Image.Resampling.LANCZOS)
+
+        modos = {
+            "entera": entera,
+            "reducida": reducida,
+            "en caché": lambda ruta: miniatura(en_disco.obtener(ruta), caja),
+            ".miniaturas": lambda ruta: miniatura(CachePiramides(en_disco=True).obtener(ruta), caja),
+        }
+        tiempos = {nombre: mediana_ms(funcion, rutas) for nombre, funcion in modos.items()}
+
+        # Galería: visitas al azar, más a las recientes, cambiando el tamaño de la ventana a mitad
+        generador = np.random.default_rng(0)
+        pesos = np.linspace(1, 3, args.fotos)
+        visitas = generador.choice(args.fotos, size=args.visitas, p=pesos / pesos.sum())
+        cajas = [caja if n < args.visitas // 2 else caja_alternativa for n in range(args.visitas)]
+        galeria = CachePiramides(memoria_mb=args.memoria_mb)
+        inicio = time.perf_counter()
+        for i, caja_visita in zip(visitas, cajas):
+            miniatura(galeria.obtener(rutas[i]), caja_visita)
+        galeria_ms = (time.perf_counter() - inicio) * 1000
+        inicio = time.perf_counter()
+        for i, caja_visita in zip(visitas, cajas):
+            with abrir_reducida(rutas[i], caja=caja_visita) as img:
+                img.thumbnail(caja_visita, Image.Resampling.LANCZOS)
+        galeria_sin_ms = (time.perf_counter() - inicio) * 1000
+
+    print(f"Fotos: {args.fotos} JPEG de 1920x1080   label: {args.label}")
+    print(f"Pirámide por foto: {memoria_foto:.2f} MB; armarla al guardar: {armar_ms:.1f} ms "
+          f"({armar_disco_ms:.1f} ms con .miniaturas/)")
+    print(f"\n  {'mostrar una foto':<16}{'mediana':>10}")
+    for nombre, ms in tiempos.items():
+        print(f"  {nombre:<16}{ms:7.1f} ms")
+    estadisticas = galeria.estadisticas()
+    print(f"\nGalería: {args.visitas} visitas, ventana {args.label} → {args.label_alternativo}, "
+          f"tope {args.memoria_mb:g} MB ({estadisticas['fotos']} fotos en caché al final)")
+    print(f"  aciertos: {estadisticas['aciertos']}/{args.visitas}   "
+          f"total: {galeria_ms:.0f} ms con caché, {galeria_sin_ms:.0f} ms sin ella (decodificación reducida)")
+
+
+if __name__ == "__main__":
+    main()
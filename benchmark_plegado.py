@@ -0,0 +1,128 @@
+"""Mide el plegado de Normalize y BatchNorm en las convoluciones (plegado.py).
+
+Para ResNet18, MobileNetV2 y la ResNet34 de 9 clases compara, con el
+mismo frame de cámara:
+
+    original      PreprocesadorTensor normaliza, el modelo tiene BatchNorm
+    plegado       PreprocesadorTensor(normalizar=False) + preparar_entrada_cruda
+
+en cada backend: latencia del preprocesado, del forward y total, número
+de BatchNorm que quedan, y la diferencia máxima de logits (comprobada
+con np.allclose y --atol/--rtol). Los pesos son aleatorios con
+estadísticas de BatchNorm no triviales (el coste es el mismo).
+
+    python benchmark_plegado.py
+    python benchmark_plegado.py --backends torch onnx --frame 1920x1080
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+from torchvision import models
+
+from backends_captura import generar_replay_sintetico
+from cache_modelos import cargar_modelo
+from motor_onnx import onnxruntime_available
+from plegado import preparar_entrada_cruda
+from preproceso_tensor import PreprocesadorTensor
+
+
+def constructores():
+    def r23(weights=None):
+        red = models.resnet34(weights=weights)
+        red.fc = nn.Linear(red.fc.in_features, 9)
+        return red
+    return [("resnet18", models.resnet18), ("mobilenet_v2", models.mobilenet_v2), ("resnet34 R23 (9 clases)", r23)]
+
+
+def con_estadisticas(red):
+    """BatchNorm con media, varianza y escala distintas de las iniciales (como un modelo entrenado)."""
+    generador = torch.Generator().manual_seed(0)
+    with torch.no_grad():
+        for modulo in red.modules():
+            if isinstance(modulo, nn.BatchNorm2d):
+                modulo.running_mean.copy_(torch.rand(modulo.num_features, generator=generador) * 0.4 - 0.2)
+                modulo.running_var.copy_(torch.rand(modulo.num_features, generator=generador) * 1.5 + 0.5)
+                modulo.weight.copy_(torch.rand(modulo.num_features, generator=generador) + 0.5)
+    return red.eval()
+
+
+def mediana_ms(funcion, repeticiones):
+    funcion() # Calentamiento
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000
+
+
+def contar_batchnorm(modelo):
+    if isinstance(modelo, torch.jit.ScriptModule):
+        return str(modelo.graph).count("batch_norm") # Congelado: BN plegado en las constantes
+    if not isinstance(modelo, nn.Module):
+        return "-" # SesionONNX: ONNX Runtime fusiona por su cuenta
+    return sum(isinstance(m, nn.BatchNorm2d) for m in modelo.modules())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["torch", "torchscript", "onnx"],
+                        choices=("torch", "torchscript", "onnx"))
+    parser.add_argument("--frame", default="640x480", help="Tamaño del frame de cámara (ANCHOxALTO)")
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--atol", type=float, default=1e-4)
+    parser.add_argument("--rtol", type=float, default=1e-4)
+    args = parser.parse_args()
+
+    backends = [b for b in args.backends if b != "onnx" or onnxruntime_available]
+    ancho, alto = (int(v) for v in args.frame.split("x"))
+    print(f"Hilos de torch: {torch.get_num_threads()}   frame: {ancho}x{alto}   backends: {', '.join(backends)}")
+
+    todo_ok = True
+    with tempfile.TemporaryDirectory() as temporal:
+        frame = np.array(np.load(generar_replay_sintetico(os.path.join(temporal, "replay.npy"), frames=1,
+                                                          tamano=(ancho, alto)))[0])
+        normalizado, crudo = PreprocesadorTensor(), PreprocesadorTensor(normalizar=False)
+        for nombre, constructor in constructores():
+            ruta = os.path.join(temporal, nombre.split()[0] + ".pth")
+            torch.save(con_estadisticas(constructor(weights=None)).state_dict(), ruta)
+
+            def construir(plegar=False):
+                red = constructor(weights=None)
+                red.load_state_dict(torch.load(ruta, map_location="cpu"))
+                red.eval()
+                return preparar_entrada_cruda(red) if plegar else red
+
+            with torch.inference_mode():
+                referencia = construir()(normalizado.preparar(frame)).numpy()
+            print(f"\n{nombre}")
+            print(f"  {'backend':<24}{'preproceso':>12}{'forward':>12}{'total':>12}{'BN':>6}"
+                  f"{'dif. máx.':>12}{'tolerancia':>12}")
+            for backend in backends:
+                for plegar, preprocesador in ((False, normalizado), (True, crudo)):
+                    variante = "float32-cruda" if plegar else "float32"
+                    modelo = cargar_modelo(lambda: construir(plegar), ruta, backend, variante)
+                    with torch.inference_mode(): # Los buffers del preprocesador se crearon en este modo
+                        entrada = preprocesador.preparar(frame)
+                        ms_pre = mediana_ms(lambda: preprocesador.preparar(frame), args.repeticiones)
+                        ms_fwd = mediana_ms(lambda: modelo(entrada), args.repeticiones)
+                        ms_total = mediana_ms(lambda: modelo(preprocesador.preparar(frame)), args.repeticiones)
+                        salida = modelo(preprocesador.preparar(frame)).numpy()
+                    diferencia = float(np.abs(salida - referencia).max())
+                    ok = np.allclose(salida, referencia, atol=args.atol, rtol=args.rtol)
+                    todo_ok &= ok
+                    etiqueta = f"{backend} {'plegado' if plegar else 'original'}"
+                    print(f"  {etiqueta:<24}{ms_pre:9.2f} ms{ms_fwd:9.1f} ms{ms_total:9.1f} ms"
+                          f"{contar_batchnorm(modelo):>6}{diferencia:12.2e}{'OK' if ok else 'FALLA':>12}")
+
+    print(f"\nLogits dentro de tolerancia: {'sí' if todo_ok else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
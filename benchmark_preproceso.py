@@ -0,0 +1,170 @@
+"""Compara el preprocesado de prueba_pytorch.py (cadena pytorch_transforms) con PreprocesadorTensor.
+
+Por etapa reporta el tiempo medio, y por llamada cuántos buffers nuevos
+se crean: tensores de torch (contados con un TorchDispatchMode) e
+imágenes PIL intermedias. También la diferencia máxima entre ambas
+entradas ya normalizadas.
+
+--submuestrear mide el atajo opcional para frames grandes (ver
+PreprocesadorTensor): más rápido, pero no idéntico a pytorch_transforms.
+
+    python benchmark_preproceso.py
+    python benchmark_preproceso.py --tamanos 448x256 1920x1080 --repeticiones 50
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import torch
+import torchvision.transforms as T
+from PIL import Image
+from torch.utils._python_dispatch import TorchDispatchMode
+
+from backends_captura import generar_replay_sintetico
+from preproceso_tensor import PreprocesadorTensor, MEDIA_IMAGENET, STD_IMAGENET
+
+
+class ContadorAsignaciones(TorchDispatchMode):
+    """Cuenta los tensores nuevos (con almacenamiento propio) que crean las operaciones de torch."""
+
+    def __init__(self):
+        super().__init__()
+        self.tensores = 0
+        self.bytes = 0
+
+    def __torch_dispatch__(self, func, types, args=(), kwargs=None):
+        kwargs = kwargs or {}
+        entradas = {t.untyped_storage().data_ptr() for t in _tensores((args, kwargs))}
+        salida = func(*args, **kwargs)
+        for t in _tensores(salida):
+            if t.untyped_storage().data_ptr() not in entradas:
+                self.tensores += 1
+                self.bytes += t.untyped_storage().nbytes()
+        return salida
+
+
+def _tensores(objeto):
+    if isinstance(objeto, torch.Tensor):
+        yield objeto
+    elif isinstance(objeto, (list, tuple)):
+        for o in objeto:
+            yield from _tensores(o)
+    elif isinstance(objeto, dict):
+        for o in objeto.values():
+            yield from _tensores(o)
+
+
+class ContadorPIL:
+    """Cuenta las imágenes PIL nuevas creadas (Image._new) mientras está activo."""
+
+    def __enter__(self):
+        self.imagenes = 0
+        self.bytes = 0
+        self._original = Image.Image._new
+        contador = self
+
+        def _new(imagen, nucleo):
+            nueva = contador._original(imagen, nucleo)
+            contador.imagenes += 1
+            contador.bytes += nueva.width * nueva.height * len(nueva.getbands())
+            return nueva
+        Image.Image._new = _new
+        return self
+
+    def __exit__(self, *exc):
+        Image.Image._new = self._original
+        return False
+
+
+def etapas_transforms(frame):
+    """La ruta actual: array → PIL → Resize → CenterCrop → ToTensor → Normalize → unsqueeze."""
+    etapas = [
+        ("array→PIL", lambda x: Image.fromarray(x)),
+        ("Resize(256)", T.Resize(256)),
+        ("CenterCrop(224)", T.CenterCrop(224)),
+        ("ToTensor", T.ToTensor()),
+        ("Normalize", T.Normalize(mean=MEDIA_IMAGENET, std=STD_IMAGENET)),
+        ("unsqueeze(0)", lambda x: x.unsqueeze(0)),
+    ]
+    return etapas
+
+
+def etapas_rapidas(preprocesador, frame):
+    """La ruta nueva desglosada en las mismas etapas que preparar()."""
+    plan = preprocesador._plan(frame.shape[0], frame.shape[1])
+    destino = preprocesador.entrada[0]
+    filas, columnas = plan["recorte"]
+    etapas = [
+        ("from_numpy+recorte", lambda x: preprocesador._a_vista(x)[filas, columnas].permute(2, 0, 1)),
+    ]
+    if plan["identidad"]:
+        etapas.append(("uint8→float", lambda x: destino.copy_(x)))
+    else:
+        etapas += [
+            ("uint8→float", lambda x: plan["recorte_f"].copy_(x)),
+            ("filtro filas", lambda x: torch.matmul(plan["filas"], x, out=plan["intermedio"])),
+            ("filtro columnas", lambda x: torch.matmul(x, plan["columnas"], out=destino)),
+        ]
+    etapas.append(("normalizar", lambda x: x.mul_(preprocesador._escala).add_(preprocesador._desplazamiento)))
+    return etapas
+
+
+def medir(etapas, frame, repeticiones):
+    tiempos = {nombre: [] for nombre, _ in etapas}
+    for _ in range(repeticiones):
+        x = frame
+        for nombre, etapa in etapas:
+            inicio = time.perf_counter()
+            x = etapa(x)
+            tiempos[nombre].append(time.perf_counter() - inicio)
+    with ContadorAsignaciones() as torch_c, ContadorPIL() as pil_c:
+        x = frame
+        for _, etapa in etapas:
+            x = etapa(x)
+    return tiempos, torch_c, pil_c
+
+
+def imprimir(titulo, tiempos, torch_c, pil_c):
+    print(f"  {titulo}")
+    total = 0.0
+    for nombre, valores in tiempos.items():
+        media = statistics.mean(valores) * 1000
+        total += media
+        print(f"    {nombre:<20}{media:8.2f} ms")
+    print(f"    {'total':<20}{total:8.2f} ms   tensores nuevos: {torch_c.tensores} "
+          f"({torch_c.bytes / 1e6:.2f} MB)   imágenes PIL nuevas: {pil_c.imagenes} ({pil_c.bytes / 1e6:.2f} MB)")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanos", nargs="+", default=["448x256", "640x480", "1920x1080"],
+                        help="Frames ANCHOxALTO (448x256 es el lores de la cámara)")
+    parser.add_argument("--repeticiones", type=int, default=30)
+    parser.add_argument("--submuestrear", action="store_true", help="Submuestreo previo en frames grandes (aproximado)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporal:
+        base = np.load(generar_replay_sintetico(os.path.join(temporal, "sintetico.npy"), frames=1))[0]
+    preprocesador = PreprocesadorTensor(submuestrear=args.submuestrear)
+    cadena = T.Compose([T.Resize(256), T.CenterCrop(224), T.ToTensor(),
+                        T.Normalize(mean=MEDIA_IMAGENET, std=STD_IMAGENET)])
+
+    for tamano in args.tamanos:
+        ancho, alto = (int(v) for v in tamano.split("x"))
+        frame = np.asarray(Image.fromarray(base).resize((ancho, alto), Image.Resampling.BILINEAR))
+        referencia = cadena(Image.fromarray(frame))
+        rapido = preprocesador.preparar(frame)[0]
+        diferencia = float((referencia - rapido).abs().max())
+        print(f"\nFrame {ancho}x{alto}   diferencia máx. con pytorch_transforms: {diferencia:.4f}")
+        t_base = imprimir("pytorch_transforms", *medir(etapas_transforms(frame), frame, args.repeticiones))
+        t_rapido = imprimir("PreprocesadorTensor", *medir(etapas_rapidas(preprocesador, frame), frame,
+                                                           args.repeticiones))
+        print(f"  Aceleración: {t_base / t_rapido:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
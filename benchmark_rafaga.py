@@ -0,0 +1,85 @@
+"""Latencia por imagen según el tamaño de lote (ráfaga) en CPU.
+
+Mide un forward de ResNet18 y MobileNetV2 con lotes de 1, 4 y 8 imágenes
+y reporta ms por lote y ms por imagen. También muestra cómo cambia la
+predicción agregada ("media" vs "votacion") sobre una ráfaga de frames
+de replay.
+
+    python benchmark_rafaga.py
+    python benchmark_rafaga.py --lotes 1 2 4 8 --hilos 4 --modelos resnet18
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import torch
+from torchvision import models, transforms
+
+from backends_captura import crear_backend, generar_replay_sintetico
+from captura_memoria import array_a_imagen
+from rafaga import capturar_rafaga, clasificar_lote_torch, agregar, AGREGACIONES
+
+MODELOS = {
+    "resnet18": models.resnet18,
+    "mobilenet_v2": models.mobilenet_v2,
+}
+
+
+def medir(modelo, lote, repeticiones):
+    with torch.no_grad():
+        modelo(lote) # Calentamiento
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            modelo(lote)
+            tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lotes", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--modelos", nargs="+", choices=list(MODELOS), default=list(MODELOS))
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--hilos", type=int, default=0, help="torch.set_num_threads (0 = por defecto)")
+    args = parser.parse_args()
+    if args.hilos:
+        torch.set_num_threads(args.hilos)
+    print(f"torch {torch.__version__}, {torch.get_num_threads()} hilos")
+
+    for nombre in args.modelos:
+        modelo = MODELOS[nombre](weights=None) # Pesos aleatorios: la latencia es la misma
+        modelo.eval()
+        base = None
+        print(f"\n{nombre}")
+        print(f"{'lote':>6}{'ms/lote':>12}{'ms/imagen':>12}{'vs lote 1':>12}")
+        for tamano in args.lotes:
+            segundos = medir(modelo, torch.randn(tamano, 3, 224, 224), args.repeticiones)
+            por_imagen = segundos / tamano * 1000
+            base = base or por_imagen
+            print(f"{tamano:>6}{segundos * 1000:>12.1f}{por_imagen:>12.1f}{base / por_imagen:>11.2f}x")
+
+    # Agregación sobre una ráfaga real del flujo (replay sintético, lores)
+    preprocesado = transforms.Compose([
+        transforms.Resize(256),
+        transforms.CenterCrop(224),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
+    ])
+    with tempfile.TemporaryDirectory() as temporal:
+        origen = generar_replay_sintetico(os.path.join(temporal, "sintetico.npy"), frames=max(args.lotes))
+        with crear_backend("replay", origen=origen, fps=None) as backend:
+            frames = capturar_rafaga(backend, max(args.lotes))
+    lote = torch.stack([preprocesado(array_a_imagen(f)) for f in frames])
+    probabilidades = clasificar_lote_torch(modelo, lote)
+    print(f"\nRáfaga de {len(frames)} frames con {nombre}:")
+    for metodo in AGREGACIONES:
+        resultado = agregar(probabilidades, metodo)
+        print(f"  {metodo:<9} clase {resultado['indice']:>4}  confianza {resultado['confianza']:.3f}  "
+              f"acuerdo {resultado['acuerdo']:.0%}  votos {resultado['votos']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Mide el coste de redibujar la foto mientras se arrastra el borde de la ventana (miniaturas.py).
+
+Simula un arrastre de --eventos <Configure> a --hz por segundo, con el
+label pasando de --desde a --hasta, sobre una foto sintética JPEG de
+1920x1080, y compara:
+
+    antes        en cada evento: Image.open + thumbnail LANCZOS
+    pirámide     en cada evento: nivel más cercano + LANCZOS (sin debounce)
+    visor        como VisorImagen: un solo redibujado tras el último evento
+
+Reporta el coste por evento, el total del arrastre (tiempo de CPU en el
+hilo de Tk) y el coste de decodificar la foto y armar la pirámide, que
+se paga una vez al mostrarla. Sin PhotoImage (no hace falta pantalla);
+el JPEG se lee de la caché de disco del sistema, así que 'antes' no
+incluye la E/S real de una tarjeta SD.
+
+    python benchmark_redimension.py
+    python benchmark_redimension.py --pantalla 800x480 --desde 700x420 --hasta 200x150
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+from backends_captura import generar_replay_sintetico
+from decodificacion_jpeg import abrir_reducida
+from miniaturas import ESPERA_REDIMENSION_MS, MARGEN, elegir_nivel, encajar, piramide
+
+
+def par(texto):
+    return tuple(int(v) for v in texto.split("x"))
+
+
+def cronometrar(funcion, argumentos):
+    """Tiempo de cada llamada funcion(a) en ms."""
+    tiempos = []
+    for a in argumentos:
+        inicio = time.perf_counter()
+        funcion(a)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pantalla", default="480x320", help="Tamaño de la pantalla (ANCHOxALTO)")
+    parser.add_argument("--desde", default="460x300", help="Tamaño inicial del label")
+    parser.add_argument("--hasta", default="160x120", help="Tamaño final del label")
+    parser.add_argument("--eventos", type=int, default=60)
+    parser.add_argument("--hz", type=float, default=60.0, help="<Configure> por segundo durante el arrastre")
+    args = parser.parse_args()
+
+    desde, hasta = np.array(par(args.desde)), np.array(par(args.hasta))
+    cajas = [tuple(int(v) - MARGEN for v in desde + (hasta - desde) * i / max(1, args.eventos - 1))
+             for i in range(args.eventos)]
+
+    with tempfile.TemporaryDirectory() as temporal:
+        frame = np.load(generar_replay_sintetico(os.path.join(temporal, "replay.npy"), frames=1))[0]
+        ruta = os.path.join(temporal, "captura.jpg")
+        Image.fromarray(frame).save(ruta, quality=90)
+
+        def antes(caja):
+            with Image.open(ruta) as img:
+                img.thumbnail(caja, Image.LANCZOS)
+
+        def preparar(_):
+            with abrir_reducida(ruta, caja=par(args.pantalla)) as img:
+                return piramide(img.convert("RGB"))
+
+        preparar_ms = statistics.median(cronometrar(preparar, range(5)))
+        niveles = preparar(None)
+
+        def con_piramide(caja):
+            destino = encajar(niveles[0].size, caja)
+            nivel = elegir_nivel(niveles, destino)
+            if nivel.size != destino:
+                nivel.resize(destino, Image.Resampling.LANCZOS)
+
+        antes_ms = cronometrar(antes, cajas)
+        piramide_ms = cronometrar(con_piramide, cajas)
+
+    # Con los eventos más seguidos que la espera, el visor redibuja una sola vez, al final
+    separacion_ms = 1000 / args.hz
+    dibujos = 1 if separacion_ms < ESPERA_REDIMENSION_MS else args.eventos
+    visor_total = dibujos * piramide_ms[-1]
+
+    print(f"Arrastre: {args.eventos} <Configure> a {args.hz:.0f} Hz, label {args.desde} → {args.hasta}, "
+          f"pantalla {args.pantalla}")
+    print(f"Pirámide: {' · '.join(f'{n.width}x{n.height}' for n in niveles)}   "
+          f"decodificar y armarla (una vez): {preparar_ms:.1f} ms")
+    print(f"\n  {'':<12}{'por evento':>12}{'dibujos':>10}{'total arrastre':>17}")
+    print(f"  {'antes':<12}{statistics.median(antes_ms):9.2f} ms{args.eventos:>10}{sum(antes_ms):14.1f} ms")
+    print(f"  {'pirámide':<12}{statistics.median(piramide_ms):9.2f} ms{args.eventos:>10}{sum(piramide_ms):14.1f} ms")
+    print(f"  {'visor':<12}{'-':>12}{dibujos:>10}{visor_total:14.1f} ms   (espera {ESPERA_REDIMENSION_MS} ms)")
+    print(f"\nPresupuesto por frame a {args.hz:.0f} Hz: {separacion_ms:.1f} ms; 'antes' lo supera en "
+          f"{np.mean(np.array(antes_ms) > separacion_ms):.0%} de los eventos.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Compara la MobileNetV2 de Keras (model.predict) con la misma red en el intérprete TFLite (XNNPACK).
+
+Cada escenario corre en un proceso nuevo y reporta:
+
+    arranque    segundos desde que arranca el proceso hasta tener el
+                modelo listo (imports + carga + primera predicción)
+    latencia    mediana por imagen, preprocesado incluido
+    RSS         memoria residente máxima del proceso (VmHWM)
+    top-3       coincidencia de las 3 clases con las de model.predict
+
+TFLite se mide con cada cantidad de hilos de --hilos. Las imágenes son
+frames sintéticos fijos. Los pesos de ImageNet se descargan la primera
+vez; con --sin-pesos se usan pesos aleatorios (misma red, mismo coste).
+Los pesos y el .tflite se generan en una carpeta temporal.
+
+    python benchmark_tflite.py
+    python benchmark_tflite.py --hilos 1 2 4 --repeticiones 50
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+from backends_captura import generar_replay_sintetico
+from carga_modelo import disponible
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+MEDIR = """
+import json, time
+import numpy as np
+from motor_tflite import preprocesar_mobilenet
+imagenes = np.load({imagenes!r})
+modelo.predict(preprocesar_mobilenet(imagenes[:1]))
+metricas.marcar("modelo")
+tiempos = []
+for i in range({repeticiones}):
+    inicio = time.perf_counter()
+    modelo.predict(preprocesar_mobilenet(imagenes[i % len(imagenes)][None]))
+    tiempos.append(time.perf_counter() - inicio)
+top3 = [np.argsort(modelo.predict(preprocesar_mobilenet(x[None]))[0])[-3:][::-1].tolist() for x in imagenes]
+# VmHWM y no ru_maxrss: este se hereda por exec del proceso padre (que tiene TensorFlow cargado)
+with open("/proc/self/status") as f:
+    rss = next(int(linea.split()[1]) for linea in f if linea.startswith("VmHWM:"))
+print("@@" + json.dumps({{"arranque": metricas.eventos["modelo"], "latencias": tiempos, "top3": top3, "rss": rss}}))
+"""
+
+KERAS = """
+from carga_modelo import MetricasArranque
+metricas = MetricasArranque()
+from tensorflow.keras.applications.mobilenet_v2 import MobileNetV2
+modelo = MobileNetV2(weights={pesos!r}, input_shape=(224, 224, 3))
+"""
+
+TFLITE = """
+from carga_modelo import MetricasArranque
+metricas = MetricasArranque()
+from motor_tflite import ClasificadorTFLite
+modelo = ClasificadorTFLite({tflite!r}, hilos={hilos})
+"""
+
+
+def correr(codigo):
+    """Ejecuta 'codigo' en un intérprete nuevo y devuelve lo que reporta MEDIR."""
+    entorno = dict(os.environ, TF_CPP_MIN_LOG_LEVEL="2")
+    salida = subprocess.run([sys.executable, "-c", codigo], cwd=DIRECTORIO, env=entorno, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(salida.rsplit("@@", 1)[1])
+
+
+def preparar(temporal, sin_pesos):
+    """Pesos (.weights.h5) y .tflite de la misma MobileNetV2."""
+    import tensorflow as tf
+    from tensorflow.keras.applications.mobilenet_v2 import MobileNetV2
+    from motor_tflite import convertir_tflite
+    try:
+        modelo = MobileNetV2(weights=None if sin_pesos else "imagenet", input_shape=(224, 224, 3))
+    except Exception as e: # Sin red para descargar los pesos
+        print(f"Aviso: sin pesos de ImageNet ({e}); se usan aleatorios.")
+        tf.keras.utils.set_random_seed(0)
+        modelo = MobileNetV2(weights=None, input_shape=(224, 224, 3))
+    pesos = os.path.join(temporal, "mobilenet_v2.weights.h5")
+    modelo.save_weights(pesos)
+    return pesos, convertir_tflite(modelo, os.path.join(temporal, "mobilenet_v2.tflite"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hilos", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--imagenes", type=int, default=8)
+    parser.add_argument("--repeticiones", type=int, default=30)
+    parser.add_argument("--sin-pesos", action="store_true", help="Pesos aleatorios en vez de los de ImageNet")
+    args = parser.parse_args()
+
+    if not disponible("tensorflow"):
+        sys.exit("Hace falta TensorFlow para construir y convertir el modelo.")
+
+    with tempfile.TemporaryDirectory() as temporal:
+        with contextlib.redirect_stdout(io.StringIO()): # El conversor lista cada variable capturada
+            pesos, tflite = preparar(temporal, args.sin_pesos)
+        replay = generar_replay_sintetico(os.path.join(temporal, "replay.npy"), frames=args.imagenes,
+                                          tamano=(224, 224), semilla=0)
+        imagenes = os.path.join(temporal, "imagenes.npy")
+        np.save(imagenes, np.load(replay))
+        medir = MEDIR.format(imagenes=imagenes, repeticiones=args.repeticiones)
+
+        escenarios = {"keras model.predict": KERAS.format(pesos=pesos) + medir}
+        for hilos in dict.fromkeys(args.hilos):
+            escenarios[f"tflite ({hilos} hilo{'s' if hilos > 1 else ''})"] = TFLITE.format(tflite=tflite, hilos=hilos) + medir
+        print(f"Modelo TFLite: {os.path.getsize(tflite) / 2**20:.1f} MB   imágenes: {args.imagenes}   "
+              f"repeticiones: {args.repeticiones}")
+        resultados = {nombre: correr(codigo) for nombre, codigo in escenarios.items()}
+
+    referencia = resultados["keras model.predict"]
+    print(f"\n  {'escenario':<22}{'arranque':>10}{'latencia':>12}{'RSS':>11}{'top-3 igual':>14}")
+    for nombre, r in resultados.items():
+        ms = statistics.median(r["latencias"]) * 1000
+        iguales = np.mean([a == b for a, b in zip(r["top3"], referencia["top3"])])
+        print(f"  {nombre:<22}{r['arranque']:8.2f} s{ms:9.1f} ms{r['rss'] / 1024:8.0f} MB{iguales:14.0%}")
+
+
+if __name__ == "__main__":
+    main()
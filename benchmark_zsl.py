@@ -0,0 +1,91 @@
+"""Compara la latencia de obturador: capturar al clic vs. anillo ZSL.
+
+Usa el backend "replay" a ritmo de cámara (por defecto 30 fps sobre una
+pila sintética de 1080p) y simula clics en instantes aleatorios. Para
+cada modo reporta lo que tarda la llamada tras el clic ("espera") y la
+distancia entre el frame devuelto y el clic ("desfase"). También
+comprueba que cada política devuelve el frame que le corresponde.
+
+    python benchmark_zsl.py --clics 20
+    python benchmark_zsl.py --origen fotos_capturadas/ --fps 15 --profundidad 4
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from backends_captura import crear_backend, generar_replay_sintetico
+from buffer_zsl import CapturaZSL, POLITICAS
+
+
+def resumen(nombre, esperas, desfases):
+    print(f"{nombre:<22}espera media {statistics.mean(esperas):7.1f} ms  máx {max(esperas):7.1f} ms   "
+          f"|desfase| medio {statistics.mean(abs(d) for d in desfases):6.1f} ms")
+
+
+def medir_al_clic(backend, clics, pausa_maxima):
+    """Ruta sin ZSL: tras el clic se pide el siguiente frame a la cámara."""
+    esperas, desfases = [], []
+    for _ in range(clics):
+        time.sleep(random.uniform(0, pausa_maxima))
+        clic = time.monotonic()
+        backend.capturar_arrays(("main", "lores"))
+        llegada = time.monotonic()
+        esperas.append((llegada - clic) * 1000.0)
+        desfases.append((llegada - clic) * 1000.0)
+    return esperas, desfases
+
+
+def medir_zsl(zsl, politica, clics, pausa_maxima):
+    esperas, desfases = [], []
+    for _ in range(clics):
+        time.sleep(random.uniform(0, pausa_maxima))
+        clic = time.monotonic()
+        resultado = zsl.foto(clic, politica)
+        esperas.append(resultado["espera_ms"])
+        desfases.append(resultado["desfase_ms"])
+        if politica == "anterior" and resultado["desfase_ms"] > 0:
+            raise AssertionError("'anterior' devolvió un frame posterior al clic")
+        if politica == "posterior" and resultado["desfase_ms"] < 0:
+            raise AssertionError("'posterior' devolvió un frame anterior al clic")
+    return esperas, desfases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--origen", help="Carpeta de JPEGs o .npy (N, H, W, 3) para replay")
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--clics", type=int, default=15)
+    parser.add_argument("--profundidad", type=int, default=8)
+    parser.add_argument("--presupuesto-mb", type=float, default=64)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+    random.seed(args.semilla)
+    pausa_maxima = 3.0 / args.fps # Clics repartidos al azar entre frames
+
+    with tempfile.TemporaryDirectory() as temporal:
+        origen = args.origen or generar_replay_sintetico(os.path.join(temporal, "sintetico.npy"), frames=10)
+        with crear_backend("replay", origen=origen, fps=args.fps) as backend:
+            resultados = {"al clic (sin ZSL)": medir_al_clic(backend, args.clics, pausa_maxima)}
+        for politica in POLITICAS:
+            backend = crear_backend("replay", origen=origen, fps=args.fps)
+            zsl = CapturaZSL(backend, profundidad=args.profundidad, presupuesto_mb=args.presupuesto_mb,
+                             politica=politica)
+            try:
+                zsl.iniciar()
+                time.sleep(zsl.anillo.profundidad / args.fps) # Llenar el anillo
+                resultados[f"ZSL {politica}"] = medir_zsl(zsl, politica, args.clics, pausa_maxima)
+            finally:
+                zsl.detener()
+                backend.cerrar()
+
+    print(f"Replay a {args.fps:g} fps, {args.clics} clics por modo, anillo de "
+          f"{zsl.anillo.profundidad} frames ({zsl.anillo.bytes / 1e6:.1f} MB)")
+    for nombre, (esperas, desfases) in resultados.items():
+        resumen(nombre, esperas, desfases)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Captura sin retardo de obturador (ZSL): anillo con los últimos N frames.
+
+La cámara queda transmitiendo en un hilo que copia cada frame en un anillo
+preasignado (sin reservar memoria por frame). Al pulsar "Foto" no se
+espera a un frame nuevo: se devuelve el guardado más cercano al instante
+del clic.
+
+    zsl = CapturaZSL(backend, streams=("main", "lores"), profundidad=8)
+    zsl.iniciar()
+    resultado = zsl.foto(time.monotonic())   # {"frames": [main, lores], ...}
+    zsl.detener()
+
+Políticas de selección:
+    "cercano"   el frame con el instante más próximo al clic (si el siguiente
+                quedará más cerca que el último guardado, espera como mucho
+                medio periodo a que llegue)
+    "anterior"  el último frame llegado antes (o en) el clic
+    "posterior" el primer frame llegado después del clic (espera si hace falta)
+"""
+import threading
+import time
+
+import numpy as np
+
+# --- Constantes ---
+PROFUNDIDAD = 8
+PRESUPUESTO_MB = 64   # Tope de memoria del anillo; recorta la profundidad si hace falta
+POLITICA = "cercano"
+POLITICAS = ("cercano", "anterior", "posterior")
+TIMEOUT_FOTO = 1.0    # Segundos máximos esperando un frame (anillo vacío o "posterior")
+ESPERA_TRAS_ERROR = 0.5
+
+
+class AnilloFrames:
+    """Anillo acotado y preasignado de frames con su instante de llegada.
+
+    'formas' es una lista con la forma (H, W, C) de cada stream; cada
+    ranura guarda un frame de cada stream.
+    """
+
+    def __init__(self, formas, profundidad=PROFUNDIDAD, presupuesto_mb=PRESUPUESTO_MB, dtype=np.uint8):
+        bytes_por_ranura = sum(int(np.prod(forma)) for forma in formas) * np.dtype(dtype).itemsize
+        if presupuesto_mb:
+            maxima = int(presupuesto_mb * 1024 * 1024) // bytes_por_ranura
+            if maxima < profundidad:
+                print(f"Anillo ZSL: profundidad {profundidad} excede {presupuesto_mb} MB; se usa {max(1, maxima)}")
+                profundidad = max(1, maxima)
+        self.profundidad = profundidad
+        self.bytes_por_ranura = bytes_por_ranura
+        self._datos = [np.empty((profundidad,) + tuple(forma), dtype=dtype) for forma in formas]
+        self._instantes = np.full(profundidad, -np.inf)
+        self._siguiente = 0
+        self._cantidad = 0
+        self._condicion = threading.Condition()
+        self.escritos = 0
+
+    @property
+    def bytes(self):
+        return self.bytes_por_ranura * self.profundidad
+
+    def __len__(self):
+        return self._cantidad
+
+    def escribir(self, frames, instante):
+        """Copia 'frames' (uno por stream) en la ranura más vieja."""
+        with self._condicion:
+            ranura = self._siguiente
+            for datos, frame in zip(self._datos, frames):
+                if datos.shape[1:] != np.shape(frame):
+                    raise ValueError(f"Frame de forma {np.shape(frame)}; el anillo espera {datos.shape[1:]}")
+                np.copyto(datos[ranura], frame)
+            self._instantes[ranura] = instante
+            self._siguiente = (ranura + 1) % self.profundidad
+            self._cantidad = min(self._cantidad + 1, self.profundidad)
+            self.escritos += 1
+            self._condicion.notify_all()
+
+    def _elegir(self, instante, politica):
+        validos = np.flatnonzero(np.isfinite(self._instantes))
+        if validos.size == 0:
+            return None
+        tiempos = self._instantes[validos]
+        if politica == "cercano":
+            ultimo = tiempos.max()
+            if ultimo < instante and validos.size > 1:
+                # El siguiente frame llegará ~un periodo después del último: si quedará
+                # más cerca del clic que el último guardado, se espera a él
+                periodo = float(np.median(np.diff(np.sort(tiempos))))
+                if instante - ultimo > periodo / 2 and time.monotonic() < ultimo + 1.5 * periodo:
+                    return None
+            return validos[np.argmin(np.abs(tiempos - instante))]
+        if politica == "anterior":
+            previos = validos[tiempos <= instante]
+            return previos[np.argmax(self._instantes[previos])] if previos.size else None
+        if politica == "posterior":
+            siguientes = validos[tiempos >= instante]
+            return siguientes[np.argmin(self._instantes[siguientes])] if siguientes.size else None
+        raise ValueError(f"Política desconocida: {politica} (opciones: {', '.join(POLITICAS)})")
+
+    def seleccionar(self, instante, politica=POLITICA, timeout=TIMEOUT_FOTO):
+        """Devuelve (copias de los frames, instante del frame) según 'politica'.
+
+        Espera hasta 'timeout' si aún no hay un frame que cumpla la
+        política; devuelve None si no llega.
+        """
+        limite = time.monotonic() + timeout
+        with self._condicion:
+            while True:
+                ranura = self._elegir(instante, politica)
+                if ranura is not None:
+                    # Copia: la ranura se va a sobrescribir con frames nuevos
+                    return [datos[ranura].copy() for datos in self._datos], float(self._instantes[ranura])
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    return None
+                self._condicion.wait(restante)
+
+
+class CapturaZSL:
+    """Alimenta un AnilloFrames desde un backend de captura en un hilo."""
+
+    def __init__(self, backend, streams=("main", "lores"), profundidad=PROFUNDIDAD,
+                 presupuesto_mb=PRESUPUESTO_MB, politica=POLITICA):
+        if politica not in POLITICAS:
+            raise ValueError(f"Política desconocida: {politica} (opciones: {', '.join(POLITICAS)})")
+        self.backend = backend
+        self.streams = tuple(streams)
+        self.profundidad = profundidad
+        self.presupuesto_mb = presupuesto_mb
+        self.politica = politica
+        self.anillo = None
+        self._detener = threading.Event()
+        self._hilo = None
+        self.errores = 0
+
+    @property
+    def activa(self):
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def iniciar(self):
+        """Abre el backend, reserva el anillo con el primer frame y arranca el hilo."""
+        if self.activa:
+            return
+        self.backend.abrir()
+        if self.anillo is None:
+            primero = self.backend.capturar_arrays(self.streams)
+            self.anillo = AnilloFrames([np.shape(f) for f in primero], self.profundidad, self.presupuesto_mb)
+            self.anillo.escribir(primero, time.monotonic())
+            print(f"Anillo ZSL: {self.anillo.profundidad} frames, {self.anillo.bytes / 1e6:.1f} MB")
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._bucle, name="CapturaZSL", daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout=2.0)
+            self._hilo = None
+
+    def _bucle(self):
+        while not self._detener.is_set():
+            try:
+                frames = self.backend.capturar_arrays(self.streams)
+            except EOFError:
+                return # Replay sin bucle (ReplayTerminado): no hay más frames
+            except Exception as e:
+                self.errores += 1
+                print(f"Error en captura ZSL: {e}")
+                self._detener.wait(ESPERA_TRAS_ERROR)
+                continue
+            # Instante de llegada: lo más cerca del sensor que ofrecen todos los backends
+            self.anillo.escribir(frames, time.monotonic())
+
+    def foto(self, instante=None, politica=None, timeout=TIMEOUT_FOTO):
+        """Devuelve el frame del anillo que corresponde al clic en 'instante'.
+
+        Resultado: {"frames": [...] (en el orden de 'streams'), "instante",
+        "desfase_ms" (frame - clic) y "espera_ms" (lo que tardó esta llamada)}.
+        """
+        instante = time.monotonic() if instante is None else instante
+        inicio = time.monotonic()
+        if self.anillo is None:
+            raise RuntimeError("Captura ZSL no iniciada")
+        elegido = self.anillo.seleccionar(instante, politica or self.politica, timeout)
+        if elegido is None:
+            raise TimeoutError(f"Sin frame para el clic en {timeout:.1f} s")
+        frames, instante_frame = elegido
+        return {"frames": frames, "instante": instante_frame,
+                "desfase_ms": (instante_frame - instante) * 1000.0,
+                "espera_ms": (time.monotonic() - inicio) * 1000.0}
@@ -0,0 +1,174 @@
+"""Caché en disco de modelos compilados (TorchScript congelado) junto a sus pesos.
+
+Cada arranque reconstruía el nn.Module en Python y volvía a cargar el
+.pth. cargar_compilado() guarda, la primera vez, el modelo trazado y
+congelado (torch.jit.freeze: pesos como constantes, BatchNorm plegado en
+las convoluciones) al lado del archivo de pesos:
+
+    R23.pth
+    R23.float32.3f9a0c1d2e4b.torch-2.3.1.pt
+
+La clave es el hash SHA-256 del archivo de pesos más la versión de torch:
+si R23.pth cambia o se actualiza torch, el artefacto deja de coincidir,
+se vuelve a compilar y se borran los viejos. Los siguientes arranques
+cargan directamente el artefacto (torch.jit.load), sin construir el grafo:
+
+    modelo = cargar_compilado(construir, "R23.pth")          # construir() → nn.Module en eval
+    modelo = cargar_compilado(construir, "R23.pth", "int8")  # variantes separadas
+
+Para no leer el .pth entero en cada arranque, el hash se recuerda en un
+archivo .sha256 y solo se recalcula si cambia el tamaño o la fecha.
+hash_pesos() no necesita torch (torch se importa al usarlo): motor_tflite
+lo usa para la caché de .tflite sin pagar el import de PyTorch.
+
+cargar_modelo() elige el backend de ejecución: "torch" (el nn.Module de
+siempre), "torchscript" (esta caché) u "onnx" (ONNX Runtime, motor_onnx.py).
+"""
+import glob
+import hashlib
+import json
+import os
+import re
+import warnings
+
+# --- Constantes ---
+ENTRADA_EJEMPLO = (1, 3, 224, 224)
+BACKENDS = ("torch", "torchscript", "onnx")
+BLOQUE_HASH = 1 << 20
+PATRON_ARTEFACTO = r"\.[\w.-]+?\.(?P<clave>[0-9a-f]{12}\.torch-[\w.+-]+)\.(?:pt|onnx)" # Tras la base, ver ruta_artefacto
+
+
+def hash_pesos(ruta):
+    """SHA-256 del archivo de pesos (memorizado en ruta.sha256 por tamaño y fecha)."""
+    estado = os.stat(ruta)
+    firma = [estado.st_size, estado.st_mtime_ns]
+    memo = ruta + ".sha256"
+    try:
+        with open(memo) as f:
+            guardado = json.load(f)
+        if guardado["firma"] == firma:
+            return guardado["sha256"]
+    except (OSError, ValueError, KeyError):
+        pass
+    sha = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(BLOQUE_HASH), b""):
+            sha.update(bloque)
+    try:
+        with open(memo, "w") as f:
+            json.dump({"firma": firma, "sha256": sha.hexdigest()}, f)
+    except OSError:
+        pass # Carpeta de solo lectura: se recalcula la próxima vez
+    return sha.hexdigest()
+
+
+def ruta_pesos_hub(pesos):
+    """Dónde guarda torchvision los pesos pre-entrenados (p. ej. ResNet18_Weights.IMAGENET1K_V1)."""
+    import torch
+    return os.path.join(torch.hub.get_dir(), "checkpoints", os.path.basename(pesos.url))
+
+
+def _clave(ruta_pesos):
+    import torch
+    return f"{hash_pesos(ruta_pesos)[:12]}.torch-{torch.__version__}"
+
+
+def ruta_artefacto(ruta_pesos, variante="float32", extension=".pt"):
+    """Artefacto compilado para estos pesos, esta variante y esta versión de torch."""
+    return f"{os.path.splitext(ruta_pesos)[0]}.{variante}.{_clave(ruta_pesos)}{extension}"
+
+
+def limpiar_artefactos(ruta_pesos):
+    """Borra los artefactos (.pt, .onnx) de pesos o de un torch anteriores, de cualquier variante.
+
+    Solo toca archivos con el nombre exacto que da ruta_artefacto()
+    (<base>.<variante>.<12 hex>.torch-<versión>.pt|.onnx): un R23.backup.pt
+    o un R23.finetune.onnx del usuario no se borran nunca.
+    """
+    base = os.path.splitext(ruta_pesos)[0]
+    patron = re.compile(re.escape(os.path.basename(base)) + PATRON_ARTEFACTO)
+    clave = _clave(ruta_pesos)
+    for viejo in glob.glob(glob.escape(base) + ".*"):
+        coincidencia = patron.fullmatch(os.path.basename(viejo))
+        if coincidencia and coincidencia.group("clave") != clave:
+            os.remove(viejo)
+
+
+def _compilar(modelo, ejemplo):
+    import torch
+    with torch.inference_mode(False), torch.no_grad():
+        trazado = torch.jit.trace(modelo, ejemplo)
+    return torch.jit.freeze(trazado) # Pliega BN/constantes; optimiza la inferencia
+
+
+def _calentar(modelo, ejemplo):
+    # El ejecutor de TorchScript perfila y optimiza en las primeras llamadas
+    import torch
+    with torch.inference_mode():
+        for _ in range(2):
+            modelo(ejemplo)
+
+
+def cargar_compilado(construir, ruta_pesos, variante="float32", ejemplo=None, progreso=None, calentar=True):
+    """Modelo TorchScript congelado desde la caché junto a 'ruta_pesos'; si no está, lo compila y lo guarda.
+
+    construir() debe devolver el nn.Module ya en eval() y con los pesos
+    cargados; solo se llama si no hay artefacto válido. Si no se puede
+    trazar, se devuelve el modelo de construir() tal cual.
+    """
+    import torch
+    progreso = progreso or (lambda mensaje: None)
+    ejemplo = torch.zeros(ENTRADA_EJEMPLO) if ejemplo is None else ejemplo
+    with warnings.catch_warnings():
+        # torch.jit avisa de que se reemplazará por torch.compile/torch.export; sigue funcionando
+        warnings.simplefilter("ignore", FutureWarning)
+        warnings.simplefilter("ignore", DeprecationWarning)
+        artefacto = ruta_artefacto(ruta_pesos, variante) if os.path.exists(ruta_pesos) else None
+        if artefacto and os.path.exists(artefacto):
+            progreso("Cargando modelo compilado...")
+            try:
+                modelo = torch.jit.load(artefacto, map_location="cpu")
+                if calentar:
+                    _calentar(modelo, ejemplo)
+                return modelo
+            except Exception as e:
+                print(f"Artefacto compilado inválido ({e}); se vuelve a compilar.")
+
+        modelo = construir() # Puede descargar los pesos (hub) la primera vez
+        if not os.path.exists(ruta_pesos):
+            return modelo # Sin archivo de pesos no hay clave para la caché
+        artefacto = ruta_artefacto(ruta_pesos, variante)
+        progreso("Compilando modelo (solo la primera vez)...")
+        try:
+            compilado = _compilar(modelo, ejemplo)
+        except Exception as e:
+            print(f"No se pudo compilar el modelo con TorchScript: {e}")
+            return modelo
+        temporal = artefacto + ".tmp"
+        try:
+            torch.jit.save(compilado, temporal)
+            os.replace(temporal, artefacto) # Nunca queda un artefacto a medio escribir
+            limpiar_artefactos(ruta_pesos)
+            print(f"Modelo compilado guardado en {artefacto}")
+        except OSError as e:
+            print(f"No se pudo guardar el modelo compilado: {e}")
+        if calentar:
+            _calentar(compilado, ejemplo)
+        return compilado
+
+
+def cargar_modelo(construir, ruta_pesos, backend="torchscript", variante="float32", progreso=None, calentar=True):
+    """Modelo listo para inferir con el backend pedido (todos se llaman igual: logits = modelo(entrada))."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend desconocido: {backend} (opciones: {', '.join(BACKENDS)})")
+    if backend == "onnx":
+        from motor_onnx import cargar_onnx, onnxruntime_available
+        if variante.startswith("int8"):
+            raise ValueError("El backend ONNX solo admite el modelo float32")
+        if onnxruntime_available:
+            return cargar_onnx(construir, ruta_pesos, progreso, variante)
+        print("onnxruntime no instalado; se usa TorchScript.")
+        backend = "torchscript"
+    if backend == "torchscript" and ruta_pesos:
+        return cargar_compilado(construir, ruta_pesos, variante, progreso=progreso, calentar=calentar)
+    return construir()
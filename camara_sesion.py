@@ -0,0 +1,188 @@
+"""Sesión persistente de cámara (Picamera2).
+
+La cámara se abre y configura UNA sola vez al iniciar la app y queda en
+marcha; cada clic solo pide el siguiente frame, en vez de crear un
+Picamera2 nuevo, configurarlo, esperar y cerrarlo por cada foto.
+Si una captura falla, la sesión cierra la cámara, la vuelve a abrir y
+reintenta. Al abrir se espera a que AE/AWB converjan mirando los
+metadatos (ajuste_exposicion), no un tiempo fijo.
+
+El stream lores se pide ya cerca del tamaño de entrada del modelo: el ISP
+escala gratis y la IA y la previsualización usan ese frame pequeño; el
+main de 1080p solo se toca cuando hace falta guardar la foto.
+"""
+import threading
+import time
+
+from ajuste_exposicion import esperar_convergencia, ESPERA_MAXIMA
+from captura_memoria import yuv420_a_rgb
+from carga_modelo import disponible
+
+# --- Comprobación de Picamera2 (sin importarla: se importa al abrir la cámara) ---
+# Así importar este módulo (p. ej. backends_captura con CAMARA_BACKEND=replay) no avisa de nada
+Picamera2 = None # Ver importar_picamera2()
+picamera2_available = disponible("picamera2")
+
+
+def aviso_picamera2(error=None):
+    """Imprime el aviso de siempre cuando picamera2 no está o no arranca."""
+    if error is None:
+        print("Error: La biblioteca picamera2 no se encontró.")
+        print("Por favor, instálala con: sudo apt install python3-picamera2")
+    else:
+        print(f"Error al inicializar la cámara: {error}")
+        print("Asegúrate de que la cámara esté conectada y habilitada en raspi-config.")
+
+
+def importar_picamera2():
+    """Importa Picamera2 la primera vez que se abre una cámara. Lanza RuntimeError si no se puede."""
+    global Picamera2, picamera2_available
+    if Picamera2 is None:
+        try:
+            from picamera2 import Picamera2
+        except ImportError:
+            aviso_picamera2()
+            picamera2_available = False
+        except Exception as e:
+            aviso_picamera2(e)
+            picamera2_available = False
+    if Picamera2 is None:
+        raise RuntimeError("picamera2 no disponible.")
+    return Picamera2
+
+# --- Constantes ---
+TAMANO_MAIN = (1920, 1080)
+# 16:9 como el main (el ISP escala el mismo encuadre) y lado corto = 256, el
+# Resize(256) del preprocesado de los modelos, que así no tiene que escalar.
+TAMANO_LORES = (448, 256)
+ESPERA_REAPERTURA = 0.5 # Pausa antes de reabrir tras un error
+REINTENTOS = 2          # Reaperturas por captura antes de rendirse
+
+
+class SesionCamara:
+    """Cámara abierta, configurada y en marcha durante toda la vida de la app."""
+
+    def __init__(self, tamano_main=TAMANO_MAIN, tamano_lores=TAMANO_LORES,
+                 espera_maxima=ESPERA_MAXIMA, reintentos=REINTENTOS,
+                 espera_reapertura=ESPERA_REAPERTURA):
+        self.tamano_main = tamano_main
+        self.tamano_lores = tamano_lores
+        self.espera_maxima = espera_maxima # Tope de la espera de ajuste AE/AWB
+        self.reintentos = reintentos
+        self.espera_reapertura = espera_reapertura
+        self.picam2 = None
+        self.reaperturas = 0 # Cuántas veces se reabrió la cámara tras un error
+        self.ultimo_ajuste = None # Resultado de la última esperar_convergencia()
+        self._lock = threading.RLock()
+
+    @property
+    def abierta(self):
+        return self.picam2 is not None and self.picam2.started
+
+    def abrir(self):
+        """Abre, configura y arranca la cámara (no hace nada si ya está abierta)."""
+        with self._lock:
+            if self.abierta:
+                return
+            self.picam2 = importar_picamera2()()
+            config = self.picam2.create_still_configuration(
+                main={"size": self.tamano_main},
+                lores={"size": self.tamano_lores},
+                display="lores"
+            )
+            self.picam2.configure(config)
+            self.picam2.start()
+            self._asentar()
+            print("Sesión de cámara abierta.")
+
+    def _asentar(self):
+        self.ultimo_ajuste = esperar_convergencia(self.picam2.capture_metadata,
+                                                  espera_maxima=self.espera_maxima)
+        estado = "convergido" if self.ultimo_ajuste["convergido"] else "tope alcanzado"
+        print(f"Ajuste AE/AWB: {estado} en {self.ultimo_ajuste['frames']} frames "
+              f"({self.ultimo_ajuste['segundos']:.2f}s)")
+        return self.ultimo_ajuste
+
+    def asentar(self):
+        """Vuelve a esperar la convergencia de AE/AWB (p. ej. tras un cambio de luz)."""
+        return self._ejecutar(lambda picam2: self._asentar())
+
+    def cerrar(self):
+        """Detiene y libera la cámara. Seguro de llamar varias veces."""
+        with self._lock:
+            picam2, self.picam2 = self.picam2, None
+            if picam2 is None:
+                return
+            try:
+                if picam2.started:
+                    picam2.stop()
+            except Exception as e:
+                print(f"Error al detener la cámara: {e}")
+            try:
+                picam2.close()
+            except Exception as e:
+                print(f"Error al cerrar la cámara: {e}")
+            print("Sesión de cámara cerrada.")
+
+    def reabrir(self):
+        """Cierra y vuelve a abrir la cámara (recuperación tras un error)."""
+        with self._lock:
+            self.cerrar()
+            time.sleep(self.espera_reapertura)
+            self.reaperturas += 1
+            self.abrir()
+
+    def _ejecutar(self, operacion):
+        """Ejecuta operacion(picam2); ante un error reabre la cámara y reintenta."""
+        if not picamera2_available:
+            raise RuntimeError("picamera2 no disponible.")
+        with self._lock:
+            ultimo_error = None
+            for intento in range(self.reintentos + 1):
+                try:
+                    if intento > 0:
+                        print(f"Reabriendo cámara (intento {intento}/{self.reintentos})...")
+                        self.reabrir()
+                    else:
+                        self.abrir()
+                    return operacion(self.picam2)
+                except Exception as e:
+                    print(f"Error en la sesión de cámara: {e}")
+                    ultimo_error = e
+            self.cerrar()
+            raise ultimo_error
+
+    def capturar_archivo(self, ruta):
+        """Guarda el siguiente frame del stream main en 'ruta'. Devuelve los metadatos."""
+        return self._ejecutar(lambda picam2: picam2.capture_file(ruta))
+
+    def _a_rgb(self, picam2, stream, array):
+        """Pasa a RGB el lores en YUV420 (único formato lores en la Pi 4)."""
+        config = picam2.camera_config[stream]
+        if config["format"] == "YUV420":
+            ancho, alto = config["size"]
+            return yuv420_a_rgb(array, ancho, alto)
+        return array
+
+    def capturar_array(self, stream="main"):
+        """Devuelve el siguiente frame del stream pedido como array NumPy RGB."""
+        return self._ejecutar(lambda picam2: self._a_rgb(picam2, stream, picam2.capture_array(stream)))
+
+    def capturar_arrays(self, streams=("main", "lores")):
+        """Devuelve un array RGB por stream, todos del MISMO frame (misma petición)."""
+        def capturar(picam2):
+            arrays, _ = picam2.capture_arrays(list(streams))
+            return [self._a_rgb(picam2, stream, array) for stream, array in zip(streams, arrays)]
+        return self._ejecutar(capturar)
+
+    def capturar_metadatos(self):
+        """Devuelve los metadatos del siguiente frame."""
+        return self._ejecutar(lambda picam2: picam2.capture_metadata())
+
+    def __enter__(self):
+        self.abrir()
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+        return False
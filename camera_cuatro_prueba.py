@@ -8,6 +8,7 @@ import logging
 try:
     # Necesario para mostrar imágenes en Tkinter
     from PIL import Image, ImageTk
+    from miniaturas import CachePiramides, miniatura
     pillow_available = True
 except ImportError:
     print("Error: Pillow o ImageTk no encontrado.")
@@ -17,24 +18,13 @@ except ImportError:
 # --- Configuración de Logging (sin cambios) ---
 # logging.basicConfig(level=logging.INFO)
 
-# --- Comprobación de Picamera2 (sin cambios) ---
-try:
-    from picamera2 import Picamera2
-    picamera2_available = True
-except ImportError:
-    print("Error: La biblioteca picamera2 no se encontró.")
-    print("Por favor, instálala con: sudo apt install python3-picamera2")
-    picamera2_available = False
-    # Deshabilitar Pillow también si no hay cámara, para evitar errores si no se instaló
-    # pillow_available = False
-except Exception as e:
-    print(f"Error al inicializar la cámara: {e}")
-    print("Asegúrate de que la cámara esté conectada y habilitada en raspi-config.")
-    picamera2_available = False
-    # pillow_available = False
+# --- Comprobación de Picamera2 (sesión persistente) ---
+from camara_sesion import SesionCamara, picamera2_available, aviso_picamera2
+if not picamera2_available: aviso_picamera2() # Esta app solo funciona con Picamera2
 
 # --- Variables Globales ---
 last_photo_path = None # Para guardar la ruta de la última foto tomada
+piramides = CachePiramides() if pillow_available else None # Miniaturas 1/2, 1/4, 1/8 de las fotos ya mostradas
 
 # --- Funciones de Cámara, Visualización y Limpieza ---
 
@@ -51,23 +41,8 @@ def tomar_foto():
     # Deshabilitar botones mientras se procesa
     take_photo_button.config(state=tk.DISABLED)
     clear_button.config(state=tk.DISABLED)
-    actualizar_estado("Iniciando cámara...", info=True)
-    root.update_idletasks()
-    picam2 = None
     try:
-        picam2 = Picamera2()
-        config = picam2.create_still_configuration(
-            main={"size": (1920, 1080)},
-            lores={"size": (640, 480)},
-            display="lores"
-        )
-        picam2.configure(config)
-        picam2.start()
-
-        actualizar_estado("Ajustando parámetros...", info=True)
-        root.update_idletasks()
-        time.sleep(2)
-
+        # La cámara ya está abierta y ajustada: solo se pide el siguiente frame
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         nombre_archivo = f"foto_{timestamp}.jpg"
         # Guardar en un subdirectorio 'fotos' (opcional, pero más ordenado)
@@ -86,7 +61,7 @@ def tomar_foto():
         actualizar_estado(f"Capturando foto: {nombre_archivo}...", info=True)
         root.update_idletasks()
 
-        metadata = picam2.capture_file(ruta_completa)
+        metadata = sesion_camara.capturar_archivo(ruta_completa)
         print("Metadatos de captura:", metadata)
 
         mostrar_imagen(ruta_completa)
@@ -100,14 +75,7 @@ def tomar_foto():
         limpiar_imagen()
 
     finally:
-        if picam2 and picam2.started:
-            picam2.stop()
-            picam2.close()
-            print("Cámara detenida y cerrada.")
-            current_text = text_area.get("1.0", tk.END).strip()
-            if current_text:
-                 actualizar_estado("(Cámara detenida)", append=True, info=True) # Usar info color
-        # Reactivar botones
+        # La cámara sigue abierta para la siguiente foto; reactivar botones
         take_photo_button.config(state=tk.NORMAL if picamera2_available else tk.DISABLED)
         clear_button.config(state=tk.NORMAL)
 
@@ -116,7 +84,6 @@ def mostrar_imagen(ruta_imagen):
     """Carga y muestra la imagen en el image_label."""
     if not pillow_available: return
     try:
-        img = Image.open(ruta_imagen)
         image_label.update_idletasks()
         label_width = image_label.winfo_width()
         label_height = image_label.winfo_height()
@@ -125,7 +92,8 @@ def mostrar_imagen(ruta_imagen):
              label_width = 400
              label_height = 300
 
-        img.thumbnail((label_width - 10, label_height - 10), Image.Resampling.LANCZOS)
+        # LANCZOS desde el nivel de la pirámide más cercano, no desde la foto entera
+        img = miniatura(piramides.obtener(ruta_imagen), (label_width - 10, label_height - 10))
         photo = ImageTk.PhotoImage(img)
 
         image_label.configure(image=photo, text="")
@@ -162,6 +130,7 @@ def limpiar_campos():
         if os.path.exists(last_photo_path):
             try:
                 os.remove(last_photo_path)
+                if piramides: piramides.borrar(last_photo_path) # Sus miniaturas, en memoria y en disco
                 print(f"Archivo eliminado: {last_photo_path}")
                 deleted_msg = f"\nArchivo '{os.path.basename(last_photo_path)}' eliminado."
                 last_photo_path = None # ¡Importante! Resetear solo si se borró con éxito
@@ -359,4 +328,26 @@ else:
      actualizar_estado(initial_message, info=True)
 
 
+# --- Sesión de cámara: se abre una vez y se cierra al salir ---
+sesion_camara = SesionCamara()
+
+def iniciar_camara():
+    """Abre la sesión de cámara al arrancar la app."""
+    try:
+        sesion_camara.abrir()
+        actualizar_estado("(Cámara lista)", append=True, info=True)
+    except Exception as e:
+        # No es fatal: la sesión reintenta abrir la cámara en la siguiente captura
+        print(f"No se pudo abrir la cámara al inicio: {e}")
+        actualizar_estado(f"Advertencia: cámara no disponible aún ({e})", append=True, error=True)
+
+def cerrar_app():
+    """Cierra la cámara antes de destruir la ventana."""
+    sesion_camara.cerrar()
+    root.destroy()
+
+root.protocol("WM_DELETE_WINDOW", cerrar_app)
+if picamera2_available:
+    root.after(100, iniciar_camara)
+
 root.mainloop()
\ No newline at end of file
@@ -7,6 +7,7 @@ import os
 import logging
 try:
     from PIL import Image, ImageTk
+    from miniaturas import CachePiramides, miniatura
     pillow_available = True
 except ImportError:
     print("Error: Pillow o ImageTk no encontrado.")
@@ -16,21 +17,13 @@ except ImportError:
 # --- Configuración de Logging ---
 # logging.basicConfig(level=logging.INFO)
 
-# --- Comprobación de Picamera2 ---
-try:
-    from picamera2 import Picamera2
-    picamera2_available = True
-except ImportError:
-    print("Error: La biblioteca picamera2 no se encontró.")
-    print("Por favor, instálala con: sudo apt install python3-picamera2")
-    picamera2_available = False
-except Exception as e:
-    print(f"Error al inicializar la cámara: {e}")
-    print("Asegúrate de que la cámara esté conectada y habilitada en raspi-config.")
-    picamera2_available = False
+# --- Comprobación de Picamera2 (sesión persistente) ---
+from camara_sesion import SesionCamara, picamera2_available, aviso_picamera2
+if not picamera2_available: aviso_picamera2() # Esta app solo funciona con Picamera2
 
 # --- Variables Globales ---
 last_photo_path = None # Ruta de la foto actualmente mostrada/guardada
+piramides = CachePiramides() if pillow_available else None # Miniaturas 1/2, 1/4, 1/8 de las fotos ya mostradas
 
 # --- Funciones ---
 
@@ -47,12 +40,7 @@ def tomar_foto():
     # Aunque se deshabilita al final, es buena práctica deshabilitar durante la operación
     # take_photo_button.config(state=tk.DISABLED) # Se deshabilita permanentemente al final si tiene éxito
     clear_button.config(state=tk.DISABLED) # Deshabilitar limpiar durante captura
-    actualizar_estado("Iniciando cámara...", info=True)
-    root.update_idletasks()
-    picam2 = None
-    success = False # Flag para saber si la operación fue exitosa
     try:
-        picam2 = Picamera2()
         # Directorio para guardar fotos
         save_dir = "fotos_capturadas"
         if not os.path.exists(save_dir):
@@ -63,24 +51,12 @@ def tomar_foto():
         nombre_archivo = f"foto_{timestamp}.jpg"
         ruta_completa = os.path.join(save_dir, nombre_archivo)
 
-        # Configurar cámara
-        config = picam2.create_still_configuration(
-            main={"size": (1920, 1080)},
-            lores={"size": (640, 480)},
-            display="lores"
-        )
-        picam2.configure(config)
-        picam2.start()
-
-        actualizar_estado("Ajustando parámetros...", info=True)
-        root.update_idletasks()
-        time.sleep(2)
-
+        # La cámara ya está abierta y ajustada: solo se pide el siguiente frame
         actualizar_estado(f"Capturando foto: {nombre_archivo}...", info=True)
         root.update_idletasks()
 
         # Capturar
-        metadata = picam2.capture_file(ruta_completa)
+        metadata = sesion_camara.capturar_archivo(ruta_completa)
         print("Metadatos de captura:", metadata)
 
         # *** Solo si la captura fue exitosa ***
@@ -88,7 +64,6 @@ def tomar_foto():
         mostrar_imagen(ruta_completa)
         actualizar_estado(f"Foto guardada en '{save_dir}/'\nMostrando previsualización.", success=True)
         take_photo_button.config(state=tk.DISABLED) # <-- DESHABILITAR BOTÓN FOTO AQUÍ
-        success = True # Marcar como éxito
 
     except Exception as e:
         mensaje_error = f"Error al tomar foto: {e}"
@@ -101,13 +76,7 @@ def tomar_foto():
 
 
     finally:
-        if picam2 and picam2.started:
-            picam2.stop()
-            picam2.close()
-            print("Cámara detenida y cerrada.")
-            if success: # Solo añadir mensaje si no hubo error antes
-                 actualizar_estado("(Cámara detenida)", append=True, info=True)
-        # Siempre reactivar Limpiar al final (si tuvo éxito o falló)
+        # La cámara sigue abierta para la siguiente foto; siempre reactivar Limpiar al final (si tuvo éxito o falló)
         clear_button.config(state=tk.NORMAL)
 
 
@@ -115,14 +84,14 @@ def mostrar_imagen(ruta_imagen):
     """Carga y muestra la imagen en el image_label."""
     if not pillow_available: return
     try:
-        img = Image.open(ruta_imagen)
         image_label.update_idletasks()
         label_width = image_label.winfo_width()
         label_height = image_label.winfo_height()
 
         if label_width < 1 or label_height < 1: label_width, label_height = 400, 300
 
-        img.thumbnail((label_width - 10, label_height - 10), Image.Resampling.LANCZOS)
+        # LANCZOS desde el nivel de la pirámide más cercano, no desde la foto entera
+        img = miniatura(piramides.obtener(ruta_imagen), (label_width - 10, label_height - 10))
         photo = ImageTk.PhotoImage(img)
 
         image_label.configure(image=photo, text="")
@@ -167,6 +136,7 @@ def limpiar_campos():
         if os.path.exists(path_to_delete):
             try:
                 os.remove(path_to_delete)
+                if piramides: piramides.borrar(path_to_delete) # Sus miniaturas, en memoria y en disco
                 print(f"Archivo eliminado: {path_to_delete}")
                 deleted_msg = f"\nArchivo '{os.path.basename(path_to_delete)}' eliminado."
                 last_photo_path = None # Resetear AHORA, después de borrar con éxito
@@ -333,4 +303,26 @@ else:
      take_photo_button.config(state=tk.NORMAL)
 
 
+# --- Sesión de cámara: se abre una vez y se cierra al salir ---
+sesion_camara = SesionCamara()
+
+def iniciar_camara():
+    """Abre la sesión de cámara al arrancar la app."""
+    try:
+        sesion_camara.abrir()
+        actualizar_estado("(Cámara lista)", append=True, info=True)
+    except Exception as e:
+        # No es fatal: la sesión reintenta abrir la cámara en la siguiente captura
+        print(f"No se pudo abrir la cámara al inicio: {e}")
+        actualizar_estado(f"Advertencia: cámara no disponible aún ({e})", append=True, error=True)
+
+def cerrar_app():
+    """Cierra la cámara antes de destruir la ventana."""
+    sesion_camara.cerrar()
+    root.destroy()
+
+root.protocol("WM_DELETE_WINDOW", cerrar_app)
+if picamera2_available:
+    root.after(100, iniciar_camara)
+
 root.mainloop()
\ No newline at end of file
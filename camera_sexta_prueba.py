@@ -7,6 +7,7 @@ import os
 import logging
 try:
     from PIL import Image, ImageTk
+    from miniaturas import CachePiramides, miniatura
     pillow_available = True
 except ImportError:
     print("Error: Pillow o ImageTk no encontrado.")
@@ -16,27 +17,23 @@ except ImportError:
 # --- Configuración de Logging ---
 # logging.basicConfig(level=logging.INFO)
 
-# --- Comprobación de Picamera2 ---
-try:
-    from picamera2 import Picamera2
-    picamera2_available = True
-except ImportError:
-    print("Error: La biblioteca picamera2 no se encontró.")
-    print("Por favor, instálala con: sudo apt install python3-picamera2")
-    picamera2_available = False
-except Exception as e:
-    print(f"Error al inicializar la cámara: {e}")
-    print("Asegúrate de que la cámara esté conectada y habilitada en raspi-config.")
-    picamera2_available = False
+# --- Comprobación de Picamera2 (sesión persistente) ---
+from camara_sesion import SesionCamara, picamera2_available, aviso_picamera2
+if not picamera2_available: aviso_picamera2() # Esta app solo funciona con Picamera2
+from visualizacion import VistaPreviaEnVivo
+from trabajo_fondo import Cancelada, EjecutorFondo
+
+# --- Configuración de la vista previa en vivo ---
+PREVIEW_FPS = 15 # fps objetivo del label; se muestra siempre el frame más reciente
 
 # --- Variables Globales ---
 last_photo_path = None
+piramides = CachePiramides() if pillow_available else None # Miniaturas 1/2, 1/4, 1/8 de las fotos ya mostradas
 
 # --- Funciones ---
 
 def tomar_foto():
-    """Captura una foto, la muestra, actualiza estado y DESHABILITA el botón 'Foto'."""
-    global last_photo_path
+    """Pide la foto al hilo de trabajo (la ventana sigue respondiendo) y DESHABILITA el botón 'Foto'."""
     if not picamera2_available:
         actualizar_estado("Error: picamera2 no disponible.", error=True)
         return
@@ -44,58 +41,54 @@ def tomar_foto():
         actualizar_estado("Error: Pillow (PIL) no disponible para mostrar imagen.", error=True)
         return
 
-    clear_button.config(state=tk.DISABLED)
-    actualizar_estado("Iniciando cámara...", info=True)
-    root.update_idletasks()
-    picam2 = None
-    success = False
-    try:
-        picam2 = Picamera2()
-        save_dir = "fotos_capturadas"
-        if not os.path.exists(save_dir):
-            os.makedirs(save_dir)
+    take_photo_button.config(state=tk.DISABLED) # Limpiar cancela la captura en curso
+    vista_previa.detener() # Congelar la vista previa: la foto ocupa el label
+    save_dir = "fotos_capturadas"
+    if not os.path.exists(save_dir):
+        os.makedirs(save_dir)
 
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        nombre_archivo = f"foto_{timestamp}.jpg"
-        ruta_completa = os.path.join(save_dir, nombre_archivo)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    nombre_archivo = f"foto_{timestamp}.jpg"
+    ruta_completa = os.path.join(save_dir, nombre_archivo)
 
-        config = picam2.create_still_configuration(main={"size": (1920, 1080)}, lores={"size": (640, 480)}, display="lores")
-        picam2.configure(config)
-        picam2.start()
+    # La cámara ya está abierta y ajustada: solo se pide el siguiente frame
+    actualizar_estado(f"Capturando foto: {nombre_archivo}...", info=True)
+    ejecutor.enviar(lambda tarea: capturar(ruta_completa),
+                    al_terminar=lambda metadata, error: foto_capturada(ruta_completa, metadata, error))
 
-        actualizar_estado("Ajustando parámetros...", info=True); root.update_idletasks(); time.sleep(2)
-        actualizar_estado(f"Capturando foto: {nombre_archivo}...", info=True); root.update_idletasks()
 
-        metadata = picam2.capture_file(ruta_completa)
-        print("Metadatos de captura:", metadata)
+def capturar(ruta_completa):
+    """Captura y decodifica la foto (en el hilo de trabajo); mostrar_imagen la toma de la caché."""
+    metadata = sesion_camara.capturar_archivo(ruta_completa)
+    piramides.obtener(ruta_completa)
+    return metadata
 
-        last_photo_path = ruta_completa
-        mostrar_imagen(ruta_completa) # Llama a la función actualizada
-        actualizar_estado(f"Foto guardada en '{save_dir}/'\nMostrando previsualización.", success=True)
-        take_photo_button.config(state=tk.DISABLED)
-        success = True
 
-    except Exception as e:
-        mensaje_error = f"Error al tomar foto: {e}"; print(mensaje_error)
+def foto_capturada(ruta_completa, metadata, error):
+    """Muestra la foto capturada por capturar() (en el hilo de Tk)."""
+    global last_photo_path
+    if isinstance(error, Cancelada): # Se limpió durante la captura
+        if os.path.exists(ruta_completa):
+            os.remove(ruta_completa); piramides.borrar(ruta_completa)
+        return
+    if error:
+        mensaje_error = f"Error al tomar foto: {error}"; print(mensaje_error)
         actualizar_estado(mensaje_error, error=True)
         limpiar_imagen()
         take_photo_button.config(state=tk.NORMAL if picamera2_available and pillow_available else tk.DISABLED)
+        vista_previa.iniciar()
+        return
 
-    finally:
-        if picam2 and picam2.started:
-            picam2.stop(); picam2.close(); print("Cámara detenida y cerrada.")
-            if success: actualizar_estado("(Cámara detenida)", append=True, info=True)
-        clear_button.config(state=tk.NORMAL)
+    print("Metadatos de captura:", metadata)
+    last_photo_path = ruta_completa
+    mostrar_imagen(ruta_completa) # Llama a la función actualizada
+    actualizar_estado(f"Foto guardada en '{os.path.dirname(ruta_completa)}/'\nMostrando previsualización.", success=True)
 
 
 def mostrar_imagen(ruta_imagen):
     """Carga, redimensiona (maximizando sin distorsión) y muestra la imagen."""
     if not pillow_available: return
     try:
-        # Abrir la imagen original
-        img = Image.open(ruta_imagen)
-        img_width, img_height = img.size
-
         # Obtener dimensiones del label (forzar actualización del layout)
         image_label.update_idletasks()
         label_width = image_label.winfo_width()
@@ -106,35 +99,19 @@ def mostrar_imagen(ruta_imagen):
             label_width = 600 # Ajustar si es necesario
             label_height = 450
 
-        # Calcular aspect ratios
-        img_aspect = img_width / float(img_height)
-        label_aspect = label_width / float(label_height)
-
         # Dejar un pequeño margen (opcional)
         target_width = label_width - 10
         target_height = label_height - 10
 
-        # Determinar dimensiones de redimensionamiento para llenar el espacio sin distorsión
-        if img_aspect > label_aspect:
-            # La imagen es más ancha (relativamente) que el label -> ajustar al ancho del label
-            new_width = int(target_width)
-            new_height = int(new_width / img_aspect)
-        else:
-            # La imagen es más alta (relativamente) o igual -> ajustar al alto del label
-            new_height = int(target_height)
-            new_width = int(new_height * img_aspect)
-
-        # Asegurarse que las dimensiones no sean cero o negativas
-        if new_width <= 0 : new_width = 1
-        if new_height <= 0 : new_height = 1
-
-        # Redimensionar usando el método resize (LANCZOS es alta calidad)
-        resized_img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        # Llenar el espacio sin distorsión: LANCZOS desde el nivel de la pirámide más cercano
+        # (1/2, 1/4 u 1/8 de la foto, en caché), no desde la foto entera
+        resized_img = miniatura(piramides.obtener(ruta_imagen), (target_width, target_height), ampliar=True)
 
         # Convertir a formato Tkinter
         photo = ImageTk.PhotoImage(resized_img)
 
         # Mostrar en el label
+        vista_previa.olvidar_imagen() # La vista previa no debe pegar sobre esta foto
         image_label.configure(image=photo, text="") # Quitar texto placeholder
         image_label.image = photo # Guardar referencia
 
@@ -165,6 +142,7 @@ def limpiar_campos():
     if not confirmar:
         actualizar_estado("Limpieza cancelada.", info=True)
         return
+    ejecutor.cancelar_todo() # La captura en curso ya no llega a la ventana
 
     # Limpiar texto
     text_area.delete('1.0', tk.END)
@@ -182,6 +160,7 @@ def limpiar_campos():
         if os.path.exists(path_to_delete):
             try:
                 os.remove(path_to_delete); print(f"Archivo eliminado: {path_to_delete}")
+                if piramides: piramides.borrar(path_to_delete) # Sus miniaturas, en memoria y en disco
                 deleted_msg = f"\nArchivo '{os.path.basename(path_to_delete)}' eliminado."
                 last_photo_path = None # Éxito
             except Exception as e:
@@ -197,6 +176,10 @@ def limpiar_campos():
     # Habilitar botón Foto
     take_photo_button.config(state=tk.NORMAL if picamera2_available and pillow_available else tk.DISABLED)
 
+    # Volver a la vista previa en vivo
+    if picamera2_available and pillow_available:
+        vista_previa.iniciar()
+
     # Estado final
     actualizar_estado(deleted_msg, append=True, info=("Error" not in deleted_msg and "Advertencia" not in deleted_msg), error=("Error" in deleted_msg))
 
@@ -204,6 +187,7 @@ def limpiar_campos():
 def limpiar_imagen():
     """Quita la imagen del label."""
     if not pillow_available: return
+    vista_previa.olvidar_imagen()
     image_label.configure(image=None, text="Imagen capturada aparecerá aquí", font=placeholder_font_style) # Asegurar fuente placeholder
     image_label.image = None
 
@@ -317,6 +301,7 @@ right_frame.grid(row=0, column=1, sticky="nsew", padx=(10, 0), pady=0)
 right_frame.rowconfigure(0, weight=3) # Text Area
 right_frame.rowconfigure(1, weight=0) # Boton Foto
 right_frame.rowconfigure(2, weight=0) # Boton Limpiar
+right_frame.rowconfigure(3, weight=0) # Estadísticas de la vista previa
 right_frame.columnconfigure(0, weight=1)
 right_frame.columnconfigure(1, weight=0)
 
@@ -336,6 +321,10 @@ take_photo_button.grid(row=1, column=0, columnspan=2, sticky="ew", pady=8) # Má
 clear_button = ttk.Button(right_frame, text="Limpiar", command=limpiar_campos, style='Secondary.TButton')
 clear_button.grid(row=2, column=0, columnspan=2, sticky="ew", pady=(0, 8)) # Más padding vertical
 
+# Estadísticas de la vista previa (fps mostrados / frames descartados)
+preview_stats_label = ttk.Label(right_frame, text="Vista previa: --", foreground=COLOR_SECONDARY, background=COLOR_BG)
+preview_stats_label.grid(row=3, column=0, columnspan=2, sticky="w")
+
 # --- Iniciar y estado inicial (lógica sin cambios) ---
 initial_message = "Listo."
 error_message = ""
@@ -350,4 +339,48 @@ else:
      actualizar_estado(initial_message, info=True)
      take_photo_button.config(state=tk.NORMAL)
 
+# --- Sesión de cámara: se abre una vez y se cierra al salir ---
+sesion_camara = SesionCamara()
+# El stream lores (448x256, ya escalado por el ISP) alimenta la vista previa
+vista_previa = VistaPreviaEnVivo(root, image_label, lambda: sesion_camara.capturar_array("lores"),
+                                 fps_objetivo=PREVIEW_FPS)
+ejecutor = EjecutorFondo(root) # Abrir la cámara y capturar, fuera del hilo de Tk (ver trabajo_fondo.py)
+ejecutor.iniciar()
+
+def iniciar_camara():
+    """Abre la sesión de cámara al arrancar la app (en el hilo de trabajo) y arranca la vista previa."""
+    ejecutor.enviar(lambda tarea: sesion_camara.abrir(), al_terminar=camara_abierta)
+
+def camara_abierta(resultado, error):
+    if error is None:
+        actualizar_estado("(Cámara lista)", append=True, info=True)
+        vista_previa.iniciar()
+    elif not isinstance(error, Cancelada):
+        # No es fatal: la sesión reintenta abrir la cámara en la siguiente captura
+        print(f"No se pudo abrir la cámara al inicio: {error}")
+        actualizar_estado(f"Advertencia: cámara no disponible aún ({error})", append=True, error=True)
+
+def actualizar_estadisticas_preview():
+    """Refresca cada segundo los fps y frames descartados de la vista previa."""
+    if vista_previa.activa:
+        e = vista_previa.estadisticas()
+        preview_stats_label.config(text=f"Vista previa: {e['fps']:.1f} fps | descartados {e['descartados']}"
+                                        f" | retraso Tk {e['retraso_tick_ms']:.0f} ms")
+    else:
+        preview_stats_label.config(text="Vista previa: en pausa")
+    root.after(1000, actualizar_estadisticas_preview)
+
+def cerrar_app():
+    """Detiene la vista previa y cierra la cámara antes de destruir la ventana."""
+    ejecutor.detener()
+    vista_previa.detener()
+    vista_previa.esperar() # Un frame en curso reabriría la cámara tras cerrarla
+    sesion_camara.cerrar()
+    root.destroy()
+
+root.protocol("WM_DELETE_WINDOW", cerrar_app)
+if can_take_photo:
+    root.after(100, iniciar_camara)
+root.after(1000, actualizar_estadisticas_preview)
+
 root.mainloop()
\ No newline at end of file
@@ -0,0 +1,109 @@
+"""Captura en memoria: el frame va como array directo a la IA y a la pantalla.
+
+Evita la ida y vuelta por disco (codificar JPEG, escribir, volver a leer y
+decodificar dos veces). Guardar la foto pasa a ser opcional y se hace en un
+hilo de fondo con GuardadorJPEG, que también puede armar ahí la pirámide de
+miniaturas de la foto (ver miniaturas.CachePiramides).
+"""
+import os
+import queue
+import threading
+
+import numpy as np
+from PIL import Image
+
+CALIDAD_JPEG = 90
+
+
+def array_a_imagen(frame):
+    """Convierte un frame de Picamera2 (H, W, 3|4) en una imagen PIL RGB.
+
+    El formato por defecto de Picamera2 ("BGR888") ya entrega los píxeles
+    en orden [R, G, B]; los formatos de 32 bits traen un cuarto canal que
+    se descarta.
+    """
+    if isinstance(frame, Image.Image):
+        return frame.convert('RGB')
+    frame = np.asarray(frame)
+    if frame.ndim == 3 and frame.shape[2] == 4:
+        frame = frame[:, :, :3]
+    return Image.fromarray(np.ascontiguousarray(frame)).convert('RGB')
+
+
+def yuv420_a_rgb(yuv, ancho, alto):
+    """Convierte un frame YUV420 planar de Picamera2 en un array RGB (alto, ancho, 3).
+
+    En la Pi 4 el stream lores solo admite YUV420. capture_array("lores")
+    lo entrega como (alto * 3 / 2, stride): primero el plano Y y luego los
+    planos U y V a media resolución, cada fila empaquetada en el stride.
+    Se usa la conversión BT.601 de rango completo (la de JPEG/sYCC).
+    """
+    yuv = np.asarray(yuv)
+    stride = yuv.shape[1]
+    y = yuv[:alto, :ancho].astype(np.float32)
+    cuarto = alto // 4
+    u = yuv[alto:alto + cuarto].reshape(alto // 2, stride // 2)[:, :ancho // 2]
+    v = yuv[alto + cuarto:alto + 2 * cuarto].reshape(alto // 2, stride // 2)[:, :ancho // 2]
+    u = u.repeat(2, axis=0).repeat(2, axis=1).astype(np.float32) - 128.0
+    v = v.repeat(2, axis=0).repeat(2, axis=1).astype(np.float32) - 128.0
+    rgb = np.empty((alto, ancho, 3), dtype=np.float32)
+    rgb[:, :, 0] = y + 1.402 * v
+    rgb[:, :, 1] = y - 0.344136 * u - 0.714136 * v
+    rgb[:, :, 2] = y + 1.772 * u
+    return np.clip(rgb, 0, 255, out=rgb).astype(np.uint8)
+
+
+class GuardadorJPEG:
+    """Hilo de fondo que codifica y guarda las fotos sin bloquear la GUI.
+
+    Con 'piramides' (una CachePiramides), cada foto guardada deja además
+    sus miniaturas listas para mostrarla sin volver a decodificarla.
+    """
+
+    def __init__(self, calidad=CALIDAD_JPEG, piramides=None):
+        self.calidad = calidad
+        self.piramides = piramides
+        self._cola = queue.Queue()
+        self._hilo = threading.Thread(target=self._trabajar, name="GuardadorJPEG", daemon=True)
+        self._hilo.start()
+
+    def guardar(self, imagen, ruta, al_terminar=None):
+        """Encola 'imagen' (PIL o array) para guardarla en 'ruta'.
+
+        al_terminar(ruta, error) se llama desde el hilo de fondo; error es
+        None si todo fue bien.
+        """
+        self._cola.put((imagen, ruta, al_terminar))
+
+    def esperar(self):
+        """Bloquea hasta que todas las fotos encoladas estén en disco."""
+        self._cola.join()
+
+    def cerrar(self):
+        """Termina de guardar lo pendiente y detiene el hilo."""
+        self._cola.put(None)
+        self._hilo.join()
+
+    def _trabajar(self):
+        while True:
+            tarea = self._cola.get()
+            try:
+                if tarea is None:
+                    return
+                imagen, ruta, al_terminar = tarea
+                error = None
+                try:
+                    directorio = os.path.dirname(ruta)
+                    if directorio:
+                        os.makedirs(directorio, exist_ok=True)
+                    imagen = array_a_imagen(imagen)
+                    imagen.save(ruta, "JPEG", quality=self.calidad)
+                    if self.piramides is not None:
+                        self.piramides.agregar(ruta, imagen)
+                except Exception as e:
+                    print(f"Error al guardar {ruta}: {e}")
+                    error = e
+                if al_terminar:
+                    al_terminar(ruta, error)
+            finally:
+                self._cola.task_done()
@@ -0,0 +1,231 @@
+"""Carga del modelo en segundo plano con la ventana de Tk ya respondiendo.
+
+El modelo (torch.load, pesos de ImageNet, Keras...) se carga en un hilo.
+El progreso y el resultado llegan al hilo de Tk por una cola que se
+atiende con root.after(), así la ventana aparece y responde desde el
+primer momento. Las fotos tomadas antes de que el modelo esté listo se
+encolan y se clasifican en orden en cuanto termina la carga:
+
+    cargador = CargadorModelo(cargar, root, al_progresar=lambda m: status_label.config(text=m))
+    cargador.iniciar()
+    ...
+    cargador.cuando_listo(lambda modelo: clasificar(modelo, ruta))
+
+MetricasArranque mide el tiempo hasta la primera ventana y hasta la
+primera clasificación, contando desde que arrancó el proceso (incluye
+el intérprete y los imports).
+
+torch, torchvision y tensorflow tardan segundos en importarse en una Pi.
+Los scripts solo comprueban al arrancar que están instalados
+(disponible(), sin importarlos) y los importan dentro de cargar(), en el
+hilo de carga, con la ventana y la cámara ya funcionando:
+
+    cargador = CargadorModelo(importar_diferido("motor_inferencia", "motor_compartido"), root)
+
+ClasificacionEnTk junta lo que repiten las GUIs: el progreso y el fin de
+la carga en la etiqueta de estado, y cada foto clasificada en el hilo de
+EjecutorFondo (o en cola si el modelo aún carga):
+
+    clasificacion = ClasificacionEnTk(cargador, ejecutor, lambda modelo, ruta: ..., status_label, metricas)
+    clasificacion.clasificar(ruta, lambda resultado: status_label.config(text=f"Es: {resultado}"))
+"""
+import importlib
+import importlib.util
+import os
+import queue
+import threading
+import time
+
+from trabajo_fondo import Cancelada
+
+# --- Constantes ---
+INTERVALO_MS = 50
+
+
+def inicio_proceso():
+    """Instante (time.monotonic) en que arrancó este proceso; en Linux desde /proc."""
+    try:
+        with open("/proc/self/stat") as f:
+            # El campo 22 (tras el nombre entre paréntesis) es el arranque en ticks desde el boot
+            campos = f.read().rsplit(")", 1)[1].split()
+        arranque = int(campos[19]) / os.sysconf("SC_CLK_TCK")
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return time.monotonic() - (uptime - arranque)
+    except (OSError, ValueError, IndexError):
+        return time.monotonic()
+
+
+def disponible(*modulos):
+    """True si todos los módulos están instalados; find_spec no los importa (es inmediato)."""
+    try:
+        return all(importlib.util.find_spec(modulo) is not None for modulo in modulos)
+    except (ImportError, ValueError):
+        return False
+
+
+def importar_diferido(modulo, funcion):
+    """cargar(progreso) que importa 'modulo' en el hilo de carga y devuelve modulo.funcion(progreso)."""
+    def cargar(progreso):
+        progreso(f"Importando {modulo}...")
+        return getattr(importlib.import_module(modulo), funcion)(progreso)
+    return cargar
+
+
+class MetricasArranque:
+    """Registra (una sola vez) cuándo ocurre cada evento del arranque."""
+
+    def __init__(self, inicio=None):
+        self.inicio = inicio if inicio is not None else inicio_proceso()
+        self.eventos = {}
+
+    def marcar(self, evento):
+        if evento not in self.eventos:
+            self.eventos[evento] = time.monotonic() - self.inicio
+            print(f"[arranque] {evento}: {self.eventos[evento]:.2f} s")
+
+    def marcar_ventana(self, root, evento="primera_ventana"):
+        """Marca 'evento' cuando la ventana se muestra por primera vez."""
+        root.bind("<Map>", lambda e: self.marcar(evento) if e.widget is root else None, add="+")
+
+
+class CargadorModelo:
+    """Ejecuta cargar(progreso) en un hilo y entrega el modelo en el hilo de Tk.
+
+    progreso(mensaje) se puede llamar desde el hilo de carga; al_progresar
+    recibe esos mensajes en el hilo de Tk. al_terminar(modelo, error) se
+    llama una vez, también en el hilo de Tk.
+    """
+
+    def __init__(self, cargar, root=None, al_progresar=None, al_terminar=None, intervalo_ms=INTERVALO_MS):
+        self.cargar = cargar
+        self.root = root
+        self.al_progresar = al_progresar
+        self.al_terminar = al_terminar
+        self.intervalo_ms = intervalo_ms
+        self.modelo = None
+        self.error = None
+        self.listo = False
+        self.segundos = None
+        self._mensajes = queue.Queue()
+        self._pendientes = [] # Funciones a llamar con el modelo cuando esté listo
+        self._terminado = threading.Event()
+        self._hilo = None
+
+    @property
+    def pendientes(self):
+        return len(self._pendientes)
+
+    def iniciar(self, root=None):
+        """Arranca la carga; con 'root' los mensajes se atienden desde el bucle de Tk."""
+        if root is not None:
+            self.root = root
+        if self._hilo is not None:
+            return
+        self._hilo = threading.Thread(target=self._cargar, name="CargadorModelo", daemon=True)
+        self._hilo.start()
+        if self.root is not None:
+            self.root.after(self.intervalo_ms, self._atender_en_tk)
+
+    def _cargar(self):
+        inicio = time.monotonic()
+        try:
+            modelo = self.cargar(lambda mensaje: self._mensajes.put(("progreso", mensaje)))
+            self.segundos = time.monotonic() - inicio # Antes del put: atender() lo lee al recibir "listo"
+            self._mensajes.put(("listo", modelo))
+        except Exception as e:
+            self.segundos = time.monotonic() - inicio
+            print(f"Error al cargar el modelo: {e}")
+            self._mensajes.put(("error", e))
+        finally:
+            self._terminado.set()
+
+    def _atender_en_tk(self):
+        self.atender()
+        if not self.listo and self.error is None:
+            self.root.after(self.intervalo_ms, self._atender_en_tk)
+
+    def atender(self):
+        """Procesa los mensajes del hilo de carga (llamar desde el hilo de Tk)."""
+        while True:
+            try:
+                tipo, valor = self._mensajes.get_nowait()
+            except queue.Empty:
+                return
+            if tipo == "progreso":
+                if self.al_progresar:
+                    self.al_progresar(valor)
+            elif tipo == "listo":
+                self.modelo, self.listo = valor, True
+                print(f"Modelo cargado en segundo plano en {self.segundos:.2f} s")
+                if self.al_terminar:
+                    self.al_terminar(self.modelo, None)
+                pendientes, self._pendientes = self._pendientes, []
+                for funcion in pendientes: # Fotos tomadas durante la carga, en orden
+                    funcion(self.modelo)
+            elif tipo == "error":
+                self.error = valor
+                self._pendientes = []
+                if self.al_terminar:
+                    self.al_terminar(None, valor)
+
+    def cuando_listo(self, funcion):
+        """Llama a funcion(modelo) ya si el modelo está cargado; si no, la encola.
+
+        Devuelve True si se ejecutó en el acto. Si la carga falló no se
+        llama y devuelve False.
+        """
+        if self.listo:
+            funcion(self.modelo)
+            return True
+        if self.error is None:
+            self._pendientes.append(funcion)
+        return False
+
+    def esperar(self, timeout=None):
+        """Bloquea hasta que termine la carga (para scripts sin Tk) y atiende los mensajes."""
+        self._terminado.wait(timeout)
+        self.atender()
+        return self.listo
+
+
+class ClasificacionEnTk:
+    """Clasifica fotos con el modelo de 'cargador' en el hilo de 'ejecutor' y avisa en 'etiqueta'.
+
+    clasificar(modelo, ruta) corre en el hilo de trabajo y devuelve lo que
+    se pasa a mostrar(). Toma el lugar de al_progresar y al_terminar del
+    cargador (crearla antes de cargador.iniciar()).
+    """
+
+    def __init__(self, cargador, ejecutor, clasificar, etiqueta, metricas=None):
+        self.cargador = cargador
+        self.ejecutor = ejecutor
+        self._clasificar = clasificar
+        self.etiqueta = etiqueta
+        self.metricas = metricas
+        cargador.al_progresar = self.progreso
+        cargador.al_terminar = self.terminado
+
+    def progreso(self, mensaje):
+        if self.cargador.pendientes == 0: # No tapar "esperando al modelo" de una foto en cola
+            self.etiqueta.config(text=mensaje)
+
+    def terminado(self, modelo, error):
+        if error:
+            self.etiqueta.config(text=f"Error al cargar el modelo: {error}")
+        elif self.cargador.pendientes == 0:
+            self.etiqueta.config(text="Modelo listo. Esperando acción...")
+
+    def clasificar(self, ruta, mostrar):
+        """Clasifica 'ruta' en el hilo de trabajo y pasa el resultado a mostrar(); si el modelo aún carga, queda en cola."""
+        def enviar(modelo):
+            if not os.path.exists(ruta): return # Se limpió antes de que terminara la carga
+            self.ejecutor.enviar(lambda tarea: self._clasificar(modelo, ruta), al_terminar=clasificada)
+        def clasificada(resultado, error):
+            if isinstance(error, Cancelada): return # Se limpió mientras se clasificaba
+            if error: self.etiqueta.config(text=f"Error al clasificar: {error}"); return
+            mostrar(resultado)
+            if self.metricas:
+                self.metricas.marcar("primera_clasificacion")
+        if not self.cargador.cuando_listo(enviar) and self.cargador.error is None:
+            self.etiqueta.config(text="Imagen capturada. Esperando al modelo...")
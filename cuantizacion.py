@@ -0,0 +1,102 @@
+"""Modo int8 opcional para los modelos de clasificación (ResNet18/34, MobileNetV2).
+
+Toda la inferencia corre en float32 en la CPU. cuantizar() devuelve una
+copia int8 del modelo, con el motor de cuantización elegido según la CPU
+(x86/fbgemm en un PC, qnnpack en la Raspberry Pi):
+
+    calibracion = (preprocesar(img) for img in imagenes_calibracion("fotos"))
+    modelo_int8 = cuantizar(modelo, calibracion)
+
+modo="estatica" (por defecto) cuantiza convoluciones y capas lineales
+después de pasar unas imágenes de calibración por el modelo para fijar
+las escalas de las activaciones. modo="dinamica" (quantize_dynamic) no
+necesita calibración pero solo cuantiza las capas nn.Linear: en estas
+redes casi todo el tiempo está en las convoluciones, así que apenas
+cambia la latencia (queda para comparar).
+
+El modelo int8 solo corre en la CPU. Conviene comparar latencia, tamaño
+y acuerdo top-1 con el float32 antes de activarlo (benchmark_cuantizacion.py).
+"""
+import copy
+import glob
+import io
+import os
+import platform
+import warnings
+
+import torch
+
+try:
+    from torch.ao.quantization import get_default_qconfig_mapping, quantize_dynamic
+    from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+    cuantizacion_available = True
+except ImportError:
+    cuantizacion_available = False
+
+# --- Constantes ---
+MODO_ESTATICA = "estatica"
+MODO_DINAMICA = "dinamica"
+IMAGENES_CALIBRACION = 32
+ENTRADA_EJEMPLO = (1, 3, 224, 224)
+
+
+def motor_cuantizacion():
+    """Elige y activa el motor de cuantización para esta CPU. Devuelve su nombre."""
+    soportados = torch.backends.quantized.supported_engines
+    arm = platform.machine().lower().startswith(("arm", "aarch64"))
+    preferidos = ("qnnpack",) if arm else ("x86", "fbgemm", "onednn", "qnnpack")
+    for motor in preferidos:
+        if motor in soportados:
+            torch.backends.quantized.engine = motor
+            return motor
+    raise RuntimeError(f"Ningún motor de cuantización disponible (soportados: {soportados})")
+
+
+def imagenes_calibracion(carpetas=("fotos_capturadas", "fotos"), maximo=IMAGENES_CALIBRACION):
+    """Rutas de JPEG para calibrar (las capturas ya guardadas, que se parecen a lo que verá el modelo)."""
+    if isinstance(carpetas, str):
+        carpetas = (carpetas,)
+    rutas = []
+    for carpeta in carpetas:
+        rutas += sorted(glob.glob(os.path.join(carpeta, "*.jpg")) + glob.glob(os.path.join(carpeta, "*.jpeg")))
+    return rutas[-maximo:] # Las más recientes
+
+
+def cuantizar(modelo, calibracion=None, modo=MODO_ESTATICA, motor=None):
+    """Copia int8 (CPU) de 'modelo'. 'calibracion' es un iterable de lotes (K, 3, 224, 224) ya normalizados.
+
+    El modelo original no se modifica. En modo estático sin calibración
+    se usa ruido: funciona, pero el acuerdo con el float32 es peor.
+    """
+    if not cuantizacion_available:
+        raise RuntimeError("Esta versión de PyTorch no incluye torch.ao.quantization")
+    motor = motor or motor_cuantizacion()
+    torch.backends.quantized.engine = motor
+    modelo = copy.deepcopy(modelo).cpu().eval()
+    with warnings.catch_warnings():
+        # torch.ao.quantization avisa de que se moverá a torchao; la API sigue funcionando
+        warnings.simplefilter("ignore", DeprecationWarning)
+        warnings.simplefilter("ignore", UserWarning)
+        if modo == MODO_DINAMICA:
+            return quantize_dynamic(modelo, {torch.nn.Linear}, dtype=torch.qint8)
+        if modo != MODO_ESTATICA:
+            raise ValueError(f"Modo de cuantización desconocido: {modo}")
+        preparado = prepare_fx(modelo, get_default_qconfig_mapping(motor), (torch.zeros(ENTRADA_EJEMPLO),))
+        with torch.inference_mode():
+            lotes = 0
+            for lote in calibracion or ():
+                preparado(lote.cpu())
+                lotes += 1
+            if lotes == 0:
+                print("Aviso: cuantización sin imágenes de calibración; se calibra con ruido.")
+                generador = torch.Generator().manual_seed(0)
+                for _ in range(8):
+                    preparado(torch.randn(ENTRADA_EJEMPLO, generator=generador))
+        return convert_fx(preparado)
+
+
+def tamano_mb(modelo):
+    """Tamaño del state_dict serializado (lo que ocuparía en disco), en MB."""
+    buffer = io.BytesIO()
+    torch.save(modelo.state_dict(), buffer)
+    return buffer.getbuffer().nbytes / 1e6
@@ -0,0 +1,51 @@
+"""Decodificación JPEG reducida: el decodificador entrega la imagen a 1/2, 1/4 u 1/8 de su tamaño.
+
+Las fotos de la cámara (1920x1080) se decodificaban enteras (6 MB de
+píxeles) para acabar en 224x224 o en una miniatura del tamaño del label.
+El JPEG guarda bloques DCT de 8x8 y libjpeg puede reconstruir cada uno a
+4x4, 2x2 o 1x1 píxeles: decodifica bastante menos y no llega a tener la
+imagen completa en memoria. Image.draft() de PIL elige la escala más
+pequeña que siga cubriendo el tamaño pedido; el redimensionado normal
+(Resize de torchvision, resize/thumbnail de PIL) termina el trabajo:
+
+    abrir_reducida(ruta, lado_menor=256)    # para Resize(256) + CenterCrop(224)
+    abrir_reducida(ruta, tamano=(224, 224)) # para resize((224, 224)) sin mantener proporción
+    abrir_reducida(ruta, caja=(590, 440))   # para una miniatura que quepa en el label
+
+Con otros formatos (PNG...) la imagen se abre tal cual. El resultado no
+es idéntico al de decodificar entero y redimensionar: el escalado DCT
+promedia cada bloque (unos 2 niveles de 255 de diferencia media tras
+Resize(256)). Con el nearest de MobileNet la diferencia es mayor porque
+el nearest sobre la imagen entera muestrea píxeles sueltos (aliasing) y
+sobre la reducida no. benchmark_jpeg.py mide tiempos, memoria y diferencias.
+"""
+import math
+
+from PIL import Image
+
+
+def tamano_minimo(original, lado_menor=None, tamano=None, caja=None):
+    """(ancho, alto) que la imagen reducida debe cubrir para que el redimensionado posterior no amplíe."""
+    ancho, alto = original
+    if lado_menor:
+        escala = lado_menor / min(ancho, alto)
+    elif caja:
+        escala = min(caja[0] / ancho, caja[1] / alto)
+    elif tamano:
+        escala = max(tamano[0] / ancho, tamano[1] / alto)
+    else:
+        return original
+    escala = min(escala, 1.0)
+    return max(1, math.ceil(ancho * escala)), max(1, math.ceil(alto * escala))
+
+
+def abrir_reducida(ruta, lado_menor=None, tamano=None, caja=None):
+    """Image.open(ruta) con el JPEG decodificado a la escala DCT más pequeña que cubra el destino.
+
+    lado_menor: el lado corto queda >= lado_menor (Resize(lado_menor)).
+    tamano: (ancho, alto) que se cubre en los dos ejes (resize sin proporción).
+    caja: (ancho, alto) en el que se encaja la imagen sin distorsión (miniatura).
+    """
+    img = Image.open(ruta)
+    img.draft(None, tamano_minimo(img.size, lado_menor, tamano, caja)) # No hace nada si no es JPEG
+    return img
@@ -0,0 +1,295 @@
+"""Proceso libcamera-still de larga vida para capturar sin lanzar uno por foto.
+
+Antes cada clic hacía subprocess.run(["libcamera-jpeg", ...]): lanzar el
+proceso, iniciar el sensor, esperar el -t y salir. Aquí se arranca UN
+libcamera-still en modo --keypress (cada línea por stdin = una foto) o
+--signal (SIGUSR1 = una foto) y se le piden fotos por la tubería.
+En modo --signal las señales no se encolan (dos SIGUSR1 seguidos pueden
+llegar como uno), así que se envía la siguiente solo al terminar la
+anterior; --keypress es el modo recomendado. Un SIGUSR1 que llega antes
+de que el proceso instale su manejador lo mata (acción por defecto), y
+libcamera-still ya escribe por stderr (selección de modo, configuración
+de streams) antes de instalarlo. Por eso en modo señal se lanza con
+--verbose=2 y la primera señal espera a la primera línea "Viewfinder
+frame" (MARCA_LISTO), que solo sale ya dentro del bucle de frames; si no
+llega en ESPERA_LISTO, las fotos pendientes fallan en vez de arriesgarse
+a matar el proceso. Si el proceso se cae con fotos pendientes se relanza
+(hasta REINICIOS_MAXIMOS seguidos) y se vuelven a pedir, en vez de
+darlas por perdidas.
+
+Un hilo recolector espera a que cada JPEG esté completo en disco, lo
+mueve a la ruta pedida y deja el resultado en una cola. La GUI nunca
+bloquea: atender_en_tk() revisa la cola con root.after() y llama al
+callback de cada foto desde el hilo de Tk.
+"""
+import collections
+import os
+import queue
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+
+# --- Constantes ---
+EJECUTABLE = "libcamera-still"
+PATRON_SALIDA = "captura_%04d.jpg"
+INTERVALO_REVISION = 0.01 # Segundos entre comprobaciones del archivo de salida
+TIMEOUT_FOTO = 10.0       # Segundos máximos por foto antes de darla por perdida
+INTERVALO_TK_MS = 30      # Cada cuánto revisa la GUI la cola de resultados
+ESPERA_LISTO = 10.0       # Segundos máximos hasta MARCA_LISTO en modo señal
+MARCA_LISTO = "Viewfinder frame" # Línea de --verbose=2 por frame: el manejador de SIGUSR1 ya está puesto
+REINICIOS_MAXIMOS = 1     # Relanzamientos seguidos (sin ninguna foto entre medio) antes de fallar
+
+
+def _jpeg_completo(ruta):
+    """True si 'ruta' existe y termina en el marcador EOI de JPEG (FF D9)."""
+    try:
+        with open(ruta, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() < 4:
+                return False
+            f.seek(-2, os.SEEK_END)
+            return f.read(2) == b"\xff\xd9"
+    except OSError:
+        return False
+
+
+class TrabajadorLibcamera:
+    """Un único libcamera-still vivo al que se le piden fotos por stdin o señal."""
+
+    def __init__(self, ejecutable=EJECUTABLE, modo="keypress", argumentos_extra=(),
+                 timeout_foto=TIMEOUT_FOTO):
+        # 'ejecutable' puede ser una lista (p. ej. [sys.executable, "stub_libcamera_still.py"])
+        self.comando_base = list(ejecutable) if isinstance(ejecutable, (list, tuple)) else [ejecutable]
+        if modo not in ("keypress", "signal"):
+            raise ValueError(f"Modo desconocido: {modo}")
+        self.modo = modo
+        self.argumentos_extra = list(argumentos_extra)
+        self.timeout_foto = timeout_foto
+        self.resultados = queue.Queue() # dicts: numero, ruta, error, segundos
+        self.proceso = None
+        self._directorio = None
+        self._siguiente = 0       # Número de la próxima foto pedida (clave de su callback)
+        self._indice_salida = 0   # Índice del próximo archivo del proceso actual (--framestart 0)
+        self._pendientes = collections.deque() # [numero, ruta_destino, t_pedida, t_disparo, indice]
+        self._callbacks = {}
+        self._lock = threading.RLock()
+        self._listo = threading.Event() # El proceso actual ya atiende señales
+        self._lanzado = None
+        self._reinicios = 0
+        self._hay_pendientes = threading.Event()
+        self._detener = threading.Event()
+        self._hilo = None
+        self._stderr = collections.deque(maxlen=20)
+
+    @property
+    def vivo(self):
+        return self.proceso is not None and self.proceso.poll() is None
+
+    def iniciar(self):
+        """Lanza el proceso (lanza FileNotFoundError si no existe el ejecutable).
+
+        Las fotos que quedaron pendientes de un proceso anterior se vuelven
+        a pedir al nuevo.
+        """
+        with self._lock:
+            if self.vivo:
+                return
+            self._lanzar()
+            for pendiente in self._pendientes: # Reinicio: pedirlas de nuevo, en orden
+                pendiente[3] = None
+                pendiente[4] = self._indice_salida
+                self._indice_salida += 1
+                if self.modo == "keypress":
+                    self.proceso.stdin.write("\n")
+                    pendiente[3] = time.monotonic()
+            if self.modo == "keypress" and self._pendientes:
+                self.proceso.stdin.flush()
+
+    def _lanzar(self):
+        if self._directorio:
+            # Reinicio tras una caída: descartar la salida del proceso anterior
+            shutil.rmtree(self._directorio, ignore_errors=True)
+        self._directorio = tempfile.mkdtemp(prefix="libcamera_")
+        self._indice_salida = 0
+        # En modo señal, --verbose=2 escribe MARCA_LISTO por cada frame del visor
+        disparo = ["--keypress"] if self.modo == "keypress" else ["--signal", "--verbose=2"]
+        comando = self.comando_base + ["-n", "-t", "0"] + disparo + [
+            "--framestart", "0",
+            "-o", os.path.join(self._directorio, PATRON_SALIDA),
+        ] + self.argumentos_extra
+        self.proceso = subprocess.Popen(comando, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                        stderr=subprocess.PIPE, text=True, bufsize=1)
+        self._listo = threading.Event()
+        self._lanzado = time.monotonic()
+        threading.Thread(target=self._leer_stderr, args=(self.proceso, self._listo), daemon=True).start()
+        self._detener.clear()
+        if self._hilo is None or not self._hilo.is_alive():
+            self._hilo = threading.Thread(target=self._recolectar, name="RecolectorLibcamera", daemon=True)
+            self._hilo.start()
+        print(f"Trabajador libcamera iniciado (pid {self.proceso.pid}, modo {self.modo}).")
+
+    def solicitar_foto(self, ruta_destino, al_terminar=None):
+        """Pide una foto que acabará en 'ruta_destino'. Devuelve su número.
+
+        No bloquea. El resultado llega a self.resultados y, si se usa
+        atender_en_tk(), a al_terminar(resultado) en el hilo de Tk.
+        """
+        with self._lock:
+            if not self.vivo:
+                self.iniciar()
+            numero = self._siguiente
+            self._siguiente += 1
+            if al_terminar:
+                self._callbacks[numero] = al_terminar
+            pendiente = [numero, ruta_destino, time.monotonic(), None, self._indice_salida]
+            self._indice_salida += 1
+            self._pendientes.append(pendiente)
+            if self.modo == "keypress":
+                self.proceso.stdin.write("\n")
+                self.proceso.stdin.flush()
+                pendiente[3] = time.monotonic()
+            else:
+                self._disparar() # Solo si es la primera en la cola y el proceso está listo
+            self._hay_pendientes.set()
+        return numero
+
+    def obtener_resultado(self, timeout=None):
+        """Espera el siguiente resultado (uso fuera de la GUI, p. ej. benchmarks)."""
+        return self.resultados.get(timeout=timeout)
+
+    def despachar(self):
+        """Entrega los resultados listos a sus callbacks. Llamar desde el hilo de Tk."""
+        while True:
+            try:
+                resultado = self.resultados.get_nowait()
+            except queue.Empty:
+                return
+            with self._lock:
+                callback = self._callbacks.pop(resultado["numero"], None)
+            if callback:
+                callback(resultado)
+
+    def atender_en_tk(self, root, intervalo_ms=INTERVALO_TK_MS):
+        """Revisa periódicamente la cola de resultados desde el bucle de Tk."""
+        def revisar():
+            self.despachar()
+            root.after(intervalo_ms, revisar)
+        root.after(intervalo_ms, revisar)
+
+    def detener(self):
+        """Termina el proceso y el hilo recolector."""
+        self._detener.set()
+        self._hay_pendientes.set()
+        proceso, self.proceso = self.proceso, None
+        if proceso is not None and proceso.poll() is None:
+            try:
+                if self.modo == "keypress":
+                    proceso.stdin.write("x\n")
+                    proceso.stdin.flush()
+                else:
+                    proceso.send_signal(signal.SIGUSR2)
+                proceso.wait(timeout=2)
+            except Exception:
+                proceso.kill()
+                proceso.wait()
+        if self._hilo is not None:
+            self._hilo.join(timeout=2)
+        if self._directorio:
+            shutil.rmtree(self._directorio, ignore_errors=True)
+            self._directorio = None
+        print("Trabajador libcamera detenido.")
+
+    def _leer_stderr(self, proceso, listo):
+        for linea in proceso.stderr:
+            if MARCA_LISTO in linea:
+                if not listo.is_set(): # Primer frame del visor: el manejador de señales ya está
+                    listo.set()
+                    self._disparar()
+                continue # Una por frame: no tapan los mensajes útiles en self._stderr
+            self._stderr.append(linea.rstrip())
+
+    def _disparar(self):
+        """Modo señal: envía SIGUSR1 por la primera foto pendiente si aún no se pidió y el proceso está listo."""
+        with self._lock:
+            if (self.modo == "signal" and self._pendientes and self._pendientes[0][3] is None
+                    and self._listo.is_set() and self.vivo):
+                self._pendientes[0][3] = time.monotonic()
+                self.proceso.send_signal(signal.SIGUSR1)
+
+    def _siguiente_disparo(self):
+        """Saca la foto terminada de la cola y, en modo señal, dispara la siguiente."""
+        with self._lock:
+            self._pendientes.popleft()
+            self._disparar()
+
+    def _proceso_caido(self):
+        """Relanza el proceso y vuelve a pedir lo pendiente; si ya se relanzó demasiadas veces, falla."""
+        detalle = self._stderr[-1] if self._stderr else "sin salida"
+        if self._reinicios < REINICIOS_MAXIMOS and not self._detener.is_set():
+            self._reinicios += 1
+            print(f"libcamera-still terminó inesperadamente ({detalle}); relanzando...")
+            try:
+                self.iniciar()
+                return
+            except OSError as e:
+                detalle = e
+        self._fallar_pendientes(f"libcamera-still terminó inesperadamente ({detalle})")
+
+    def _fallar_pendientes(self, mensaje):
+        with self._lock:
+            pendientes = list(self._pendientes)
+            self._pendientes.clear()
+            self._reinicios = 0 # La próxima foto pedida vuelve a tener sus relanzamientos
+        for numero, ruta_destino, t_pedida, _, _ in pendientes:
+            self.resultados.put({"numero": numero, "ruta": ruta_destino,
+                                 "error": mensaje, "segundos": time.monotonic() - t_pedida})
+
+    def _recolectar(self):
+        while not self._detener.is_set():
+            with self._lock:
+                actual = self._pendientes[0] if self._pendientes else None
+                if actual is None:
+                    self._hay_pendientes.clear()
+            if actual is None:
+                self._hay_pendientes.wait()
+                continue
+
+            numero, ruta_destino, t_pedida, t_disparo, indice = actual
+            ruta_salida = os.path.join(self._directorio, PATRON_SALIDA % indice)
+            if _jpeg_completo(ruta_salida):
+                error = None
+                try:
+                    directorio = os.path.dirname(ruta_destino)
+                    if directorio:
+                        os.makedirs(directorio, exist_ok=True)
+                    shutil.move(ruta_salida, ruta_destino)
+                except OSError as e:
+                    error = f"No se pudo mover la foto: {e}"
+                self._reinicios = 0
+                self._siguiente_disparo()
+                self.resultados.put({"numero": numero, "ruta": ruta_destino, "error": error,
+                                     "segundos": time.monotonic() - t_pedida})
+                continue
+
+            proceso = self.proceso
+            if proceso is None or proceso.poll() is not None:
+                self._proceso_caido()
+                continue
+            if t_disparo is None: # Modo señal: esperando a que el proceso esté listo
+                if not self._listo.is_set() and time.monotonic() - self._lanzado > ESPERA_LISTO:
+                    # Sin la marca no se sabe si SIGUSR1 lo mataría: mejor fallar (usar --keypress)
+                    self._fallar_pendientes(f"libcamera-still no indicó que estaba listo en {ESPERA_LISTO:.0f} s "
+                                            f"(falta '{MARCA_LISTO}' por stderr)")
+                    continue
+                time.sleep(INTERVALO_REVISION)
+                continue
+            if time.monotonic() - t_disparo > self.timeout_foto:
+                self._siguiente_disparo()
+                self.resultados.put({"numero": numero, "ruta": ruta_destino,
+                                     "error": f"Tiempo agotado esperando la foto {numero}",
+                                     "segundos": time.monotonic() - t_pedida})
+                continue
+            time.sleep(INTERVALO_REVISION)
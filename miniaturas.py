@@ -0,0 +1,266 @@
+"""Foto mostrada en un Label de Tk que se reajusta al tamaño del label sin volver a leer el disco.
+
+Antes, cada evento <Configure> (decenas por segundo al arrastrar la
+ventana) reabría el JPEG y hacía un thumbnail LANCZOS de la foto entera.
+VisorImagen decodifica la foto una vez (reducida al tamaño de la
+pantalla, ver decodificacion_jpeg.py) y guarda una pirámide de niveles
+1, 1/2, 1/4... en memoria. Los <Configure> se agrupan: cada uno reinicia
+un temporizador de root.after y solo cuando pasan 'espera_ms' sin otro
+se redibuja, partiendo del nivel más pequeño que aún cubre el tamaño
+pedido (un LANCZOS desde, como mucho, el doble del tamaño final).
+
+    visor = VisorImagen(root, image_display_label)
+    visor.mostrar(ruta)     # o una imagen PIL
+    visor.olvidar()         # al limpiar
+
+Para las capturas, CachePiramides guarda por foto los niveles 1/2, 1/4 y
+1/8 (unos 2 MB para una de 1920x1080), armados al guardarla (ver
+GuardadorJPEG(piramides=...)) o, si no, la primera vez que se muestra
+(decodificando el JPEG ya a 1/2). Es una LRU con tope de memoria:
+volver a mostrar una foto, recorrer las anteriores o redimensionar la
+ventana toma un nivel hecho en vez de remuestrear 2 megapíxeles. Con
+en_disco=True los niveles se guardan además como JPEG junto a la foto
+(carpeta .miniaturas/, que los glob de *.jpg no recorren) y sobreviven
+al reinicio de la app:
+
+    piramides = CachePiramides()
+    niveles = piramides.obtener(ruta)
+    photo = ImageTk.PhotoImage(miniatura(niveles, (ancho, alto)))
+    piramides.borrar(ruta)  # al borrar la foto
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageTk
+
+from captura_memoria import array_a_imagen
+from decodificacion_jpeg import abrir_reducida
+
+# --- Constantes ---
+MARGEN = 10                      # Píxeles de margen dentro del label
+TAMANO_POR_DEFECTO = (180, 140)  # Si el label aún no tiene tamaño (pantalla de 3.5")
+ESPERA_REDIMENSION_MS = 100      # Sin <Configure> durante este tiempo → se redibuja
+LADO_MINIMO_NIVEL = 64           # El último nivel de la pirámide no baja de aquí
+FACTORES_PIRAMIDE = (2, 4, 8)    # Niveles de la pirámide de una captura
+MEMORIA_PIRAMIDES_MB = 24        # Tope de la caché (unas 12 fotos de 1920x1080)
+PIRAMIDES_EN_DISCO = os.environ.get("PIRAMIDES_EN_DISCO", "0") == "1"
+CARPETA_MINIATURAS = ".miniaturas"
+CALIDAD_MINIATURAS = 90
+
+
+def piramide(imagen, lado_minimo=LADO_MINIMO_NIVEL):
+    """[imagen, 1/2, 1/4, ...] (cada nivel promedia 2x2 píxeles del anterior) hasta 'lado_minimo'."""
+    niveles = [imagen]
+    while min(niveles[-1].size) // 2 >= lado_minimo:
+        niveles.append(niveles[-1].reduce(2))
+    return niveles
+
+
+def elegir_nivel(niveles, tamano):
+    """El nivel más pequeño que todavía cubre 'tamano'; si ninguno llega, el más grande."""
+    for nivel in reversed(niveles):
+        if nivel.width >= tamano[0] and nivel.height >= tamano[1]:
+            return nivel
+    return niveles[0]
+
+
+def encajar(tamano, caja, ampliar=False):
+    """Tamaño de 'tamano' ajustado a 'caja' sin distorsión (sin ampliar, como thumbnail, salvo 'ampliar')."""
+    escala = min(caja[0] / tamano[0], caja[1] / tamano[1])
+    if not ampliar:
+        escala = min(escala, 1.0)
+    return max(1, round(tamano[0] * escala)), max(1, round(tamano[1] * escala))
+
+
+def miniatura(niveles, caja, ampliar=False):
+    """La foto ajustada a 'caja': LANCZOS desde el nivel más pequeño que la cubre."""
+    destino = encajar(niveles[0].size, caja, ampliar)
+    nivel = elegir_nivel(niveles, destino)
+    return nivel if nivel.size == destino else nivel.resize(destino, Image.Resampling.LANCZOS)
+
+
+def niveles_captura(imagen, original=None, factores=FACTORES_PIRAMIDE):
+    """Niveles original/factor de la captura; 'imagen' puede venir ya reducida (tamaño 'original' en el archivo)."""
+    ancho, alto = original or imagen.size
+    niveles = []
+    for factor in factores:
+        tamano = (max(1, ancho // factor), max(1, alto // factor))
+        if imagen.size != tamano: # Cada nivel sale del anterior: BOX de 2x2 = promedio, como reduce(2)
+            imagen = imagen.resize(tamano, Image.Resampling.BOX)
+        niveles.append(imagen)
+    return niveles
+
+
+def memoria_niveles(niveles):
+    return sum(n.width * n.height * len(n.getbands()) for n in niveles)
+
+
+class CachePiramides:
+    """LRU ruta → niveles de la captura, con tope de memoria y copia opcional en disco (.miniaturas/)."""
+
+    def __init__(self, memoria_mb=MEMORIA_PIRAMIDES_MB, en_disco=PIRAMIDES_EN_DISCO, factores=FACTORES_PIRAMIDE):
+        self.memoria_maxima = memoria_mb * 2**20
+        self.en_disco = en_disco
+        self.factores = factores
+        self._entradas = OrderedDict() # ruta → niveles, de la menos a la más reciente
+        self._lock = threading.Lock()  # GuardadorJPEG agrega desde su hilo
+        self.memoria = 0
+        self.aciertos = 0
+        self.de_disco = 0   # Leídas de .miniaturas/
+        self.armadas = 0    # Decodificando la foto
+
+    def estadisticas(self):
+        with self._lock:
+            return {"fotos": len(self._entradas), "memoria_mb": self.memoria / 2**20, "aciertos": self.aciertos,
+                    "de_disco": self.de_disco, "armadas": self.armadas}
+
+    def rutas_miniaturas(self, ruta):
+        """Archivo de cada nivel: carpeta/.miniaturas/nombre.<factor>.jpg."""
+        carpeta, nombre = os.path.split(ruta)
+        base = os.path.join(carpeta, CARPETA_MINIATURAS, os.path.splitext(nombre)[0])
+        return [f"{base}.{factor}.jpg" for factor in self.factores]
+
+    def agregar(self, ruta, imagen):
+        """Arma y guarda la pirámide de 'imagen' (PIL o array), la captura que se guarda en 'ruta'."""
+        niveles = niveles_captura(array_a_imagen(imagen), factores=self.factores)
+        if self.en_disco:
+            self._escribir(ruta, niveles)
+        self._recordar(ruta, niveles)
+        return niveles
+
+    def obtener(self, ruta):
+        """Niveles de la foto en 'ruta': de memoria, de .miniaturas/ o decodificando el JPEG a 1/2."""
+        with self._lock:
+            if ruta in self._entradas:
+                self._entradas.move_to_end(ruta)
+                self.aciertos += 1
+                return self._entradas[ruta]
+        niveles = self._leer(ruta) if self.en_disco else None
+        if niveles is not None:
+            self.de_disco += 1
+        else:
+            with Image.open(ruta) as img:
+                original = img.size
+                # Decodificación reducida (ver decodificacion_jpeg.py): el JPEG sale ya a 1/2
+                img.draft(None, (original[0] // self.factores[0], original[1] // self.factores[0]))
+                niveles = niveles_captura(img.convert('RGB'), original, self.factores)
+            self.armadas += 1
+            if self.en_disco:
+                self._escribir(ruta, niveles)
+        self._recordar(ruta, niveles)
+        return niveles
+
+    def borrar(self, ruta):
+        """Olvida la foto y borra sus miniaturas del disco (al borrar la foto)."""
+        with self._lock:
+            niveles = self._entradas.pop(ruta, None)
+            if niveles is not None:
+                self.memoria -= memoria_niveles(niveles)
+        for miniatura_disco in self.rutas_miniaturas(ruta):
+            if os.path.exists(miniatura_disco):
+                os.remove(miniatura_disco)
+
+    def _recordar(self, ruta, niveles):
+        with self._lock:
+            anterior = self._entradas.pop(ruta, None)
+            if anterior is not None:
+                self.memoria -= memoria_niveles(anterior)
+            self._entradas[ruta] = niveles
+            self.memoria += memoria_niveles(niveles)
+            while self.memoria > self.memoria_maxima and len(self._entradas) > 1: # La más reciente se queda
+                _, viejos = self._entradas.popitem(last=False)
+                self.memoria -= memoria_niveles(viejos)
+
+    def _leer(self, ruta):
+        rutas = self.rutas_miniaturas(ruta)
+        try:
+            foto = os.path.getmtime(ruta)
+            if any(os.path.getmtime(r) < foto for r in rutas): # La foto se reescribió después
+                return None
+            niveles = []
+            for r in rutas:
+                with Image.open(r) as img:
+                    niveles.append(img.convert('RGB'))
+            return niveles
+        except OSError: # Faltan miniaturas (o la foto)
+            return None
+
+    def _escribir(self, ruta, niveles):
+        rutas = self.rutas_miniaturas(ruta)
+        os.makedirs(os.path.dirname(rutas[0]), exist_ok=True)
+        for nivel, destino in zip(niveles, rutas):
+            temporal = destino + ".tmp"
+            nivel.save(temporal, "JPEG", quality=CALIDAD_MINIATURAS)
+            os.replace(temporal, destino)
+
+
+class VisorImagen:
+    """Muestra una foto en 'label' y la reajusta, agrupando los <Configure>, al cambiar su tamaño."""
+
+    def __init__(self, root, label, margen=MARGEN, espera_ms=ESPERA_REDIMENSION_MS,
+                 tamano_por_defecto=TAMANO_POR_DEFECTO, piramides=None):
+        self.root = root
+        self.label = label
+        self.piramides = piramides # CachePiramides: las rutas toman sus niveles de ahí
+        self.margen = margen
+        self.espera_ms = espera_ms
+        self.tamano_por_defecto = tamano_por_defecto
+        self._niveles = None
+        self._photo = None    # Referencia viva del PhotoImage (si no, Tk muestra un hueco)
+        self._tamano = None   # Tamaño dibujado: un <Configure> sin cambio real no redibuja
+        self._after_id = None
+        self.eventos = 0      # <Configure> recibidos
+        self.dibujos = 0      # Redibujados efectivos
+        label.bind("<Configure>", self._al_configurar, add="+")
+
+    @property
+    def imagen(self):
+        """La foto decodificada (nivel más grande) o None."""
+        return self._niveles[0] if self._niveles else None
+
+    def mostrar(self, imagen):
+        """Muestra 'imagen' (ruta o imagen PIL) ya ajustada al label."""
+        if isinstance(imagen, str) and self.piramides is not None:
+            self._niveles = self.piramides.obtener(imagen)
+        else:
+            if isinstance(imagen, str):
+                pantalla = (self.root.winfo_screenwidth(), self.root.winfo_screenheight())
+                with abrir_reducida(imagen, caja=pantalla) as abierta: # Más grande que la pantalla no se verá
+                    imagen = abierta.convert('RGB')
+            self._niveles = piramide(imagen)
+        self._tamano = None
+        self._cancelar()
+        self._dibujar()
+
+    def olvidar(self):
+        """Suelta la foto (el label queda como lo deje quien llama)."""
+        self._cancelar()
+        self._niveles = self._photo = self._tamano = None
+
+    def _cancelar(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _al_configurar(self, event):
+        self.eventos += 1
+        if self._niveles is None:
+            return
+        self._cancelar()
+        self._after_id = self.root.after(self.espera_ms, self._dibujar)
+
+    def _dibujar(self):
+        self._after_id = None
+        if self._niveles is None:
+            return
+        caja = (self.label.winfo_width() - self.margen, self.label.winfo_height() - self.margen)
+        if caja[0] <= 0 or caja[1] <= 0:
+            caja = self.tamano_por_defecto
+        if encajar(self._niveles[0].size, caja) == self._tamano:
+            return
+        imagen = miniatura(self._niveles, caja)
+        self._photo = ImageTk.PhotoImage(imagen)
+        self.label.config(image=self._photo, text="")
+        self._tamano = imagen.size
+        self.dibujos += 1
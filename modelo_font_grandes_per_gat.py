@@ -3,42 +3,20 @@ from tkinter import font
 import os
 from datetime import datetime
 from PIL import Image, ImageTk
-import torch
-from torchvision import models, transforms
+from carga_modelo import CargadorModelo, ClasificacionEnTk, MetricasArranque, importar_diferido # torch se importa en segundo plano
+from trabajo_fondo import Cancelada, EjecutorFondo
 import subprocess
 
-# --- Modelo y Clasificación (sin cambios en su lógica interna) ---
-model = models.resnet18(pretrained=True)
-model.eval()
-
-dog_indices = set(range(151, 269))
-cat_indices = set([281, 282, 283, 284, 285])
-
-def preprocess_image(image_path):
-    preprocess = transforms.Compose([
-        transforms.Resize(256),
-        transforms.CenterCrop(224),
-        transforms.ToTensor(),
-        transforms.Normalize(mean=[0.485, 0.456, 0.406],
-                             std=[0.229, 0.224, 0.225]),
-    ])
-    img = Image.open(image_path).convert('RGB')
-    return preprocess(img).unsqueeze(0)
-
-def classify_image(image_path):
-    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-    input_tensor = preprocess_image(image_path).to(device)
-    model.to(device)
-    with torch.no_grad():
-        outputs = model(input_tensor)
-        _, predicted = torch.max(outputs, 1)
-        idx = predicted.item()
-    if idx in dog_indices:
-        return "Perro"
-    elif idx in cat_indices:
-        return "Gato"
-    else:
-        return "Ni perro ni gato"
+# --- Modelo y Clasificación: motor residente, cargado en segundo plano al arrancar ---
+metricas = MetricasArranque() # Tiempo hasta la primera ventana y la primera clasificación
+
+def etiqueta_con_probabilidad(motor, ruta):
+    etiqueta, probabilidad = motor.classify_con_probabilidad(ruta)
+    return f"{etiqueta} ({probabilidad:.0%})"
+
+cargador_modelo = CargadorModelo(importar_diferido("motor_inferencia", "motor_compartido")) # Avisa en status_label vía ClasificacionEnTk
+
+ejecutor = EjecutorFondo() # El forward corre en un hilo de trabajo, no en el de Tk (ver trabajo_fondo.py)
 
 # --- Variables Globales ---
 last_photo_path = None
@@ -48,10 +26,9 @@ BASE_FONT_SIZE = 18  # Letras mucho más grandes
 
 # --- Funciones de la Interfaz ---
 def tomar_y_clasificar():
-    global last_photo_path, tk_image_ref
-
     status_label.config(text="Capturando...")
-    root.update_idletasks()
+    foto_button.config(state=tk.DISABLED) # Evitar pedir otra foto mientras llega esta
+    limpiar_button.config(state=tk.NORMAL) # Limpiar cancela la captura en curso
 
     save_dir = "fotos"
     os.makedirs(save_dir, exist_ok=True)
@@ -59,36 +36,47 @@ def tomar_y_clasificar():
     nombre = f"captura_{timestamp}.jpg"
     ruta = os.path.join(save_dir, nombre)
 
-    try:
-        subprocess.run(["libcamera-jpeg", "-n", "-o", ruta, "-t", "200"], check=True)
-        status_label.config(text="Clasificando...")
-        root.update_idletasks()
-    except subprocess.CalledProcessError as e:
-        status_label.config(text=f"Error captura: {e}")
-        foto_button.config(state=tk.NORMAL)
-        limpiar_button.config(state=tk.DISABLED)
+    # libcamera-jpeg y la miniatura en el hilo de trabajo: la ventana no se congela mientras tanto
+    ejecutor.enviar(lambda tarea: capturar(tarea, ruta),
+                    al_terminar=lambda img_pil, error: foto_capturada(ruta, img_pil, error))
+
+
+def capturar(tarea, ruta):
+    """Captura con libcamera-jpeg y arma la miniatura (en el hilo de trabajo)."""
+    subprocess.run(["libcamera-jpeg", "-n", "-o", ruta, "-t", "200"], check=True)
+    tarea.comprobar()
+    img_pil = Image.open(ruta)
+    max_w, max_h = 180, 140  # Tamaño fijo de miniatura
+    img_pil.thumbnail((max_w, max_h), Image.LANCZOS)
+    return img_pil
+
+
+def foto_capturada(ruta, img_pil, error):
+    global last_photo_path, tk_image_ref
+
+    if isinstance(error, Cancelada): # Se limpió durante la captura
+        if os.path.exists(ruta): os.remove(ruta)
         return
-    except FileNotFoundError:
-        status_label.config(text="Error: libcamera-jpeg no encontrado.")
+    if isinstance(error, (subprocess.CalledProcessError, FileNotFoundError)):
+        if isinstance(error, FileNotFoundError):
+            status_label.config(text="Error: libcamera-jpeg no encontrado.")
+        else:
+            status_label.config(text=f"Error captura: {error}")
         foto_button.config(state=tk.NORMAL)
         limpiar_button.config(state=tk.DISABLED)
         return
 
     # Mostrar imagen capturada con tamaño fijo de miniatura
-    try:
-        img_pil = Image.open(ruta)
-        max_w, max_h = 180, 140  # Tamaño fijo de miniatura
-        img_pil.thumbnail((max_w, max_h), Image.LANCZOS)
-        tk_image_ref = ImageTk.PhotoImage(img_pil)
-        image_display_label.config(image=tk_image_ref, text="")
-        root.update_idletasks()
-    except Exception as e:
-        status_label.config(text=f"Error al mostrar: {e}")
+    status_label.config(text="Clasificando...")
+    if error:
+        status_label.config(text=f"Error al mostrar: {error}")
         image_display_label.config(image=None, text="Error img")
         tk_image_ref = None
+    else:
+        tk_image_ref = ImageTk.PhotoImage(img_pil)
+        image_display_label.config(image=tk_image_ref, text="")
 
-    resultado = classify_image(ruta)
-    status_label.config(text=f"Es: {resultado}")
+    clasificacion.clasificar(ruta, lambda resultado: status_label.config(text=f"Es: {resultado}"))
 
     last_photo_path = ruta
 
@@ -98,6 +86,7 @@ def tomar_y_clasificar():
 
 def limpiar_datos():
     global last_photo_path, tk_image_ref
+    ejecutor.cancelar_todo() # La captura o clasificación en curso ya no llega a la ventana
 
     if last_photo_path and os.path.exists(last_photo_path):
         try:
@@ -188,4 +177,11 @@ limpiar_button.grid(row=1, column=0, sticky="ew", pady=(1,2))
 limpiar_button.config(state=tk.DISABLED)
 
 root.update_idletasks()
+
+# --- Modelo: carga en segundo plano, con la ventana ya visible ---
+clasificacion = ClasificacionEnTk(cargador_modelo, ejecutor, etiqueta_con_probabilidad, status_label, metricas)
+metricas.marcar_ventana(root)
+cargador_modelo.iniciar(root)
+ejecutor.iniciar(root)
+
 root.mainloop()
\ No newline at end of file
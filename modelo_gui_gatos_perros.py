@@ -2,56 +2,33 @@ import tkinter as tk
 from tkinter import font
 import os
 from datetime import datetime
-from PIL import Image, ImageTk
-import torch
-from torchvision import models, transforms
-import subprocess
-
-# --- Modelo y Clasificación (sin cambios en su lógica interna) ---
-model = models.resnet18(pretrained=True)
-model.eval()
-
-dog_indices = set(range(151, 269))
-cat_indices = set([281, 282, 283, 284, 285])
-
-def preprocess_image(image_path):
-    preprocess = transforms.Compose([
-        transforms.Resize(256),
-        transforms.CenterCrop(224),
-        transforms.ToTensor(),
-        transforms.Normalize(mean=[0.485, 0.456, 0.406],
-                             std=[0.229, 0.224, 0.225]),
-    ])
-    img = Image.open(image_path).convert('RGB')
-    return preprocess(img).unsqueeze(0)
-
-def classify_image(image_path):
-    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-    input_tensor = preprocess_image(image_path).to(device)
-    model.to(device)
-    with torch.no_grad():
-        outputs = model(input_tensor)
-        _, predicted = torch.max(outputs, 1)
-        idx = predicted.item()
-    if idx in dog_indices:
-        return "Perro"
-    elif idx in cat_indices:
-        return "Gato"
-    else:
-        return "Ni perro ni gato"
+from carga_modelo import CargadorModelo, ClasificacionEnTk, MetricasArranque, importar_diferido # torch se importa en segundo plano
+from trabajo_fondo import EjecutorFondo
+from libcamera_trabajador import TrabajadorLibcamera
+from miniaturas import CachePiramides, VisorImagen
+
+# --- Modelo y Clasificación: motor residente, cargado en segundo plano al arrancar ---
+metricas = MetricasArranque() # Tiempo hasta la primera ventana y la primera clasificación
+
+def etiqueta_con_probabilidad(motor, ruta):
+    etiqueta, probabilidad = motor.classify_con_probabilidad(ruta)
+    return f"{etiqueta} ({probabilidad:.0%})"
+
+cargador_modelo = CargadorModelo(importar_diferido("motor_inferencia", "motor_compartido")) # Avisa en status_label vía ClasificacionEnTk
+
+ejecutor = EjecutorFondo() # El forward corre en un hilo de trabajo, no en el de Tk (ver trabajo_fondo.py)
 
 # --- Variables Globales ---
 last_photo_path = None
-tk_image_ref = None
+piramides = CachePiramides() # Miniaturas 1/2, 1/4, 1/8 de las fotos ya mostradas
+trabajador_camara = TrabajadorLibcamera() # libcamera-still persistente (modo keypress)
 # Aumentar base font size para mejor visibilidad
 BASE_FONT_SIZE = 14  # Ajustado para pantalla pequeña pero más legible
 
 # --- Funciones de la Interfaz ---
 def tomar_y_clasificar():
-    global last_photo_path, tk_image_ref
-
     status_label.config(text="Capturando...")
-    root.update_idletasks()
+    foto_button.config(state=tk.DISABLED) # Evitar pedir otra foto mientras llega esta
 
     save_dir = "fotos"
     os.makedirs(save_dir, exist_ok=True)
@@ -60,38 +37,34 @@ def tomar_y_clasificar():
     ruta = os.path.join(save_dir, nombre)
 
     try:
-        subprocess.run(["libcamera-jpeg", "-n", "-o", ruta, "-t", "200"], check=True)
-        status_label.config(text="Clasificando...")
-        root.update_idletasks()
-    except subprocess.CalledProcessError as e:
-        status_label.config(text=f"Error captura: {e}")
+        # No bloquea: foto_capturada() se llama desde el bucle de Tk cuando llegue
+        trabajador_camara.solicitar_foto(ruta, al_terminar=foto_capturada)
+    except FileNotFoundError:
+        status_label.config(text="Error: libcamera-still no encontrado.")
         foto_button.config(state=tk.NORMAL)
         limpiar_button.config(state=tk.DISABLED)
-        return
-    except FileNotFoundError:
-        status_label.config(text="Error: libcamera-jpeg no encontrado.")
+
+
+def foto_capturada(resultado):
+    global last_photo_path
+
+    if resultado["error"]:
+        status_label.config(text=f"Error captura: {resultado['error']}")
         foto_button.config(state=tk.NORMAL)
         limpiar_button.config(state=tk.DISABLED)
         return
+    ruta = resultado["ruta"]
+    status_label.config(text="Clasificando...")
 
-    # Mostrar imagen capturada
+    # Mostrar imagen capturada (decodificada una vez; los redimensionados no vuelven al disco)
     try:
-        img_pil = Image.open(ruta)
-        max_w = image_display_label.winfo_width() - 10
-        max_h = image_display_label.winfo_height() - 10
-        if max_w <= 0 or max_h <= 0:
-            max_w, max_h = 180, 140
-        img_pil.thumbnail((max_w, max_h), Image.LANCZOS)
-        tk_image_ref = ImageTk.PhotoImage(img_pil)
-        image_display_label.config(image=tk_image_ref, text="")
-        root.update_idletasks()
+        visor_imagen.mostrar(ruta)
     except Exception as e:
         status_label.config(text=f"Error al mostrar: {e}")
         image_display_label.config(image=None, text="Error img")
-        tk_image_ref = None
+        visor_imagen.olvidar()
 
-    resultado = classify_image(ruta)
-    status_label.config(text=f"Es: {resultado}")
+    clasificacion.clasificar(ruta, lambda resultado: status_label.config(text=f"Es: {resultado}"))
 
     last_photo_path = ruta
 
@@ -100,17 +73,19 @@ def tomar_y_clasificar():
 
 
 def limpiar_datos():
-    global last_photo_path, tk_image_ref
+    global last_photo_path
+    ejecutor.cancelar_todo() # La clasificación en curso ya no llega a la ventana
 
     if last_photo_path and os.path.exists(last_photo_path):
         try:
             os.remove(last_photo_path)
+            piramides.borrar(last_photo_path)
         except OSError as e:
             print(f"No se pudo eliminar {last_photo_path}: {e}")
     last_photo_path = None
 
     image_display_label.config(image=None, text="imagen", fg="blue")
-    tk_image_ref = None
+    visor_imagen.olvidar()
 
     status_label.config(text="Esperando...")
 
@@ -125,21 +100,6 @@ SCREEN_WIDTH = 480
 SCREEN_HEIGHT = 320
 root.geometry(f"{SCREEN_WIDTH}x{SCREEN_HEIGHT}")
 
-# Función para redimensionar la imagen cuando cambia el widget
-
-def resize_image_display(event):
-    global tk_image_ref
-    if last_photo_path and os.path.exists(last_photo_path):
-        try:
-            img_pil = Image.open(last_photo_path)
-            max_w = image_display_label.winfo_width() - 10
-            max_h = image_display_label.winfo_height() - 10
-            img_pil.thumbnail((max_w, max_h), Image.LANCZOS)
-            tk_image_ref = ImageTk.PhotoImage(img_pil)
-            image_display_label.config(image=tk_image_ref)
-        except Exception as e:
-            status_label.config(text=f"Error al redimensionar: {e}")
-
 # Root grid configurado
 root.grid_rowconfigure(0, weight=1)
 root.grid_columnconfigure(0, weight=1)
@@ -162,8 +122,8 @@ image_display_label = tk.Label(
     font=font.Font(size=BASE_FONT_SIZE + 2)
 )
 image_display_label.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
-# Bind para redimensionar responsivo
-image_display_label.bind("<Configure>", resize_image_display)
+# Redimensionado responsivo: agrupa los <Configure> y redibuja desde la pirámide en memoria
+visor_imagen = VisorImagen(root, image_display_label, piramides=piramides)
 
 right_frame = tk.Frame(main_frame, bd=1, relief=tk.SOLID)
 right_frame.grid(row=0, column=1, sticky="nsew", padx=(2,0))
@@ -208,4 +168,23 @@ limpiar_button.grid(row=1, column=0, sticky="ew", pady=(1,2))
 limpiar_button.config(state=tk.DISABLED)
 
 root.update_idletasks()
+# --- Cámara: un solo libcamera-still vivo durante toda la app ---
+def cerrar_app():
+    ejecutor.detener()
+    trabajador_camara.detener()
+    root.destroy()
+
+try:
+    trabajador_camara.iniciar()
+except FileNotFoundError:
+    print("Error: libcamera-still no encontrado.")
+trabajador_camara.atender_en_tk(root)
+root.protocol("WM_DELETE_WINDOW", cerrar_app)
+
+# --- Modelo: carga en segundo plano, con la ventana ya visible ---
+clasificacion = ClasificacionEnTk(cargador_modelo, ejecutor, etiqueta_con_probabilidad, status_label, metricas)
+metricas.marcar_ventana(root)
+cargador_modelo.iniciar(root)
+ejecutor.iniciar(root)
+
 root.mainloop()
@@ -3,54 +3,30 @@ from tkinter import font
 import os
 from datetime import datetime
 from PIL import Image, ImageTk
-import torch
-from torchvision import models, transforms
-import subprocess
-
-# --- Modelo y Clasificación (sin cambios en su lógica interna) ---
-model = models.resnet18(pretrained=True)
-model.eval()
-
-dog_indices = set(range(151, 269))
-cat_indices = set([281, 282, 283, 284, 285])
-
-def preprocess_image(image_path):
-    preprocess = transforms.Compose([
-        transforms.Resize(256),
-        transforms.CenterCrop(224),
-        transforms.ToTensor(),
-        transforms.Normalize(mean=[0.485, 0.456, 0.406],
-                             std=[0.229, 0.224, 0.225]),
-    ])
-    img = Image.open(image_path).convert('RGB')
-    return preprocess(img).unsqueeze(0)
-
-def classify_image(image_path):
-    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-    input_tensor = preprocess_image(image_path).to(device)
-    model.to(device)
-    with torch.no_grad():
-        outputs = model(input_tensor)
-        _, predicted = torch.max(outputs, 1)
-        idx = predicted.item()
-    if idx in dog_indices:
-        return "Perro"
-    elif idx in cat_indices:
-        return "Gato"
-    else:
-        return "Ni perro ni gato"
+from carga_modelo import CargadorModelo, ClasificacionEnTk, MetricasArranque, importar_diferido # torch se importa en segundo plano
+from trabajo_fondo import EjecutorFondo
+from libcamera_trabajador import TrabajadorLibcamera
+
+# --- Modelo y Clasificación: motor residente, cargado en segundo plano al arrancar ---
+metricas = MetricasArranque() # Tiempo hasta la primera ventana y la primera clasificación
+
+def etiqueta_con_probabilidad(motor, ruta):
+    etiqueta, probabilidad = motor.classify_con_probabilidad(ruta)
+    return f"{etiqueta} ({probabilidad:.0%})"
+
+cargador_modelo = CargadorModelo(importar_diferido("motor_inferencia", "motor_compartido")) # Avisa en status_label vía ClasificacionEnTk
+
+ejecutor = EjecutorFondo() # El forward corre en un hilo de trabajo, no en el de Tk (ver trabajo_fondo.py)
 
 # --- Variables Globales ---
 last_photo_path = None
 tk_image_ref = None
+trabajador_camara = TrabajadorLibcamera() # libcamera-still persistente (modo keypress)
 
 # --- Funciones de la Interfaz ---
 def tomar_y_clasificar():
-    global last_photo_path
-    global tk_image_ref
-
     status_label.config(text="Capturando imagen...")
-    root.update_idletasks()
+    foto_button.config(state=tk.DISABLED) # Evitar pedir otra foto mientras llega esta
 
     save_dir = "fotos"
     os.makedirs(save_dir, exist_ok=True)
@@ -59,19 +35,24 @@ def tomar_y_clasificar():
     ruta = os.path.join(save_dir, nombre)
 
     try:
-        subprocess.run(["libcamera-jpeg", "-n", "-o", ruta, "-t", "500"], check=True)
-        status_label.config(text="Imagen capturada. Clasificando...")
-        root.update_idletasks()
-    except subprocess.CalledProcessError as e:
-        status_label.config(text=f"Error al capturar: {e}")
+        # No bloquea: foto_capturada() se llama desde el bucle de Tk cuando llegue
+        trabajador_camara.solicitar_foto(ruta, al_terminar=foto_capturada)
+    except FileNotFoundError:
+        status_label.config(text="Error: libcamera-still no encontrado.")
         foto_button.config(state=tk.NORMAL)
         limpiar_button.config(state=tk.DISABLED)
-        return
-    except FileNotFoundError:
-        status_label.config(text="Error: libcamera-jpeg no encontrado.")
+
+def foto_capturada(resultado):
+    global last_photo_path
+    global tk_image_ref
+
+    if resultado["error"]:
+        status_label.config(text=f"Error al capturar: {resultado['error']}")
         foto_button.config(state=tk.NORMAL)
         limpiar_button.config(state=tk.DISABLED)
         return
+    ruta = resultado["ruta"]
+    status_label.config(text="Imagen capturada. Clasificando...")
 
     # Mostrar la imagen capturada en image_display_label
     try:
@@ -79,7 +60,6 @@ def tomar_y_clasificar():
         img_pil.thumbnail((360, 260))
         tk_image_ref = ImageTk.PhotoImage(img_pil)
         image_display_label.config(image=tk_image_ref, text="") # Mostrar imagen
-        root.update_idletasks()
     except Exception as e:
         status_label.config(text=f"Error al mostrar imagen: {e}")
         image_display_label.config(image=None, text="Error al mostrar")
@@ -87,8 +67,7 @@ def tomar_y_clasificar():
         # Aunque falle la muestra, intentamos clasificar
         
     # Clasificar
-    resultado = classify_image(ruta)
-    status_label.config(text=f"Resultado: {resultado}")
+    clasificacion.clasificar(ruta, lambda resultado: status_label.config(text=f"Resultado: {resultado}"))
 
     # --- CORRECCIÓN AQUÍ ---
     # Ya NO borramos la imagen aquí. Se borrará al presionar "limpiar".
@@ -103,6 +82,7 @@ def tomar_y_clasificar():
 def limpiar_datos():
     global last_photo_path
     global tk_image_ref
+    ejecutor.cancelar_todo() # La clasificación en curso ya no llega a la ventana
 
     if last_photo_path and os.path.exists(last_photo_path):
         try:
@@ -165,4 +145,23 @@ limpiar_button = tk.Button(buttons_container, text="limpiar", command=limpiar_da
 limpiar_button.pack(pady=5)
 limpiar_button.config(state=tk.DISABLED)
 
+# --- Cámara: un solo libcamera-still vivo durante toda la app ---
+def cerrar_app():
+    ejecutor.detener()
+    trabajador_camara.detener()
+    root.destroy()
+
+try:
+    trabajador_camara.iniciar()
+except FileNotFoundError:
+    print("Error: libcamera-still no encontrado.")
+trabajador_camara.atender_en_tk(root)
+root.protocol("WM_DELETE_WINDOW", cerrar_app)
+
+# --- Modelo: carga en segundo plano, con la ventana ya visible ---
+clasificacion = ClasificacionEnTk(cargador_modelo, ejecutor, etiqueta_con_probabilidad, status_label, metricas)
+metricas.marcar_ventana(root)
+cargador_modelo.iniciar(root)
+ejecutor.iniciar(root)
+
 root.mainloop()
\ No newline at end of file
@@ -0,0 +1,256 @@
+"""Motor de inferencia residente para las GUIs de clasificación.
+
+Antes cada classify_image() resolvía torch.device, llamaba a
+model.to(device) y reconstruía el transforms.Compose en cada foto. El
+motor crea todo una sola vez (modelo, dispositivo, transformaciones y
+etiquetas) y solo hace el forward en cada llamada:
+
+    motor = motor_compartido()          # ResNet18 ImageNet → Perro / Gato
+    motor.classify("fotos/captura.jpg")
+    motor.classify(frame)               # array RGB de la cámara (ruta rápida)
+    motor.classify_batch([f1, f2, f3])  # un solo forward para todas
+
+Las rutas e imágenes PIL pasan por el mismo transforms.Compose de
+siempre; los arrays van por PreprocesadorTensor (sin PIL intermedio).
+
+Con int8=True (o MODO_INT8=1 en el entorno para motor_compartido) el
+modelo se cuantiza a int8 al cargarlo, calibrado con las fotos ya
+capturadas (ver cuantizacion.py); corre siempre en la CPU.
+
+Con 'pesos' (la ruta del .pth) el modelo se guarda compilado junto a los
+pesos la primera vez y los siguientes arranques lo cargan ya compilado
+(ver cache_modelos.py); backend="onnx" lo ejecuta con ONNX Runtime.
+motor_compartido lo hace con los pesos de ImageNet que descarga
+torchvision y el backend de BACKEND_INFERENCIA.
+
+Con perro_gato=True (MODO_PERRO_GATO en motor_compartido) la última capa
+se cambia por CabezaPerroGato: el modelo devuelve 3 valores por imagen
+y su softmax es la masa de probabilidad de cada grupo (la suma del
+softmax de ImageNet sobre las razas de perro, las de gato y el resto),
+en vez de mirar solo si el top-1 cae en un conjunto de índices:
+
+    motor.classify_con_probabilidad(frame)   # ("Perro", 0.93)
+
+Con entrada_cruda=True (PLEGAR_NORMALIZACION en motor_compartido) el
+modelo recibe los píxeles en [0, 255]: Conv+BN fusionadas y Normalize
+plegado en la primera convolución (ver plegado.py), y el preprocesado
+ya no normaliza.
+
+En el pipeline en cadena (pipeline_captura.py) preparar() llena uno de
+los buffers de buffers_entrada() fuera del lock, mientras
+probabilidades_entrada() hace el forward del frame anterior.
+"""
+import os
+import threading
+
+import numpy as np
+import torch
+import torch.nn as nn
+from PIL import Image
+from torchvision import models, transforms
+
+from cache_modelos import cargar_modelo, ruta_pesos_hub
+from decodificacion_jpeg import abrir_reducida
+from preproceso_tensor import PreprocesadorTensor, MEDIA_IMAGENET, STD_IMAGENET, TAMANO_RESIZE
+
+# --- Constantes ---
+INDICES_PERRO = set(range(151, 269))            # Perros en ImageNet
+INDICES_GATO = set([281, 282, 283, 284, 285])   # Gatos en ImageNet
+GRUPOS_PERRO_GATO = ("Perro", "Gato", "Ni perro ni gato") # Salidas de CabezaPerroGato, en orden
+LOTE_MAXIMO = 8
+MODO_INT8 = os.environ.get("MODO_INT8", "0") == "1" # Opcional: comparar antes con benchmark_cuantizacion.py
+BACKEND_INFERENCIA = os.environ.get("BACKEND_INFERENCIA", "torchscript") # "torch" | "torchscript" | "onnx"
+MODO_PERRO_GATO = os.environ.get("MODO_PERRO_GATO", "1") == "1" # Probabilidad por grupo (CabezaPerroGato)
+# Entrada cruda (plegado.py): rinde con "torch"; TorchScript congelado y ONNX Runtime ya pliegan BatchNorm
+PLEGAR_NORMALIZACION = os.environ.get("PLEGAR_NORMALIZACION", "1" if BACKEND_INFERENCIA == "torch" else "0") == "1"
+
+
+def etiqueta_perro_gato(indice):
+    """Etiqueta de los scripts modelo_*: índice ImageNet → Perro / Gato / Ni perro ni gato."""
+    if indice in INDICES_PERRO:
+        return "Perro"
+    elif indice in INDICES_GATO:
+        return "Gato"
+    else:
+        return "Ni perro ni gato"
+
+
+class CabezaPerroGato(nn.Module):
+    """La capa final de ImageNet agrupada: (K, 3) log-masas de Perro, Gato y Ni perro ni gato.
+
+    Las filas de 'fc' se reordenan (perros, gatos, resto) y cada grupo se
+    reduce con logsumexp, así softmax(salida) es exactamente la suma del
+    softmax de los 1000 logits dentro de cada grupo. El resto hace falta
+    entero: es el denominador que convierte las razas en probabilidad.
+    """
+
+    def __init__(self, fc):
+        super().__init__()
+        perros, gatos = sorted(INDICES_PERRO), sorted(INDICES_GATO)
+        resto = [i for i in range(fc.out_features) if i not in INDICES_PERRO and i not in INDICES_GATO]
+        orden = torch.tensor(perros + gatos + resto)
+        self.fc = nn.Linear(fc.in_features, fc.out_features)
+        with torch.no_grad():
+            self.fc.weight.copy_(fc.weight[orden])
+            self.fc.bias.copy_(fc.bias[orden])
+        self.cortes = (len(perros), len(perros) + len(gatos))
+
+    def forward(self, x):
+        logits = self.fc(x)
+        a, b = self.cortes # Cortes fijos (no split): así también se traza con FX para int8
+        return torch.stack([torch.logsumexp(logits[:, :a], dim=1), torch.logsumexp(logits[:, a:b], dim=1),
+                            torch.logsumexp(logits[:, b:], dim=1)], dim=1)
+
+
+def podar_perro_gato(red):
+    """Cambia la capa final de ImageNet (ResNet: fc; MobileNetV2: classifier[-1]) por CabezaPerroGato."""
+    if isinstance(getattr(red, "fc", None), nn.Linear):
+        red.fc = CabezaPerroGato(red.fc)
+    elif isinstance(getattr(red, "classifier", None), nn.Sequential) and isinstance(red.classifier[-1], nn.Linear):
+        red.classifier[-1] = CabezaPerroGato(red.classifier[-1])
+    else:
+        raise ValueError(f"No se encontró la capa final de ImageNet en {type(red).__name__}")
+    return red
+
+
+def resnet18_imagenet():
+    """El modelo de los scripts modelo_* (antes resnet18(pretrained=True))."""
+    return models.resnet18(weights=models.ResNet18_Weights.IMAGENET1K_V1)
+
+
+class MotorInferencia:
+    """Dueño del modelo, el dispositivo, el preprocesado y las etiquetas.
+
+    'modelo' es un nn.Module o una función que lo construye. 'etiquetar'
+    convierte el índice ganador en el texto que muestra la GUI.
+    progreso(mensaje), si se da, recibe el avance de la construcción
+    (pensado para CargadorModelo). Con perro_gato=True la capa final
+    se cambia por CabezaPerroGato y las etiquetas son GRUPOS_PERRO_GATO.
+    Con entrada_cruda=True el modelo recibe píxeles en [0, 255] (sin
+    int8: la cuantización ya fusiona Conv+BN por su cuenta).
+    Con int8=True el modelo se cuantiza
+    calibrando con 'calibracion' (rutas, PIL o arrays; por defecto las
+    fotos ya capturadas). Con 'pesos' (ruta del archivo de pesos) se usa
+    'backend': la caché de modelos compilados o ONNX Runtime (solo en la CPU);
+    'variante' cambia el nombre del artefacto en esa caché.
+    """
+
+    def __init__(self, modelo=resnet18_imagenet, etiquetar=etiqueta_perro_gato, device=None,
+                 lote_maximo=LOTE_MAXIMO, progreso=None, calentar=True, int8=False, calibracion=None,
+                 pesos=None, backend="torchscript", perro_gato=False, variante=None, entrada_cruda=False):
+        progreso = progreso or (lambda mensaje: None)
+        en_cpu = int8 or (pesos and backend != "torch") # int8, TorchScript congelado y ONNX: solo CPU
+        self.device = torch.device('cpu' if en_cpu else device or ('cuda' if torch.cuda.is_available() else 'cpu'))
+        self.etiquetar = GRUPOS_PERRO_GATO.__getitem__ if perro_gato else etiquetar
+        entrada_cruda = entrada_cruda and not int8
+        self.transformar = transforms.Compose([
+            transforms.Resize(TAMANO_RESIZE),
+            transforms.CenterCrop(224),
+        ] + ([
+            transforms.PILToTensor(),
+            transforms.Lambda(lambda t: t.float()), # Píxeles en [0, 255]: el modelo normaliza
+        ] if entrada_cruda else [
+            transforms.ToTensor(),
+            transforms.Normalize(mean=MEDIA_IMAGENET, std=STD_IMAGENET),
+        ]))
+        self.preprocesador = PreprocesadorTensor(lote=lote_maximo, normalizar=not entrada_cruda)
+        self._lock = threading.Lock() # El tensor de entrada se reutiliza: una inferencia a la vez
+        self.int8 = int8
+
+        def construir():
+            progreso("Cargando modelo...")
+            red = modelo() if callable(modelo) and not isinstance(modelo, torch.nn.Module) else modelo
+            if perro_gato:
+                red = podar_perro_gato(red)
+            red.eval()
+            if entrada_cruda:
+                from plegado import preparar_entrada_cruda
+                progreso("Plegando normalización y BatchNorm...")
+                red = preparar_entrada_cruda(red)
+            red.to(self.device)
+            if int8:
+                from cuantizacion import cuantizar, imagenes_calibracion
+                progreso("Cuantizando modelo a int8...")
+                imagenes = imagenes_calibracion() if calibracion is None else calibracion
+                red = cuantizar(red, (self._entrada([img]) for img in imagenes))
+            return red
+
+        variante = variante or (("int8" if int8 else "float32") + ("-perro_gato" if perro_gato else "")
+                                + ("-cruda" if entrada_cruda else ""))
+        self.modelo = cargar_modelo(construir, pesos, backend if pesos else "torch", variante,
+                                    progreso=progreso, calentar=False)
+        if calentar:
+            progreso("Preparando modelo...")
+            self.calentar()
+
+    def calentar(self):
+        """Forwards de prueba: la primera inferencia real ya no paga la inicialización."""
+        with self._lock, torch.inference_mode():
+            for _ in range(2): # TorchScript (caché compilada) optimiza el grafo en las primeras llamadas
+                self.modelo(torch.zeros((1, 3, 224, 224), device=self.device))
+
+    def _entrada(self, imagenes):
+        """Lote (K, 3, 224, 224) en el dispositivo para rutas, imágenes PIL o arrays."""
+        if all(isinstance(img, np.ndarray) for img in imagenes) and len(imagenes) <= self.preprocesador.lote_maximo:
+            return self.preprocesador.preparar_lote(imagenes).to(self.device)
+        tensores = []
+        for img in imagenes:
+            if isinstance(img, str):
+                with abrir_reducida(img, lado_menor=TAMANO_RESIZE) as abierta: # JPEG: decodificación reducida
+                    img = abierta.convert('RGB')
+            elif isinstance(img, np.ndarray):
+                img = Image.fromarray(np.ascontiguousarray(img[:, :, :3]))
+            tensores.append(self.transformar(img.convert('RGB')))
+        return torch.stack(tensores).to(self.device)
+
+    def probabilidades(self, imagenes):
+        """Softmax (K, C) como array NumPy para una lista de imágenes."""
+        with self._lock, torch.inference_mode():
+            salida = self.modelo(self._entrada(list(imagenes)))
+            return torch.nn.functional.softmax(salida, dim=1).cpu().numpy()
+
+    def buffers_entrada(self, n):
+        """'n' preprocesadores de un frame con el mismo preprocesado que el motor (ver preparar())."""
+        return [PreprocesadorTensor(lote=1, normalizar=self.preprocesador.normalizar) for _ in range(n)]
+
+    def preparar(self, frames, preprocesador):
+        """Entrada de frames RGB en el tensor de 'preprocesador', sin el lock: otro hilo puede estar en el forward.
+
+        Para el pipeline de pipeline_captura.py: el frame N+1 se prepara en un
+        buffer mientras probabilidades_entrada() lee el del frame N.
+        """
+        return preprocesador.preparar_lote(frames).to(self.device)
+
+    def probabilidades_entrada(self, entrada):
+        """Softmax (K, C) como array NumPy para una entrada ya preparada con preparar()."""
+        with self._lock, torch.inference_mode():
+            return torch.nn.functional.softmax(self.modelo(entrada), dim=1).cpu().numpy()
+
+    def classify_batch(self, imagenes):
+        """Clasifica varias imágenes en un solo forward. Devuelve una etiqueta por imagen."""
+        return [self.etiquetar(int(i)) for i in self.probabilidades(imagenes).argmax(axis=1)]
+
+    def classify(self, imagen):
+        """Clasifica una ruta, imagen PIL o array RGB. Devuelve la etiqueta."""
+        return self.classify_batch([imagen])[0]
+
+    def classify_con_probabilidad(self, imagen):
+        """(etiqueta, probabilidad): con perro_gato, la masa del grupo; si no, el softmax de la clase."""
+        probabilidades = self.probabilidades([imagen])[0]
+        indice = int(probabilidades.argmax())
+        return self.etiquetar(indice), float(probabilidades[indice])
+
+
+_motor = None
+_motor_lock = threading.Lock()
+
+
+def motor_compartido(progreso=None):
+    """El motor por defecto (ResNet18 → Perro/Gato), creado la primera vez que se pide."""
+    global _motor
+    with _motor_lock:
+        if _motor is None:
+            _motor = MotorInferencia(progreso=progreso, int8=MODO_INT8, backend=BACKEND_INFERENCIA,
+                                     pesos=ruta_pesos_hub(models.ResNet18_Weights.IMAGENET1K_V1),
+                                     perro_gato=MODO_PERRO_GATO, entrada_cruda=PLEGAR_NORMALIZACION)
+        return _motor
@@ -0,0 +1,87 @@
+"""Backend ONNX Runtime (CPU) para los clasificadores de torchvision.
+
+El modelo (ResNet18, la ResNet34 de 9 clases con R23.pth, MobileNetV2)
+se exporta a ONNX una sola vez, junto a sus pesos y con la misma clave
+que la caché de TorchScript (hash de los pesos + versión de torch):
+
+    R23.pth
+    R23.float32.3f9a0c1d2e4b.torch-2.3.1.onnx
+
+SesionONNX se usa igual que el nn.Module: recibe el tensor de entrada
+(K, 3, 224, 224) y devuelve los logits como tensor de torch, así que
+classify_image(), MotorInferencia y clasificar_lote_torch no cambian.
+En ARM ONNX Runtime suele ser bastante más rápido que PyTorch en modo
+eager y ocupa menos memoria (ver benchmark_backends.py).
+"""
+import os
+
+import torch
+
+try:
+    import onnxruntime
+    onnxruntime_available = True
+except ImportError:
+    onnxruntime_available = False
+
+from cache_modelos import ruta_artefacto, limpiar_artefactos, ENTRADA_EJEMPLO
+
+# --- Constantes ---
+OPSET = 17
+NOMBRE_ENTRADA = "entrada"
+NOMBRE_SALIDA = "logits"
+
+
+def exportar_onnx(modelo, ruta, opset=OPSET):
+    """Exporta 'modelo' (en eval) a ONNX con el tamaño de lote variable."""
+    argumentos = dict(input_names=[NOMBRE_ENTRADA], output_names=[NOMBRE_SALIDA], opset_version=opset,
+                      dynamic_axes={NOMBRE_ENTRADA: {0: "lote"}, NOMBRE_SALIDA: {0: "lote"}})
+    with torch.no_grad():
+        try:
+            # El exportador clásico (por trazado): no necesita onnxscript y sirve con opset 17
+            torch.onnx.export(modelo.cpu().eval(), (torch.zeros(ENTRADA_EJEMPLO),), ruta, dynamo=False, **argumentos)
+        except TypeError: # torch < 2.5 no tiene el parámetro 'dynamo'
+            torch.onnx.export(modelo.cpu().eval(), (torch.zeros(ENTRADA_EJEMPLO),), ruta, **argumentos)
+    return ruta
+
+
+class SesionONNX:
+    """InferenceSession de ONNX Runtime con la interfaz de un nn.Module: logits = sesion(entrada)."""
+
+    def __init__(self, ruta, hilos=None):
+        if not onnxruntime_available:
+            raise RuntimeError("onnxruntime no instalado (pip install onnxruntime)")
+        opciones = onnxruntime.SessionOptions()
+        opciones.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        opciones.intra_op_num_threads = hilos or os.cpu_count() or 1
+        self.ruta = ruta
+        self.sesion = onnxruntime.InferenceSession(ruta, opciones, providers=["CPUExecutionProvider"])
+        self.entrada = self.sesion.get_inputs()[0].name
+
+    def __call__(self, entrada):
+        # .numpy() de un tensor contiguo en la CPU no copia; la salida tampoco (from_numpy)
+        salida = self.sesion.run(None, {self.entrada: entrada.detach().cpu().contiguous().numpy()})[0]
+        return torch.from_numpy(salida)
+
+    def eval(self):
+        return self # Compatibilidad con el código que trata al modelo como nn.Module
+
+    def to(self, device):
+        return self # Solo CPU
+
+
+def cargar_onnx(construir, ruta_pesos, progreso=None, variante="float32"):
+    """SesionONNX del modelo exportado junto a 'ruta_pesos'; si no está (o cambiaron los pesos), lo exporta."""
+    progreso = progreso or (lambda mensaje: None)
+    artefacto = ruta_artefacto(ruta_pesos, variante, ".onnx") if os.path.exists(ruta_pesos) else None
+    if artefacto and os.path.exists(artefacto):
+        progreso("Cargando modelo ONNX...")
+        return SesionONNX(artefacto)
+    modelo = construir() # Puede descargar los pesos (hub) la primera vez
+    artefacto = ruta_artefacto(ruta_pesos, variante, ".onnx")
+    progreso("Exportando modelo a ONNX (solo la primera vez)...")
+    temporal = artefacto + ".tmp"
+    exportar_onnx(modelo, temporal)
+    os.replace(temporal, artefacto)
+    limpiar_artefactos(ruta_pesos)
+    print(f"Modelo ONNX guardado en {artefacto}")
+    return SesionONNX(artefacto)
@@ -0,0 +1,141 @@
+"""Backend TFLite (intérprete con XNNPACK) para la MobileNetV2 de Keras.
+
+model.predict() de Keras arma el grafo, los callbacks y el lote en cada
+llamada: unos 100 ms por imagen aunque la red tarde bastante menos. El
+modelo se convierte una sola vez a un flatbuffer TFLite, que se guarda
+junto a los pesos de Keras con el hash de esos pesos en el nombre:
+
+    ~/.keras/models/mobilenet_v2_weights_tf_dim_ordering_tf_kernels_1.0_224.h5
+    ~/.keras/models/mobilenet_v2_weights_tf_dim_ordering_tf_kernels_1.0_224.tflite.3f9a0c1d2e4b.tflite
+
+Los siguientes arranques cargan el .tflite en el intérprete, que usa el
+delegado XNNPACK (por defecto en los modelos float32) con 'hilos' hilos.
+Con tflite_runtime o ai_edge_litert instalados ni siquiera se importa
+TensorFlow (solo hace falta la primera vez, para convertir):
+
+    modelo = cargar_tflite(construir, RUTA_PESOS_MOBILENET_V2, hilos=4)
+    probabilidades = modelo.predict(preprocesar_mobilenet(lote))  # (K, 1000), como Keras
+    decodificar(probabilidades, top=3)  # = decode_predictions de Keras
+"""
+import glob
+import json
+import os
+import warnings
+
+import numpy as np
+
+from cache_modelos import hash_pesos
+from carga_modelo import disponible
+
+# --- Constantes ---
+DIRECTORIO_KERAS = os.path.join(os.environ.get("KERAS_HOME", os.path.expanduser(os.path.join("~", ".keras"))), "models")
+RUTA_PESOS_MOBILENET_V2 = os.path.join(DIRECTORIO_KERAS, "mobilenet_v2_weights_tf_dim_ordering_tf_kernels_1.0_224.h5")
+RUTA_INDICE_CLASES = os.path.join(DIRECTORIO_KERAS, "imagenet_class_index.json")
+
+# Intérpretes de TFLite, del más liviano al más pesado (TensorFlow entero)
+tflite_available = disponible("tflite_runtime") or disponible("ai_edge_litert") or disponible("tensorflow")
+indice_clases = None # Ver decodificar()
+
+
+def clase_interprete():
+    """Interpreter de tflite_runtime, ai_edge_litert o, si no hay otro, tf.lite."""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+def _clave(ruta_pesos):
+    return hash_pesos(ruta_pesos)[:12] # Memorizado en .sha256: no se relee el .h5 en cada arranque
+
+
+def ruta_tflite(ruta_pesos):
+    """Flatbuffer convertido a partir de estos pesos de Keras."""
+    return f"{os.path.splitext(ruta_pesos)[0]}.tflite.{_clave(ruta_pesos)}.tflite"
+
+
+def convertir_tflite(modelo, ruta):
+    """Convierte el modelo de Keras a TFLite (float32) y lo escribe en 'ruta' sin dejarlo a medias."""
+    import tensorflow as tf
+    flatbuffer = tf.lite.TFLiteConverter.from_keras_model(modelo).convert()
+    temporal = ruta + ".tmp"
+    with open(temporal, "wb") as f:
+        f.write(flatbuffer)
+    os.replace(temporal, ruta)
+    return ruta
+
+
+class ClasificadorTFLite:
+    """Intérprete TFLite con la interfaz de model.predict de Keras: probabilidades = modelo.predict(lote)."""
+
+    def __init__(self, ruta, hilos=None):
+        with warnings.catch_warnings():
+            # tf.lite.Interpreter avisa de que se mudará a ai_edge_litert; sigue funcionando
+            warnings.simplefilter("ignore")
+            self.interprete = clase_interprete()(model_path=ruta, num_threads=hilos or os.cpu_count() or 1)
+        self.ruta = ruta
+        self.interprete.allocate_tensors()
+        entrada = self.interprete.get_input_details()[0]
+        self.indice_entrada, self.forma = entrada["index"], tuple(entrada["shape"])
+        self.indice_salida = self.interprete.get_output_details()[0]["index"]
+
+    def predict(self, lote, verbose=0):
+        lote = np.asarray(lote, dtype=np.float32)
+        if lote.shape != self.forma: # Otro tamaño de lote: se reasignan los tensores una vez
+            self.interprete.resize_tensor_input(self.indice_entrada, lote.shape)
+            self.interprete.allocate_tensors()
+            self.forma = lote.shape
+        self.interprete.set_tensor(self.indice_entrada, lote)
+        self.interprete.invoke()
+        return self.interprete.get_tensor(self.indice_salida).copy() # El búfer se reutiliza en el siguiente invoke
+
+
+def preprocesar_mobilenet(lote):
+    """Lo mismo que preprocess_input de MobileNetV2 en Keras: píxeles de [0, 255] a [-1, 1]."""
+    return np.asarray(lote, dtype=np.float32) / 127.5 - 1.0
+
+
+def decodificar(probabilidades, top=5):
+    """Como decode_predictions de Keras: por imagen, [(class_id, class_name, probabilidad), ...]."""
+    global indice_clases
+    if indice_clases is None:
+        if not os.path.exists(RUTA_INDICE_CLASES): # Keras lo descarga la primera vez
+            from tensorflow.keras.applications.imagenet_utils import decode_predictions
+            return decode_predictions(probabilidades, top=top)
+        with open(RUTA_INDICE_CLASES) as f:
+            indice_clases = json.load(f)
+    resultados = []
+    for fila in np.asarray(probabilidades):
+        mejores = np.argsort(fila)[-top:][::-1]
+        resultados.append([tuple(indice_clases[str(i)]) + (fila[i],) for i in mejores])
+    return resultados
+
+
+def cargar_tflite(construir, ruta_pesos=RUTA_PESOS_MOBILENET_V2, hilos=None, progreso=None):
+    """ClasificadorTFLite desde el .tflite junto a 'ruta_pesos'; si no está (o cambiaron los pesos), convierte.
+
+    construir() devuelve el modelo de Keras (y descarga los pesos si
+    hace falta); solo se llama la primera vez.
+    """
+    progreso = progreso or (lambda mensaje: None)
+    artefacto = ruta_tflite(ruta_pesos) if os.path.exists(ruta_pesos) else None
+    if artefacto and os.path.exists(artefacto):
+        progreso("Cargando modelo TFLite...")
+        return ClasificadorTFLite(artefacto, hilos)
+    modelo = construir() # Puede descargar los pesos la primera vez
+    if not os.path.exists(ruta_pesos):
+        return modelo # Sin archivo de pesos no hay clave para la caché: el modelo de Keras tal cual
+    artefacto = ruta_tflite(ruta_pesos)
+    progreso("Convirtiendo modelo a TFLite (solo la primera vez)...")
+    convertir_tflite(modelo, artefacto)
+    base = glob.escape(os.path.splitext(ruta_pesos)[0])
+    for viejo in glob.glob(base + ".tflite.*.tflite"):
+        if viejo != artefacto:
+            os.remove(viejo) # De pesos anteriores
+    print(f"Modelo TFLite guardado en {artefacto}")
+    return ClasificadorTFLite(artefacto, hilos)
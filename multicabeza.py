@@ -0,0 +1,137 @@
+"""Un solo backbone y varias cabezas: un forward por foto para todas las clasificaciones.
+
+El chequeo perro/gato (ImageNet) y el clasificador de 9 clases (R23.pth)
+eran dos redes completas: dos forwards y dos copias del modelo en RAM.
+Aquí las capas convolucionales se ejecutan una vez y dan los rasgos
+(K, 512) tras el average pooling; cada cabeza es solo una capa final:
+
+    BACKBONE   de qué pesos salen las convoluciones (R23.pth por defecto)
+    CABEZAS    lista de cabezas: "perro_gato" (fc de ImageNet agrupada,
+               ver CabezaPerroGato) o "lineal" (la fc de un .pth)
+
+    motor = MotorMulticabeza()
+    motor.classify(frame)   # {"perro_gato": ("Perro", 0.91), "r23": ("clase3", 0.77)}
+
+Una cabeza es exacta si se entrenó sobre el mismo backbone. La fc de
+ImageNet espera los rasgos de la ResNet34 original: si R23 se ajustó
+con el backbone congelado son los mismos y el resultado es idéntico; si
+no, es una aproximación (se avisa al cargar; benchmark_multicabeza.py
+mide cuánto coinciden con los modelos por separado).
+"""
+import hashlib
+import os
+
+import torch
+import torch.nn as nn
+from torchvision import models
+
+from cache_modelos import hash_pesos, ruta_pesos_hub
+from motor_inferencia import MotorInferencia, CabezaPerroGato, GRUPOS_PERRO_GATO
+
+# --- Constantes ---
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+BACKBONE = {"arquitectura": "resnet34", "pesos": os.path.join(DIRECTORIO, "resnet34", "R23.pth")}
+CABEZAS = [
+    {"nombre": "perro_gato", "tipo": "perro_gato", "pesos": "imagenet"},
+    {"nombre": "r23", "tipo": "lineal", "pesos": os.path.join(DIRECTORIO, "resnet34", "R23.pth"),
+     "etiquetas": [f"clase{i}" for i in range(9)]},
+]
+
+
+def ruta_pesos(pesos, arquitectura):
+    """Archivo de pesos: 'imagenet' son los de torchvision para la arquitectura (se descargan si faltan)."""
+    if pesos != "imagenet":
+        return pesos
+    imagenet = models.get_model_weights(arquitectura).IMAGENET1K_V1
+    ruta = ruta_pesos_hub(imagenet)
+    if not os.path.exists(ruta):
+        torch.hub.load_state_dict_from_url(imagenet.url, progress=False) # Lo deja en 'ruta'
+    return ruta
+
+
+def _separar(estado):
+    """(backbone, fc) de un state_dict de ResNet."""
+    backbone = {k: v for k, v in estado.items() if not k.startswith("fc.")}
+    return backbone, {k[len("fc."):]: v for k, v in estado.items() if k.startswith("fc.")}
+
+
+def _mismo_backbone(a, b):
+    return a.keys() == b.keys() and all(torch.equal(a[k], b[k]) for k in a)
+
+
+class ModeloMulticabeza(nn.Module):
+    """backbone(x) → rasgos (K, 512); devuelve la salida de cada cabeza, en orden."""
+
+    def __init__(self, backbone, cabezas):
+        super().__init__()
+        self.backbone = backbone
+        self.cabezas = nn.ModuleDict(cabezas)
+
+    def forward(self, x):
+        rasgos = self.backbone(x)
+        return tuple(cabeza(rasgos) for cabeza in self.cabezas.values())
+
+
+def construir_multicabeza(backbone=BACKBONE, cabezas=CABEZAS, progreso=None):
+    """ModeloMulticabeza en eval; avisa de las cabezas entrenadas sobre otro backbone."""
+    progreso = progreso or (lambda mensaje: None)
+    arquitectura = backbone["arquitectura"]
+    progreso(f"Cargando backbone {arquitectura}...")
+    red = getattr(models, arquitectura)(weights=None)
+    convoluciones, _ = _separar(torch.load(ruta_pesos(backbone["pesos"], arquitectura), map_location="cpu"))
+    red.fc = nn.Identity() # La salida pasa a ser el vector de rasgos tras el pooling
+    red.load_state_dict(convoluciones)
+
+    modulos = {}
+    for cabeza in cabezas:
+        progreso(f"Cargando cabeza {cabeza['nombre']}...")
+        propio, fc = _separar(torch.load(ruta_pesos(cabeza["pesos"], arquitectura), map_location="cpu"))
+        if not _mismo_backbone(propio, convoluciones):
+            print(f"Aviso: la cabeza '{cabeza['nombre']}' se entrenó sobre otro backbone; "
+                  "su resultado es aproximado (ver benchmark_multicabeza.py).")
+        lineal = nn.Linear(fc["weight"].shape[1], fc["weight"].shape[0])
+        lineal.load_state_dict(fc)
+        modulos[cabeza["nombre"]] = CabezaPerroGato(lineal) if cabeza["tipo"] == "perro_gato" else lineal
+    return ModeloMulticabeza(red, modulos).eval()
+
+
+class MotorMulticabeza(MotorInferencia):
+    """MotorInferencia con un ModeloMulticabeza: classify() da {cabeza: (etiqueta, probabilidad)}.
+
+    La caché de modelos compilados usa los pesos del backbone y una
+    variante con las cabezas y el hash de sus pesos. Backends: "torch" o
+    "torchscript" (el modelo tiene varias salidas; SesionONNX da una).
+    """
+
+    def __init__(self, backbone=BACKBONE, cabezas=CABEZAS, device=None, progreso=None, calentar=True,
+                 int8=False, calibracion=None, backend="torchscript", entrada_cruda=False):
+        if backend not in ("torch", "torchscript"):
+            raise ValueError(f"MotorMulticabeza admite los backends torch y torchscript, no {backend}")
+        arquitectura = backbone["arquitectura"]
+        pesos = ruta_pesos(backbone["pesos"], arquitectura)
+        cabezas = [dict(c, pesos=ruta_pesos(c["pesos"], arquitectura)) for c in cabezas]
+        self.cabezas = [(c["nombre"], GRUPOS_PERRO_GATO if c["tipo"] == "perro_gato" else c["etiquetas"])
+                        for c in cabezas]
+        firma = hashlib.sha256("".join(c["nombre"] + c["tipo"] + hash_pesos(c["pesos"]) for c in cabezas).encode())
+        variante = (f"{'int8' if int8 else 'float32'}-multicabeza-{firma.hexdigest()[:8]}"
+                    + ("-cruda" if entrada_cruda and not int8 else ""))
+        super().__init__(lambda: construir_multicabeza(dict(backbone, pesos=pesos), cabezas, progreso),
+                         device=device, progreso=progreso, calentar=calentar, int8=int8, calibracion=calibracion,
+                         pesos=pesos, backend=backend, variante=variante, entrada_cruda=entrada_cruda)
+
+    def probabilidades(self, imagenes):
+        """{cabeza: softmax (K, C)} con un solo forward del backbone."""
+        with self._lock, torch.inference_mode():
+            salidas = self.modelo(self._entrada(list(imagenes)))
+            return {nombre: torch.nn.functional.softmax(salida, dim=1).cpu().numpy()
+                    for (nombre, _), salida in zip(self.cabezas, salidas)}
+
+    def classify_batch(self, imagenes):
+        """Por imagen, {cabeza: (etiqueta, probabilidad)}."""
+        probabilidades = self.probabilidades(imagenes)
+        resultados = [{} for _ in range(len(next(iter(probabilidades.values()))))]
+        for nombre, etiquetas in self.cabezas:
+            for resultado, fila in zip(resultados, probabilidades[nombre]):
+                indice = int(fila.argmax())
+                resultado[nombre] = (etiquetas[indice], float(fila[indice]))
+        return resultados
@@ -0,0 +1,272 @@
+"""Captura y clasificación en cadena: cada etapa en su hilo, unidas por colas acotadas.
+
+tomar_foto() va en serie: capturar, guardar, mostrar y después clasificar.
+Mientras corre el forward la cámara no captura, y mientras se espera al
+sensor la CPU no hace nada. PipelineCaptura corre cada etapa en su
+propio hilo:
+
+    captura ──cola──▶ preproceso ──cola──▶ inferencia ──cola──▶ resultados
+
+Mientras el frame N está en el forward, el N+1 ya se captura y se prepara
+en otro tensor de entrada. Cada cola tiene 'capacidad' lugares: si una
+etapa se atrasa, la anterior se bloquea al entregar (contrapresión) hasta
+la cámara, que deja pasar frames en vez de acumularlos en memoria.
+
+    anillo = AnilloBuffers(motor.buffers_entrada)
+    pipeline = PipelineCaptura([
+        ("captura", lambda: camara.capturar_array("lores")),   # la fuente no recibe nada
+        ("preproceso", lambda frame: (frame, motor.preparar([frame], anillo.siguiente()))),
+        ("inferencia", lambda par: (par[0], motor.probabilidades_entrada(par[1]))),
+    ])
+    pipeline.iniciar()
+    for frame, probabilidades in pipeline: ...   # o atender_en_tk(root, al_resultado)
+    pipeline.detener()                           # desde Tk: detener_en_tk(root, al_detenido)
+    print(pipeline.resumen())
+
+El tensor de PreprocesadorTensor se sobrescribe en la siguiente llamada,
+así que el preproceso no puede llenar el mismo que está leyendo el
+forward. AnilloBuffers rota entre capacidad + 2 (uno llenándose, los de
+la cola y el del forward): la contrapresión de la cola asegura que nunca
+se reescribe uno en uso.
+
+estadisticas() da el rendimiento (frames/s a la salida) y, por etapa, la
+ocupación (fracción del tiempo dentro de su función), la espera por
+entrada y el bloqueo por la cola de salida llena. La etapa con más
+tiempo por frame es el cuello de botella: su ritmo es el techo del
+pipeline, y 'eficiencia' dice cuánto se le acerca. benchmark_pipeline.py
+--en-cadena lo compara con el flujo en serie.
+"""
+import queue
+import threading
+import time
+
+# --- Constantes ---
+CAPACIDAD = 1           # Lugares por cola: con 1, cada etapa trabaja un frame por delante de la siguiente
+INTERVALO_MS = 20       # Cada cuánto revisa Tk la cola de resultados
+ESPERA_S = 0.05         # Tope de cada espera en una cola (para notar detener())
+FIN = object()          # Marca que recorre las colas cuando la fuente se termina
+
+
+class AnilloBuffers:
+    """capacidad + 2 objetos creados con crear(n) que se entregan por turno (doble buffer del preproceso)."""
+
+    def __init__(self, crear, capacidad=CAPACIDAD):
+        self.buffers = crear(capacidad + 2)
+        self._indice = 0
+
+    def siguiente(self):
+        buffer = self.buffers[self._indice]
+        self._indice = (self._indice + 1) % len(self.buffers)
+        return buffer
+
+
+class Etapa:
+    """Una etapa: su función y dónde pasa el tiempo su hilo (en segundos)."""
+
+    def __init__(self, nombre, funcion):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.frames = 0
+        self.ocupado = 0.0  # Dentro de funcion()
+        self.espera = 0.0   # Esperando un frame de la etapa anterior
+        self.bloqueo = 0.0  # Esperando lugar en la cola siguiente (contrapresión)
+
+
+def estadisticas_etapas(etapas, frames, duracion):
+    """Rendimiento, ocupación por etapa y cuello de botella (también para medir un flujo en serie)."""
+    por_etapa = {}
+    for etapa in etapas:
+        por_frame = etapa.ocupado / etapa.frames if etapa.frames else 0.0
+        por_etapa[etapa.nombre] = {
+            "frames": etapa.frames,
+            "ms_por_frame": por_frame * 1000,
+            "fps_maximo": 1.0 / por_frame if por_frame else float("inf"),
+            "ocupacion": etapa.ocupado / duracion if duracion else 0.0,
+            "espera": etapa.espera / duracion if duracion else 0.0,
+            "bloqueo": etapa.bloqueo / duracion if duracion else 0.0,
+        }
+    cuello = max(por_etapa, key=lambda nombre: por_etapa[nombre]["ms_por_frame"])
+    fps = frames / duracion if duracion else 0.0
+    return {"frames": frames, "duracion_s": duracion, "fps": fps, "etapas": por_etapa,
+            "cuello": cuello, "fps_cuello": por_etapa[cuello]["fps_maximo"],
+            "eficiencia": fps / por_etapa[cuello]["fps_maximo"] if por_etapa[cuello]["ms_por_frame"] else 0.0}
+
+
+class PipelineCaptura:
+    """Etapas [(nombre, funcion)] en hilos propios; la primera es la fuente (sin argumentos).
+
+    Cada etapa recibe lo que devolvió la anterior; lo de la última sale por
+    'resultados'. Con 'frames' la fuente para tras ese número de frames; si
+    no, sigue hasta detener() o hasta que lanza EOFError (ReplayTerminado
+    de un replay sin bucle). Un error en cualquier etapa detiene todo y
+    queda en 'error'.
+    """
+
+    def __init__(self, etapas, capacidad=CAPACIDAD, frames=None):
+        if capacidad < 1:
+            raise ValueError("La capacidad de las colas debe ser al menos 1 (0 sería una cola sin límite)")
+        self.etapas = [Etapa(nombre, funcion) for nombre, funcion in etapas]
+        self.capacidad = capacidad
+        self.frames = frames
+        self._colas = [queue.Queue(maxsize=capacidad) for _ in self.etapas]
+        self.resultados = self._colas[-1]
+        self.error = None
+        self._detenido = threading.Event()
+        self._hilos = []
+        self._inicio = None
+        self._fin = None        # Último resultado, o fin del último hilo si se paró antes
+        self._salidos = 0
+        self._hilos_vivos = 0
+        self._lock = threading.Lock()
+
+    @property
+    def activo(self):
+        return bool(self._hilos) and not self._detenido.is_set() and self._fin is None
+
+    def iniciar(self):
+        if self._hilos:
+            return
+        self._inicio = time.perf_counter()
+        self._hilos_vivos = len(self.etapas)
+        entradas = [None] + self._colas[:-1]
+        for etapa, entrada, salida in zip(self.etapas, entradas, self._colas):
+            hilo = threading.Thread(target=self._correr, args=(etapa, entrada, salida),
+                                    name=f"Pipeline-{etapa.nombre}", daemon=True)
+            hilo.start()
+            self._hilos.append(hilo)
+
+    @property
+    def terminado(self):
+        """True cuando ya no corre ningún hilo de etapa."""
+        return not any(hilo.is_alive() for hilo in self._hilos)
+
+    def parar(self):
+        """Pide a las etapas que terminen (el frame en curso de cada una termina), sin esperarlas."""
+        self._detenido.set()
+
+    def detener(self, timeout=2.0):
+        """parar() y esperar a los hilos (fuera del hilo de Tk: un forward o una captura lenta bloquean)."""
+        self.parar()
+        for hilo in self._hilos:
+            hilo.join(timeout)
+
+    def detener_en_tk(self, root, al_detenido=None, intervalo_ms=INTERVALO_MS):
+        """parar() sin bloquear Tk: revisa los hilos con root.after y llama a al_detenido() cuando terminaron."""
+        self.parar()
+        def revisar():
+            if not self.terminado:
+                root.after(intervalo_ms, revisar)
+            elif al_detenido:
+                al_detenido()
+        revisar()
+
+    def _tomar(self, cola):
+        while not self._detenido.is_set():
+            try:
+                return cola.get(timeout=ESPERA_S)
+            except queue.Empty:
+                pass
+        return FIN
+
+    def _entregar(self, cola, elemento):
+        while not self._detenido.is_set():
+            try:
+                cola.put(elemento, timeout=ESPERA_S)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _correr(self, etapa, entrada, salida):
+        try:
+            self._correr_etapa(etapa, entrada, salida)
+        finally:
+            with self._lock:
+                self._hilos_vivos -= 1
+                if self._hilos_vivos == 0 and self._fin is None:
+                    self._fin = time.perf_counter() # Parado con detener(): cuenta hasta el último frame en curso
+
+    def _correr_etapa(self, etapa, entrada, salida):
+        ultima = salida is self.resultados
+        try:
+            while not self._detenido.is_set():
+                inicio = time.perf_counter()
+                if entrada is None:
+                    if self.frames is not None and etapa.frames >= self.frames:
+                        break
+                    resultado = etapa.funcion()
+                else:
+                    elemento = self._tomar(entrada)
+                    if elemento is FIN:
+                        break
+                    tomado = time.perf_counter()
+                    etapa.espera += tomado - inicio
+                    inicio = tomado
+                    resultado = etapa.funcion(elemento)
+                hecho = time.perf_counter()
+                etapa.ocupado += hecho - inicio
+                etapa.frames += 1
+                if ultima:
+                    self._salidos += 1
+                if not self._entregar(salida, resultado):
+                    break
+                etapa.bloqueo += time.perf_counter() - hecho
+        except EOFError:
+            pass # La fuente se terminó (ReplayTerminado de un replay sin bucle)
+        except Exception as e:
+            self.error = e
+            print(f"Error en la etapa '{etapa.nombre}' del pipeline: {e}")
+            self._detenido.set()
+            return
+        if ultima and self._fin is None:
+            self._fin = time.perf_counter()
+        self._entregar(salida, FIN)
+
+    def __iter__(self):
+        """Resultados en orden hasta que la fuente se termina (sin Tk); relanza el error de una etapa."""
+        while True:
+            elemento = self._tomar(self.resultados)
+            if elemento is FIN:
+                break
+            yield elemento
+        if self.error is not None:
+            raise self.error
+
+    def atender_en_tk(self, root, al_resultado, al_terminar=None, intervalo_ms=INTERVALO_MS):
+        """Entrega cada resultado a al_resultado() desde el bucle de Tk.
+
+        al_terminar(error) se llama una vez si el pipeline termina solo (fin
+        de la fuente o error en una etapa); no tras detener().
+        """
+        def revisar():
+            while True:
+                try:
+                    elemento = self.resultados.get_nowait()
+                except queue.Empty:
+                    break
+                if elemento is FIN:
+                    if al_terminar:
+                        al_terminar(self.error)
+                    return
+                al_resultado(elemento)
+            if self.error is not None:
+                if al_terminar:
+                    al_terminar(self.error)
+            elif not self._detenido.is_set():
+                root.after(intervalo_ms, revisar)
+        root.after(intervalo_ms, revisar)
+
+    def estadisticas(self):
+        """Ver estadisticas_etapas(); la duración va de iniciar() al último resultado (o a ahora)."""
+        if self._inicio is None:
+            return None
+        fin = self._fin if self._fin is not None else time.perf_counter()
+        return estadisticas_etapas(self.etapas, self._salidos, fin - self._inicio)
+
+    def resumen(self):
+        e = self.estadisticas()
+        if e is None:
+            return "Pipeline: sin datos"
+        ocupacion = ", ".join(f"{nombre} {datos['ocupacion']:.0%}" for nombre, datos in e["etapas"].items())
+        return (f"Pipeline: {e['fps']:.2f} frames/s ({e['frames']} frames); ocupación: {ocupacion}; "
+                f"cuello: {e['cuello']} ({e['fps_cuello']:.2f} frames/s, eficiencia {e['eficiencia']:.0%})")
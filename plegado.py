@@ -0,0 +1,119 @@
+"""Prepara el modelo para recibir píxeles crudos: BatchNorm y Normalize plegados en las convoluciones.
+
+Cada inferencia pagaba la normalización de ImageNet (x / 255, - media,
+/ std: una pasada en float sobre toda la imagen) y, en el modelo eager,
+cada BatchNorm como una operación aparte. preparar_entrada_cruda():
+
+    1. fusiona cada Conv2d + BatchNorm2d en una sola Conv2d (torch.fx)
+    2. pliega escala, media y std en los pesos de la primera convolución
+
+y el modelo recibe directamente los píxeles en [0, 255] (float32), que
+PreprocesadorTensor(normalizar=False) deja sin tocar tras el resize.
+
+El relleno con ceros de la primera convolución equivalía a rellenar con
+la media (0 tras normalizar); con la entrada cruda ya no. ConvEntradaCruda
+suma la diferencia, que es constante, solo en las filas y columnas del
+borde de la salida: el resultado es el del modelo original salvo redondeo.
+Al exportar a ONNX se suma el mapa entero (ONNX Runtime es lento con
+las escrituras en cortes y así fusiona mejor).
+"""
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch.fx.experimental.optimization import fuse
+
+from preproceso_tensor import MEDIA_IMAGENET, STD_IMAGENET, TAMANO_ENTRADA
+
+
+class ConvEntradaCruda(nn.Module):
+    """Conv2d que recibe píxeles en [0, 255] con la normalización de ImageNet plegada en los pesos."""
+
+    def __init__(self, conv, media=MEDIA_IMAGENET, std=STD_IMAGENET, escala=255.0, tamano=TAMANO_ENTRADA):
+        super().__init__()
+        media = torch.tensor(media, dtype=torch.float32).view(1, -1, 1, 1)
+        std = torch.tensor(std, dtype=torch.float32).view(1, -1, 1, 1)
+        peso = conv.weight.detach()
+        sesgo = conv.bias.detach() if conv.bias is not None else torch.zeros(peso.shape[0])
+        # conv((x / escala - media) / std) = conv'(x) con W' = W / (escala std) y b' = b - Σ W media / std
+        self.conv = nn.Conv2d(conv.in_channels, conv.out_channels, conv.kernel_size, conv.stride,
+                              conv.padding, conv.dilation, conv.groups, bias=True)
+        with torch.no_grad():
+            self.conv.weight.copy_(peso / (escala * std))
+            self.conv.bias.copy_(sesgo - (peso * media / std).sum(dim=(1, 2, 3)))
+        self.register_buffer("relleno", media * escala) # El píxel crudo que vale 0 tras normalizar
+        self.tamano = tamano
+        self._bordes = {} # (alto, ancho) de la entrada → (mapa, correcciones de cada borde)
+        self._correcciones(tamano, tamano) # Ya calculado al trazar/exportar el modelo
+
+    def _correcciones(self, alto, ancho):
+        """Diferencia entre rellenar con la media o con ceros: solo no nula en los bordes de la salida."""
+        clave = (alto, ancho)
+        if clave not in self._bordes:
+            alto_p, ancho_p = self.conv.padding
+            with torch.no_grad():
+                borde = F.pad(torch.zeros((1, self.conv.in_channels, alto, ancho)),
+                              (ancho_p, ancho_p, alto_p, alto_p))
+                borde += self.relleno
+                borde[:, :, alto_p:alto_p + alto, ancho_p:ancho_p + ancho] = 0
+                correccion = F.conv2d(borde, self.conv.weight, None, self.conv.stride, 0,
+                                      self.conv.dilation, self.conv.groups)
+            filas = torch.nonzero(correccion.abs().sum(dim=(0, 1, 3))).flatten().tolist()
+            columnas = torch.nonzero(correccion.abs().sum(dim=(0, 1, 2))).flatten().tolist()
+            alto_s, ancho_s = correccion.shape[-2:]
+            arriba = sum(1 for f in filas if f < alto_s // 2)
+            abajo = len(filas) - arriba
+            izquierda = sum(1 for c in columnas if c < ancho_s // 2)
+            derecha = len(columnas) - izquierda
+            cortes = [(slice(0, arriba), slice(None)), (slice(alto_s - abajo, alto_s), slice(None)),
+                      (slice(arriba, alto_s - abajo), slice(0, izquierda)),
+                      (slice(arriba, alto_s - abajo), slice(ancho_s - derecha, ancho_s))]
+            self._bordes[clave] = (correccion, [(f, c, correccion[:, :, f, c].clone()) for f, c in cortes
+                                                if correccion[:, :, f, c].numel()])
+        return self._bordes[clave]
+
+    def forward(self, x):
+        salida = self.conv(x)
+        if torch.jit.is_tracing() or torch.onnx.is_in_onnx_export():
+            # Al trazar, x.shape no son enteros: el modelo trazado es para entradas de 'tamano'
+            mapa, bordes = self._correcciones(self.tamano, self.tamano)
+        else:
+            mapa, bordes = self._correcciones(x.shape[-2], x.shape[-1])
+        if torch.onnx.is_in_onnx_export():
+            return salida + mapa
+        for filas, columnas, correccion in bordes:
+            salida[:, :, filas, columnas] += correccion.to(salida.device)
+        return salida
+
+
+def _primera_conv(modulo):
+    """(nombre, Conv2d) de la primera convolución que recibe la imagen."""
+    if isinstance(modulo, torch.fx.GraphModule):
+        for nodo in modulo.graph.nodes:
+            if nodo.op == "call_module" and isinstance(modulo.get_submodule(nodo.target), nn.Conv2d):
+                return nodo.target, modulo.get_submodule(nodo.target)
+    for nombre, hijo in modulo.named_modules():
+        if isinstance(hijo, nn.Conv2d):
+            return nombre, hijo
+    raise ValueError(f"No se encontró ninguna Conv2d en {type(modulo).__name__}")
+
+
+def _reemplazar(modulo, nombre, nuevo):
+    padre, _, hijo = nombre.rpartition(".")
+    setattr(modulo.get_submodule(padre) if padre else modulo, hijo, nuevo)
+
+
+def fusionar_conv_bn(modelo):
+    """Copia del modelo (en eval) con cada Conv2d + BatchNorm2d fusionada; sin fx, el modelo tal cual."""
+    try:
+        return fuse(modelo.eval())
+    except Exception as e: # Control de flujo que torch.fx no puede trazar
+        print(f"No se pudo fusionar Conv+BN con torch.fx ({e}); se pliega solo la normalización.")
+        return modelo.eval()
+
+
+def preparar_entrada_cruda(modelo, media=MEDIA_IMAGENET, std=STD_IMAGENET, escala=255.0):
+    """Modelo que recibe píxeles en [0, 255]: Conv+BN fusionadas y Normalize plegado en la primera Conv2d."""
+    modelo = fusionar_conv_bn(modelo)
+    nombre, conv = _primera_conv(modelo)
+    _reemplazar(modelo, nombre, ConvEntradaCruda(conv, media, std, escala))
+    return modelo
@@ -3,76 +3,61 @@ from tkinter import font
 import os
 from datetime import datetime
 from PIL import Image, ImageTk
-import torch
-from torchvision import models, transforms
+from carga_modelo import CargadorModelo, ClasificacionEnTk, MetricasArranque, importar_diferido # torch se importa en segundo plano
+from trabajo_fondo import EjecutorFondo
 from picamera2 import Picamera2
 
-# Modelo preentrenado
-model = models.resnet18(pretrained=True)
-model.eval()
-
-# Índices de ImageNet
-dog_indices = set(range(151, 269))    # Perros
-cat_indices = set([281, 282, 283, 284, 285])  # Gatos
-
-# Preprocesamiento
-def preprocess_image(image_path):
-    preprocess = transforms.Compose([
-        transforms.Resize(256),
-        transforms.CenterCrop(224),
-        transforms.ToTensor(),
-        transforms.Normalize(mean=[0.485, 0.456, 0.406],
-                             std=[0.229, 0.224, 0.225]),
-    ])
-    img = Image.open(image_path).convert('RGB')
-    return preprocess(img).unsqueeze(0)
-
-# Clasificación
-def classify_image(image_path):
-    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-    input_tensor = preprocess_image(image_path).to(device)
-    model.to(device)
-    with torch.no_grad():
-        outputs = model(input_tensor)
-        _, predicted = torch.max(outputs, 1)
-        idx = predicted.item()
-    if idx in dog_indices:
-        return "Perro"
-    elif idx in cat_indices:
-        return "Gato"
-    else:
-        return "Ni perro ni gato"
+# --- Modelo y Clasificación: motor residente, cargado en segundo plano al arrancar ---
+metricas = MetricasArranque() # Tiempo hasta la primera ventana y la primera clasificación
+
+def etiqueta_con_probabilidad(motor, ruta):
+    etiqueta, probabilidad = motor.classify_con_probabilidad(ruta)
+    return f"{etiqueta} ({probabilidad:.0%})"
+
+cargador_modelo = CargadorModelo(importar_diferido("motor_inferencia", "motor_compartido")) # Avisa en status_label vía ClasificacionEnTk
+
+ejecutor = EjecutorFondo() # El forward corre en un hilo de trabajo, no en el de Tk (ver trabajo_fondo.py)
 
 # Función para capturar imagen y clasificar
 def tomar_y_clasificar():
     status_label.config(text="Capturando imagen...")
-    root.update_idletasks()
+    boton.config(state=tk.DISABLED) # Evitar pedir otra foto mientras llega esta
 
     save_dir = "fotos"
     os.makedirs(save_dir, exist_ok=True)
     nombre = f"captura_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
     ruta = os.path.join(save_dir, nombre)
 
-    # Captura con picamera2
+    # Cámara y miniatura en el hilo de trabajo: la ventana no se congela mientras tanto
+    ejecutor.enviar(lambda tarea: capturar(ruta),
+                    al_terminar=lambda img, error: foto_capturada(ruta, img, error))
+
+def capturar(ruta):
+    """Captura con picamera2 y arma la miniatura (en el hilo de trabajo)."""
     try:
         picam = Picamera2()
         picam.start()
         picam.capture_file(ruta)
         picam.stop()
     except Exception as e:
-        status_label.config(text=f"Error con la cámara: {e}")
+        raise RuntimeError(f"Error con la cámara: {e}") from e
+    img = Image.open(ruta)
+    img.thumbnail((300, 300))
+    return img
+
+def foto_capturada(ruta, img, error):
+    boton.config(state=tk.NORMAL)
+    if error:
+        status_label.config(text=str(error))
         return
 
     # Mostrar imagen
-    img = Image.open(ruta)
-    img.thumbnail((300, 300))
     tk_img = ImageTk.PhotoImage(img)
     img_label.config(image=tk_img)
     img_label.image = tk_img
 
     # Clasificar
-    resultado = classify_image(ruta)
-    status_label.config(text=f"Resultado: {resultado}")
+    clasificacion.clasificar(ruta, lambda resultado: status_label.config(text=f"Resultado: {resultado}"))
 
 # --- Interfaz con Tkinter ---
 root = tk.Tk()
@@ -91,4 +76,10 @@ boton.pack(pady=20)
 status_label = tk.Label(root, text="Esperando acción...", font=font.Font(size=12))
 status_label.pack(pady=10)
 
+# --- Modelo: carga en segundo plano, con la ventana ya visible ---
+clasificacion = ClasificacionEnTk(cargador_modelo, ejecutor, etiqueta_con_probabilidad, status_label, metricas)
+metricas.marcar_ventana(root)
+cargador_modelo.iniciar(root)
+ejecutor.iniciar(root)
+
 root.mainloop()
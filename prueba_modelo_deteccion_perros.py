@@ -10,82 +10,109 @@ import numpy as np # Para manipulación numérica (requerido por TF)
 # --- Pillow (PIL) ---
 try:
     from PIL import Image, ImageTk
+    from captura_memoria import array_a_imagen, GuardadorJPEG
+    from decodificacion_jpeg import abrir_reducida
+    from miniaturas import CachePiramides, miniatura
     pillow_available = True
 except ImportError:
     print("Error: Pillow o ImageTk no encontrado.")
     print("Por favor, instala con: sudo apt update && sudo apt install python3-pil python3-pil.imagetk")
     pillow_available = False
 
-# --- TensorFlow / Keras ---
-try:
-    import tensorflow as tf
-    # Específicamente las partes que usaremos
-    from tensorflow.keras.applications.mobilenet_v2 import MobileNetV2, preprocess_input, decode_predictions
-    from tensorflow.keras.preprocessing import image as keras_image # Renombrar para evitar conflicto con PIL.Image
-    tf_available = True
-    print(f"TensorFlow version: {tf.__version__}")
-except ImportError:
+# --- TensorFlow / Keras (import diferido: segundos en una Pi, se hace en el hilo de carga) ---
+from carga_modelo import CargadorModelo, MetricasArranque, disponible
+from trabajo_fondo import Cancelada, EjecutorFondo, MonitorBucleTk
+from motor_tflite import cargar_tflite, preprocesar_mobilenet, decodificar, tflite_available, RUTA_PESOS_MOBILENET_V2
+tf = MobileNetV2 = preprocess_input = decode_predictions = None # Ver importar_tensorflow()
+# Ojo: MODO_TFLITE = True cambia la ruta de inferencia por defecto de este script (antes siempre
+# model.predict de Keras): el primer arranque convierte el modelo y los siguientes usan el .tflite.
+# Con False se vuelve al model.predict de Keras de siempre.
+MODO_TFLITE = True  # MobileNetV2 convertida a TFLite (intérprete con XNNPACK) en vez de model.predict de Keras
+HILOS_TFLITE = None # Hilos del intérprete TFLite (None: todos los núcleos)
+# Solo comprueba que está instalado, sin importarlo; con el .tflite ya convertido basta tflite_runtime
+tf_available = disponible("tensorflow") or (MODO_TFLITE and tflite_available)
+if not tf_available:
     print("--------------------------------------------------")
     print("Error: TensorFlow no encontrado.")
     print("Instálalo con: pip install tensorflow")
     print("Puede requerir dependencias del sistema en Raspberry Pi.")
     print("La clasificación de imágenes estará deshabilitada.")
     print("--------------------------------------------------")
-    tf_available = False
-except Exception as e:
-    print(f"Error al importar TensorFlow: {e}")
-    tf_available = False
 
+def importar_tensorflow():
+    """Importa TensorFlow y las partes de Keras que usamos (desde el hilo de carga del modelo)."""
+    global tf, MobileNetV2, preprocess_input, decode_predictions
+    import tensorflow as tf
+    # Específicamente las partes que usaremos
+    from tensorflow.keras.applications.mobilenet_v2 import MobileNetV2, preprocess_input, decode_predictions
+    print(f"TensorFlow version: {tf.__version__}")
 
-# --- Picamera2 ---
-try:
-    from picamera2 import Picamera2
-    picamera2_available = True
-except ImportError:
-    print("Error: picamera2 no disponible.")
-    picamera2_available = False
-except Exception as e:
-    print(f"Error al inicializar la cámara: {e}")
-    picamera2_available = False
+
+# --- Picamera2 (sesión persistente) ---
+from camara_sesion import SesionCamara, picamera2_available, aviso_picamera2
+if not picamera2_available: aviso_picamera2() # Esta app solo funciona con Picamera2
 
 # --- Variables Globales ---
 last_photo_path = None
 model = None # Variable global para el modelo cargado
 
+# --- Constantes ---
+MODO_EN_MEMORIA = True # Frame (capture_array) directo a IA y pantalla, sin ida y vuelta por JPEG
+GUARDAR_JPEG = True    # En modo memoria: guardar además el JPEG en segundo plano
+
 # --- Funciones ---
 
-def cargar_modelo():
-    """Carga el modelo MobileNetV2 pre-entrenado."""
+def cargar_modelo(progreso=lambda mensaje: None):
+    """Carga el modelo MobileNetV2 pre-entrenado (en el hilo de CargadorModelo, sin tocar Tk)."""
     global model
     if not tf_available:
-        print("TensorFlow no disponible, no se puede cargar el modelo.")
-        return False
+        raise RuntimeError("TensorFlow no disponible, no se puede cargar el modelo.")
+    if model is None and MODO_TFLITE:
+        model = cargar_modelo_tflite(progreso)
     if model is None: # Cargar solo si no está cargado ya
-        try:
-            print("Cargando modelo MobileNetV2 (puede tardar la primera vez)...")
-            # input_shape=(224, 224, 3) es el tamaño estándar para MobileNetV2
-            model = MobileNetV2(weights='imagenet', input_shape=(224, 224, 3))
-            print("Modelo MobileNetV2 cargado exitosamente.")
-            # Hacer una predicción dummy para "calentar" el modelo si es necesario
-            # dummy_img = np.zeros((1, 224, 224, 3))
-            # model.predict(dummy_img)
-            # print("Modelo 'calentado'.")
-            return True
-        except Exception as e:
-            print(f"Error crítico al cargar el modelo MobileNetV2: {e}")
-            actualizar_estado(f"Error al cargar modelo IA: {e}", error=True, append=True)
-            model = None # Asegurar que quede como None si falla
-            return False
-    return True # Ya estaba cargado
-
-def preprocesar_imagen_tf(img_path):
-    """Carga y preprocesa la imagen para MobileNetV2."""
+        progreso("Importando TensorFlow...")
+        importar_tensorflow()
+        progreso("Cargando modelo MobileNetV2 (puede tardar la primera vez)...")
+        print("Cargando modelo MobileNetV2 (puede tardar la primera vez)...")
+        # input_shape=(224, 224, 3) es el tamaño estándar para MobileNetV2
+        modelo = MobileNetV2(weights='imagenet', input_shape=(224, 224, 3))
+        # Predicción dummy para "calentar" el modelo: fuera del hilo de Tk ya no congela la ventana
+        progreso("Preparando modelo IA...")
+        modelo.predict(np.zeros((1, 224, 224, 3)), verbose=0)
+        model = modelo # Solo se publica ya cargado y calentado
+        print("Modelo MobileNetV2 cargado exitosamente.")
+    return model
+
+def cargar_modelo_tflite(progreso):
+    """MobileNetV2 en el intérprete TFLite; TensorFlow solo se importa la primera vez, para convertirla."""
+    global preprocess_input, decode_predictions
+    def construir():
+        progreso("Importando TensorFlow (para convertir el modelo)...")
+        importar_tensorflow()
+        progreso("Cargando modelo MobileNetV2 (puede tardar la primera vez)...")
+        return MobileNetV2(weights='imagenet', input_shape=(224, 224, 3))
+    modelo = cargar_tflite(construir, RUTA_PESOS_MOBILENET_V2, HILOS_TFLITE, progreso)
+    # Equivalentes a los de Keras, sin importar TensorFlow
+    preprocess_input, decode_predictions = preprocesar_mobilenet, decodificar
+    progreso("Preparando modelo IA...")
+    modelo.predict(np.zeros((1, 224, 224, 3), dtype=np.float32), verbose=0) # Reserva los búferes del intérprete
+    print("Modelo MobileNetV2 (TFLite) cargado exitosamente.")
+    return modelo
+
+def preprocesar_imagen_tf(imagen):
+    """Preprocesa la imagen (ruta, imagen PIL o array NumPy) para MobileNetV2."""
     if not tf_available or not pillow_available: return None
     try:
         # Cargar imagen y asegurar tamaño 224x224
-        img = keras_image.load_img(img_path, target_size=(224, 224))
-        # Convertir a array numpy
-        img_array = keras_image.img_to_array(img)
+        # Igual que keras load_img(target_size=...): RGB y redimensionado nearest (sin depender de Keras)
+        if isinstance(imagen, str):
+            # JPEG decodificado ya reducido (1/2, 1/4, 1/8) sin bajar de 224 en ningún eje
+            img = abrir_reducida(imagen, tamano=(224, 224)).convert('RGB').resize((224, 224), Image.Resampling.NEAREST)
+        else:
+            # Ya en memoria: mismo redimensionado, sin leer disco
+            img = array_a_imagen(imagen).resize((224, 224), Image.Resampling.NEAREST)
+        # Convertir a array numpy (float32, como img_to_array)
+        img_array = np.asarray(img, dtype=np.float32)
         # Expandir dimensiones para que sea (1, 224, 224, 3) -> un batch de 1 imagen
         img_array_expanded = np.expand_dims(img_array, axis=0)
         # Aplicar preprocesamiento específico de MobileNetV2 (normaliza píxeles)
@@ -94,12 +121,12 @@ def preprocesar_imagen_tf(img_path):
         print(f"Error al preprocesar imagen para TF: {e}")
         return None
 
-def clasificar_imagen(img_path):
-    """Clasifica la imagen usando el modelo cargado y busca perros/gatos."""
+def clasificar_imagen(imagen):
+    """Clasifica la imagen (ruta, PIL o array) con el modelo cargado y busca perros/gatos."""
     if model is None or not tf_available:
         return "Modelo IA no cargado."
 
-    processed_img = preprocesar_imagen_tf(img_path)
+    processed_img = preprocesar_imagen_tf(imagen)
     if processed_img is None:
         return "Error al preprocesar imagen para IA."
 
@@ -142,8 +169,11 @@ def clasificar_imagen(img_path):
 
 
 def tomar_foto():
-    """Captura, guarda, muestra, CLASIFICA y deshabilita botón."""
-    global last_photo_path
+    """Pide la foto y su clasificación al hilo de trabajo y deshabilita el botón.
+
+    La ventana sigue respondiendo mientras tanto; Limpiar o Escape cancelan
+    lo que esté en curso.
+    """
     if not picamera2_available:
         actualizar_estado("Error: picamera2 no disponible.", error=True)
         return
@@ -151,74 +181,132 @@ def tomar_foto():
         actualizar_estado("Error: Pillow no disponible.", error=True)
         return
 
-    # Asegurarse que el modelo esté cargado antes de intentar tomar foto para clasificar
-    if not cargar_modelo() and tf_available: # Solo fallar si TF debía estar disponible
+    # El modelo se carga en segundo plano; si aún no está, la clasificación queda en cola
+    if tf_available and cargador_modelo.error is not None:
         actualizar_estado("Fallo al cargar modelo IA. No se puede clasificar.", error=True)
-        # Decidir si permitir tomar foto sin clasificar o no
-        # return # Descomentar para impedir tomar foto si el modelo no carga
 
-    clear_button.config(state=tk.DISABLED)
     take_photo_button.config(state=tk.DISABLED) # Deshabilitar mientras procesa
-    actualizar_estado("Iniciando cámara...", info=True)
-    root.update_idletasks()
-    picam2 = None
-    success = False
-    clasificacion_result = "(Clasificación no disponible)"
-
-    try:
-        picam2 = Picamera2()
-        save_dir = "fotos_capturadas"
-        if not os.path.exists(save_dir): os.makedirs(save_dir)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        nombre_archivo = f"foto_{timestamp}.jpg"
-        ruta_completa = os.path.join(save_dir, nombre_archivo)
-
-        config = picam2.create_still_configuration(main={"size": (1920, 1080)}, lores={"size": (640, 480)}, display="lores")
-        picam2.configure(config)
-        picam2.start()
-
-        actualizar_estado("Ajustando...", info=True); root.update_idletasks(); time.sleep(1.5) # Menos tiempo
-        actualizar_estado(f"Capturando: {nombre_archivo}...", info=True); root.update_idletasks()
 
-        metadata = picam2.capture_file(ruta_completa)
+    save_dir = "fotos_capturadas"
+    if not os.path.exists(save_dir): os.makedirs(save_dir)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    nombre_archivo = f"foto_{timestamp}.jpg"
+    ruta_completa = os.path.join(save_dir, nombre_archivo)
+
+    # Cámara ya abierta y ajustada (sesión persistente)
+    actualizar_estado(f"Capturando: {nombre_archivo}...", info=True)
+    ejecutor.enviar(lambda tarea: capturar_y_clasificar(tarea, ruta_completa),
+                    al_terminar=lambda resultado, error: foto_terminada(ruta_completa, resultado, error),
+                    al_progresar=foto_capturada)
+
+
+def capturar_y_clasificar(tarea, ruta_completa):
+    """Captura, guarda y clasifica (en el hilo de trabajo); la foto va a la ventana con tarea.progreso().
+
+    Devuelve (resultado, None), o (None, lo que hay que clasificar) si el
+    modelo aún se está cargando.
+    """
+    if MODO_EN_MEMORIA:
+        # IA y pantalla usan el lores (ya escalado por el ISP); el main 1080p solo para archivar
+        if GUARDAR_JPEG:
+            frame_main, frame_lores = sesion_camara.capturar_arrays(("main", "lores"))
+            tarea.comprobar() # Cancelada: que no quede un JPEG sin mostrar
+            guardador_jpeg.guardar(frame_main, ruta_completa) # Codificar y escribir en segundo plano
+            ruta_guardada = ruta_completa
+        else:
+            frame_lores = sesion_camara.capturar_array("lores")
+            ruta_guardada = None
+        imagen = array_a_imagen(frame_lores)
+    else:
+        metadata = sesion_camara.capturar_archivo(ruta_completa)
         print("Metadatos:", metadata)
+        piramides.obtener(ruta_completa) # Decodificada aquí: mostrar_imagen la toma de la caché
+        imagen = ruta_guardada = ruta_completa
+
+    # --- Mostrar (en el hilo de Tk) y Clasificar ---
+    tarea.progreso((imagen, ruta_guardada)) # → foto_capturada()
+
+    if tf_available and cargador_modelo.error is None and not cargador_modelo.listo:
+         return None, imagen # Modelo aún cargando: foto_terminada() la deja en cola
+    elif tf_available and model:
+         clasificacion_result = clasificar_imagen(imagen)
+         print(f"Resultado clasificación: {clasificacion_result}")
+         return clasificacion_result, None
+    elif not tf_available:
+         return "(TensorFlow no instalado)", None
+    else: # TF disponible pero modelo no cargó
+         return "(Modelo IA no cargado)", None
+
+
+def foto_capturada(foto):
+    """Muestra la foto recién capturada mientras se clasifica (hilo de Tk)."""
+    global last_photo_path
+    imagen, last_photo_path = foto
+    mostrar_imagen(imagen) # Mostrar primero
+    actualizar_estado(f"Foto capturada.\nClasificando...", info=True)
 
-        # --- Mostrar y Clasificar ---
-        last_photo_path = ruta_completa
-        mostrar_imagen(ruta_completa) # Mostrar primero
-
-        actualizar_estado(f"Foto guardada.\nClasificando...", info=True)
-        root.update_idletasks() # Mostrar mensaje antes de clasificar
-
-        if tf_available and model:
-             clasificacion_result = clasificar_imagen(ruta_completa)
-             print(f"Resultado clasificación: {clasificacion_result}")
-        elif not tf_available:
-             clasificacion_result = "(TensorFlow no instalado)"
-        else: # TF disponible pero modelo no cargó
-             clasificacion_result = "(Modelo IA no cargado)"
-
-        # Actualizar estado final con resultado de clasificación
-        actualizar_estado(f"Previsualización mostrada.\n{clasificacion_result}", success=True)
-
-        # Deshabilitar botón permanentemente hasta limpiar
-        # take_photo_button.config(state=tk.DISABLED) # Ya está deshabilitado desde el inicio de la función
-        success = True
 
-    except Exception as e:
-        mensaje_error = f"Error en toma/clasificación: {e}"; print(mensaje_error)
+def foto_terminada(ruta_completa, resultado, error):
+    """Resultado de capturar_y_clasificar() (hilo de Tk)."""
+    if isinstance(error, Cancelada):
+        if ruta_completa != last_photo_path: descartar_foto(ruta_completa) # Guardada pero nunca mostrada
+        actualizar_estado("Foto cancelada.", info=True, append=True)
+        take_photo_button.config(state=tk.NORMAL if picamera2_available and pillow_available else tk.DISABLED)
+        return
+    if error:
+        mensaje_error = f"Error en toma/clasificación: {error}"; print(mensaje_error)
         actualizar_estado(mensaje_error, error=True)
         limpiar_imagen()
         # Habilitar botón foto solo si el error no fue fatal (permite reintentar)
         take_photo_button.config(state=tk.NORMAL if picamera2_available and pillow_available else tk.DISABLED)
+        return
+
+    clasificacion_result, imagen_cola = resultado
+    if clasificacion_result is None:
+         # Modelo aún cargando: clasificar esta foto en cuanto esté listo
+         if cargador_modelo.cuando_listo(lambda modelo: clasificar_en_cola(imagen_cola)):
+              clasificacion_result = "Clasificando..." # El modelo terminó de cargar justo ahora
+         elif cargador_modelo.error is None:
+              clasificacion_result = "(Esperando al modelo IA...)"
+         else:
+              clasificacion_result = "(Modelo IA no cargado)"
+    elif tf_available and model:
+         metricas.marcar("primera_clasificacion")
+
+    # Actualizar estado final con resultado de clasificación
+    # El botón Tomar Foto queda deshabilitado hasta limpiar
+    actualizar_estado(f"Previsualización mostrada.\n{clasificacion_result}", success=True)
+
+
+def clasificar_en_cola(imagen):
+    """Clasifica una foto tomada mientras el modelo cargaba (llamado por CargadorModelo)."""
+    if getattr(image_label, "image", None) is None: return # Se limpió antes de que terminara la carga
+    ejecutor.enviar(lambda tarea: clasificar_imagen(imagen), al_terminar=clasificacion_en_cola_terminada)
+
+
+def clasificacion_en_cola_terminada(clasificacion_result, error):
+    if isinstance(error, Cancelada) or getattr(image_label, "image", None) is None: return
+    if error:
+        actualizar_estado(f"Error durante la clasificación IA: {error}", error=True)
+        return
+    print(f"Resultado clasificación: {clasificacion_result}")
+    metricas.marcar("primera_clasificacion")
+    actualizar_estado(f"Previsualización mostrada.\n{clasificacion_result}", success=True)
+
+
+def descartar_foto(ruta):
+    """Borra el JPEG de una foto cancelada antes de mostrarse (si llegó a guardarse)."""
+    if pillow_available: guardador_jpeg.esperar()
+    if os.path.exists(ruta):
+        os.remove(ruta); print(f"Descartada: {ruta}")
+        piramides.borrar(ruta)
 
-    finally:
-        if picam2 and picam2.started:
-            picam2.stop(); picam2.close(); print("Cámara detenida.")
-            # No añadir mensaje extra si ya hay resultado o error
-        # Reactivar Limpiar siempre
-        clear_button.config(state=tk.NORMAL)
-        # El botón Tomar Foto queda deshabilitado si success=True
+
+def cancelar_foto(event=None):
+    """Cancela la captura o clasificación en curso (tecla Escape)."""
+    if ejecutor.ocupado:
+        ejecutor.cancelar_todo()
+        actualizar_estado("Cancelando...", info=True, append=True)
 
 
 # --- Funciones mostrar_imagen, limpiar_campos, limpiar_imagen, actualizar_estado (sin cambios lógicos internos, solo asegurar que se llamen correctamente) ---
@@ -227,29 +315,16 @@ def mostrar_imagen(ruta_imagen):
     """Carga, redimensiona (maximizando sin distorsión) y muestra la imagen."""
     if not pillow_available: return
     try:
-        img = Image.open(ruta_imagen)
-        img_width, img_height = img.size
         image_label.update_idletasks()
         label_width = image_label.winfo_width()
         label_height = image_label.winfo_height()
         if label_width <= 1 or label_height <= 1: label_width, label_height = 600, 450
-
-        img_aspect = img_width / float(img_height)
-        label_aspect = label_width / float(label_height)
         target_width = label_width - 10
         target_height = label_height - 10
 
-        if img_aspect > label_aspect:
-            new_width = int(target_width)
-            new_height = int(new_width / img_aspect)
-        else:
-            new_height = int(target_height)
-            new_width = int(new_height * img_aspect)
-
-        if new_width <= 0 : new_width = 1
-        if new_height <= 0 : new_height = 1
-
-        resized_img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        # Frame en memoria tal cual; una ruta, desde su pirámide en caché (1/2, 1/4, 1/8 de la foto)
+        niveles = [ruta_imagen] if isinstance(ruta_imagen, Image.Image) else piramides.obtener(ruta_imagen)
+        resized_img = miniatura(niveles, (target_width, target_height), ampliar=True)
         photo = ImageTk.PhotoImage(resized_img)
         image_label.configure(image=photo, text="")
         image_label.image = photo
@@ -266,7 +341,9 @@ def mostrar_imagen(ruta_imagen):
 def limpiar_campos():
     """Limpia campos, borra archivo y REHABILITA botón 'Foto'."""
     global last_photo_path
+    ejecutor.cancelar_todo() # La foto o clasificación en curso ya no llega a la ventana
     path_to_delete = last_photo_path # Guardar antes de preguntar/resetear
+    if pillow_available: guardador_jpeg.esperar() # Que el JPEG pendiente esté en disco antes de borrarlo
     confirm = True # Asumir sí por defecto si no hay nada crítico que borrar
 
     # Solo preguntar si hay una foto registrada para borrar
@@ -290,6 +367,7 @@ def limpiar_campos():
         if os.path.exists(path_to_delete):
             try:
                 os.remove(path_to_delete); print(f"Eliminado: {path_to_delete}")
+                piramides.borrar(path_to_delete) # Sus miniaturas, en memoria y en disco
                 deleted_msg = f"\nArchivo '{os.path.basename(path_to_delete)}' eliminado."
                 last_photo_path = None
             except Exception as e:
@@ -400,10 +478,31 @@ if not tf_available: error_message += "Advertencia: TensorFlow no disponible. No
 if error_message:
     actualizar_estado(error_message + ("Funcionalidad limitada." if can_operate else "Componentes críticos faltan."), error=not can_operate, info=can_operate and "Advertencia" in error_message)
 
-# Intentar cargar el modelo después de crear la GUI (puede tardar)
+# Cargar el modelo en un hilo (puede tardar): la ventana aparece y responde mientras tanto
+metricas = MetricasArranque() # Tiempo hasta la primera ventana y la primera clasificación
+metricas.marcar_ventana(root)
+
+def progreso_modelo(mensaje):
+    if cargador_modelo.pendientes == 0: # Con una foto en cola el estado ya dice "Esperando..."
+        actualizar_estado(mensaje, append=True, info=True)
+
+def modelo_cargado(modelo, error):
+    if error:
+        actualizar_estado(f"Error al cargar modelo IA: {error}", error=True, append=True)
+    elif cargador_modelo.pendientes == 0:
+        actualizar_estado("Modelo IA listo.", append=True, success=True)
+
+cargador_modelo = CargadorModelo(cargar_modelo, al_progresar=progreso_modelo, al_terminar=modelo_cargado)
+
+# Cámara, archivo y modelo en un hilo de trabajo: la ventana responde mientras tanto (ver trabajo_fondo.py)
+ejecutor = EjecutorFondo(root)
+ejecutor.iniciar()
+monitor_bucle = MonitorBucleTk(root) # Latencia del bucle de Tk; se imprime al cerrar
+monitor_bucle.iniciar()
+root.bind("<Escape>", cancelar_foto)
+
 if tf_available:
-     # Ejecutar carga después de que la ventana principal esté lista
-     root.after(100, cargar_modelo) # 100ms de espera
+     cargador_modelo.iniciar(root)
      if not error_message: # Si no hubo otros errores, poner mensaje inicial
          actualizar_estado(initial_message + "\nCargando modelo IA...", info=True)
 elif not error_message: # No TF, pero otros componentes OK
@@ -418,4 +517,33 @@ else:
      take_photo_button.config(state=tk.NORMAL) # Empezar habilitado si hw ok
 
 
+# --- Sesión de cámara: se abre una vez y se cierra al salir ---
+sesion_camara = SesionCamara()
+piramides = CachePiramides() if pillow_available else None # Miniaturas 1/2, 1/4, 1/8 de las fotos guardadas
+guardador_jpeg = GuardadorJPEG(piramides=piramides) if pillow_available else None # Arma la pirámide al guardar
+
+def iniciar_camara():
+    """Abre la sesión de cámara al arrancar la app, en el hilo de trabajo."""
+    ejecutor.enviar(lambda tarea: sesion_camara.abrir(), al_terminar=camara_abierta)
+
+def camara_abierta(resultado, error):
+    if error is None:
+        actualizar_estado("(Cámara lista)", append=True, info=True)
+    elif not isinstance(error, Cancelada):
+        # No es fatal: la sesión reintenta abrir la cámara en la siguiente captura
+        print(f"No se pudo abrir la cámara al inicio: {error}")
+        actualizar_estado(f"Advertencia: cámara no disponible aún ({error})", append=True, error=True)
+
+def cerrar_app():
+    """Cierra la cámara antes de destruir la ventana."""
+    ejecutor.detener() # Cancela lo pendiente y espera a que suelte la cámara
+    monitor_bucle.detener(); print(monitor_bucle.resumen())
+    sesion_camara.cerrar()
+    if guardador_jpeg: guardador_jpeg.cerrar()
+    root.destroy()
+
+root.protocol("WM_DELETE_WINDOW", cerrar_app)
+if picamera2_available:
+    root.after(100, iniciar_camara)
+
 root.mainloop()
\ No newline at end of file
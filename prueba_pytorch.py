@@ -10,20 +10,20 @@ import numpy as np # Sigue siendo necesario
 # --- Pillow (PIL) ---
 try:
     from PIL import Image, ImageTk
+    from captura_memoria import array_a_imagen, GuardadorJPEG
+    from decodificacion_jpeg import abrir_reducida
+    from miniaturas import CachePiramides, miniatura
     pillow_available = True
 except ImportError:
     print("Error: Pillow o ImageTk no encontrado.")
     pillow_available = False
 
-# --- PyTorch y Torchvision ---
-try:
-    import torch
-    import torchvision.transforms as T
-    import torchvision.models as models
-    pytorch_available = True
-    print(f"PyTorch version: {torch.__version__}")
-    print(f"Torchvision version: {torchvision.__version__}")
-except ImportError:
+# --- PyTorch y Torchvision (import diferido: segundos en una Pi, se hace en el hilo de carga) ---
+from carga_modelo import CargadorModelo, MetricasArranque, disponible
+from trabajo_fondo import Cancelada, EjecutorFondo, MonitorBucleTk
+torch = T = models = PreprocesadorTensor = None # Ver importar_pytorch()
+pytorch_available = disponible("torch", "torchvision") # Solo comprueba que están instalados, sin importarlos
+if not pytorch_available:
     print("--------------------------------------------------")
     print("Error: PyTorch o Torchvision no encontrado.")
     print("La instalación en Raspberry Pi puede ser compleja.")
@@ -31,17 +31,28 @@ except ImportError:
     print("O busca wheels precompilados para ARM.")
     print("La clasificación de imágenes estará deshabilitada.")
     print("--------------------------------------------------")
-    pytorch_available = False
-except Exception as e:
-    print(f"Error al importar PyTorch/Torchvision: {e}")
-    pytorch_available = False
 
-# --- Picamera2 ---
-try:
-    from picamera2 import Picamera2
-    picamera2_available = True
-except ImportError: print("Error: picamera2 no disponible."); picamera2_available = False
-except Exception as e: print(f"Error inicializando cámara: {e}"); picamera2_available = False
+def importar_pytorch():
+    """Importa PyTorch y Torchvision (desde el hilo de carga del modelo, con la ventana ya visible)."""
+    global torch, T, models, PreprocesadorTensor
+    import torch
+    import torchvision
+    import torchvision.transforms as T
+    import torchvision.models as models
+    from preproceso_tensor import PreprocesadorTensor
+    print(f"PyTorch version: {torch.__version__}")
+    print(f"Torchvision version: {torchvision.__version__}")
+
+# --- Cámara (backend intercambiable: picamera2 | libcamera | raspistill | replay) ---
+# CAMARA_BACKEND=replay CAMARA_REPLAY=carpeta_o_pila.npy permite probar sin cámara
+from backends_captura import crear_backend
+from buffer_zsl import CapturaZSL
+from rafaga import capturar_rafaga, clasificar_lote_torch, agregar
+from pipeline_captura import AnilloBuffers, PipelineCaptura
+BACKEND_CAMARA = os.environ.get("CAMARA_BACKEND", "picamera2")
+opciones_backend = {"origen": os.environ.get("CAMARA_REPLAY", "fotos_capturadas")} if BACKEND_CAMARA == "replay" else {}
+sesion_camara = crear_backend(BACKEND_CAMARA, **opciones_backend) # Se abre una vez al iniciar
+camara_available = sesion_camara.disponible
 
 # --- Variables Globales ---
 last_photo_path = None
@@ -49,37 +60,46 @@ pytorch_model = None # Para el modelo PyTorch cargado
 pytorch_labels = None # Lista de etiquetas de ImageNet
 pytorch_device = None # 'cpu' o 'cuda' (será 'cpu' en RPi)
 pytorch_transforms = None # Transformaciones de preprocesamiento
+pytorch_preprocesador = None # Ruta rápida para arrays: tensor de entrada preasignado y reutilizado
+pipeline_continuo = None # MODO_CONTINUO: PipelineCaptura en marcha (None si está parado)
 
 # --- Constantes ---
 LABELS_PATH = "imagenet_1000_labels.txt" # Mismo archivo de etiquetas
+MODO_EN_MEMORIA = True # Frame (capture_array) directo a IA y pantalla, sin ida y vuelta por JPEG
+GUARDAR_JPEG = True    # En modo memoria: guardar además el JPEG (main 1080p) en segundo plano
+MODO_ZSL = False       # En modo memoria: la cámara transmite a un anillo y el clic toma el frame más cercano
+ZSL_PROFUNDIDAD = 8    # Frames en el anillo (main + lores por frame)
+ZSL_PRESUPUESTO_MB = 64
+ZSL_POLITICA = "cercano" # "cercano" | "anterior" | "posterior"
+RAFAGA_K = 1           # En modo memoria: >1 captura K frames lores y los clasifica en un solo lote
+RAFAGA_AGREGACION = "media" # "media" (softmax promedio) | "votacion" (top-1 más votado)
+MODO_CONTINUO = False  # En modo memoria: "Foto" arranca/para la clasificación continua en cadena (sin ZSL ni ráfaga)
+MODO_INT8 = False      # MobileNetV2 cuantizado a int8, calibrado con fotos_capturadas (ver benchmark_cuantizacion.py)
+BACKEND_INFERENCIA = "torchscript" # "torch" (nn.Module) | "torchscript" (compilado junto a los pesos) | "onnx" (ONNX Runtime)
 
 # --- Funciones ---
 
-def cargar_modelo_pytorch():
-    """Carga el modelo MobileNetV2 de PyTorch y las etiquetas."""
-    global pytorch_model, pytorch_labels, pytorch_device, pytorch_transforms
+def cargar_modelo_pytorch(progreso=lambda mensaje: None):
+    """Importa PyTorch y carga el modelo MobileNetV2 y las etiquetas (en el hilo de CargadorModelo, sin tocar Tk)."""
+    global pytorch_model, pytorch_labels, pytorch_device, pytorch_transforms, pytorch_preprocesador
     if not pytorch_available:
-        print("PyTorch no disponible, no se carga modelo.")
-        return False
+        raise RuntimeError("PyTorch no disponible, no se carga modelo.")
     if pytorch_model is not None: # Ya cargado
-        return True
+        return pytorch_model
 
     if not os.path.exists(LABELS_PATH):
         print(f"Error: Archivo de etiquetas no encontrado en {LABELS_PATH}")
-        actualizar_estado(f"Error: Falta archivo {LABELS_PATH}", error=True, append=True)
-        return False
+        raise FileNotFoundError(f"Falta archivo {LABELS_PATH}")
 
     try:
+        progreso("Importando PyTorch...")
+        importar_pytorch()
         print("Configurando dispositivo PyTorch (CPU)...")
         pytorch_device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        if MODO_INT8 or BACKEND_INFERENCIA != "torch":
+            pytorch_device = torch.device("cpu") # Modelo int8, TorchScript congelado y ONNX Runtime: corren en la CPU
         print(f"Usando dispositivo: {pytorch_device}")
 
-        print("Cargando modelo MobileNetV2 pre-entrenado de Torchvision...")
-        pytorch_model = models.mobilenet_v2(weights=models.MobileNet_V2_Weights.IMAGENET1K_V1) # O _V2
-        pytorch_model.eval() # ¡MUY IMPORTANTE! Poner en modo evaluación
-        pytorch_model.to(pytorch_device) # Mover modelo al dispositivo
-        print("Modelo MobileNetV2 (PyTorch) cargado.")
-
         # Definir transformaciones de preprocesamiento
         # Estas son las transformaciones estándar para modelos ImageNet
         pytorch_transforms = T.Compose([
@@ -89,8 +109,30 @@ def cargar_modelo_pytorch():
             T.Normalize(mean=[0.485, 0.456, 0.406], # Normalizar con medias y std de ImageNet
                           std=[0.229, 0.224, 0.225])
         ])
+        # Misma transformación para frames en memoria, sin imágenes PIL intermedias
+        pytorch_preprocesador = PreprocesadorTensor(lote=max(1, RAFAGA_K))
         print("Transformaciones de PyTorch definidas.")
 
+        def construir():
+            progreso("Cargando modelo MobileNetV2...")
+            print("Cargando modelo MobileNetV2 pre-entrenado de Torchvision...")
+            modelo = models.mobilenet_v2(weights=models.MobileNet_V2_Weights.IMAGENET1K_V1) # O _V2
+            modelo.eval() # ¡MUY IMPORTANTE! Poner en modo evaluación
+            modelo.to(pytorch_device) # Mover modelo al dispositivo
+            print("Modelo MobileNetV2 (PyTorch) cargado.")
+            if MODO_INT8:
+                from cuantizacion import cuantizar, imagenes_calibracion
+                progreso("Cuantizando modelo a int8...")
+                rutas = imagenes_calibracion("fotos_capturadas")
+                modelo = cuantizar(modelo, (pytorch_transforms(Image.open(r).convert('RGB')).unsqueeze(0) for r in rutas))
+                print(f"Modelo cuantizado a int8 ({len(rutas)} imágenes de calibración).")
+            return modelo
+
+        # Arranques siguientes: modelo ya compilado/exportado junto a los pesos descargados por torchvision
+        from cache_modelos import cargar_modelo, ruta_pesos_hub
+        modelo = cargar_modelo(construir, ruta_pesos_hub(models.MobileNet_V2_Weights.IMAGENET1K_V1),
+                               BACKEND_INFERENCIA, "int8" if MODO_INT8 else "float32", progreso=progreso)
+
         # Cargar etiquetas
         print(f"Cargando etiquetas desde {LABELS_PATH}...")
         with open(LABELS_PATH, 'r') as f:
@@ -98,20 +140,21 @@ def cargar_modelo_pytorch():
         # El modelo MobileNetV2 de torchvision produce 1000 clases directamente
         # así que no es necesario quitar 'background' como en algunos TFLite.
         print(f"{len(pytorch_labels)} etiquetas cargadas.")
-        return True
+        pytorch_model = modelo # Se publica al final: tomar_foto() solo lo ve completo
+        return pytorch_model
 
     except Exception as e:
         print(f"Error crítico al cargar modelo/etiquetas PyTorch: {e}")
-        actualizar_estado(f"Error cargando IA (PyTorch): {e}", error=True, append=True)
         pytorch_model = None; pytorch_labels = None
-        return False
+        raise
 
-def preprocesar_imagen_pytorch(img_path):
-    """Carga y preprocesa la imagen para el modelo PyTorch."""
+def preprocesar_imagen_pytorch(imagen):
+    """Preprocesa la imagen (ruta, imagen PIL o array NumPy) para el modelo PyTorch."""
     if not pillow_available or pytorch_transforms is None or pytorch_device is None:
         return None
     try:
-        img = Image.open(img_path).convert('RGB')
+        if isinstance(imagen, str): img = abrir_reducida(imagen, lado_menor=256).convert('RGB') # JPEG decodificado reducido (lado corto >= 256)
+        else: img = array_a_imagen(imagen) # Ya en memoria: sin leer ni decodificar
         # Aplicar transformaciones
         input_tensor = pytorch_transforms(img)
         # Añadir dimensión de batch (B,C,H,W)
@@ -122,29 +165,35 @@ def preprocesar_imagen_pytorch(img_path):
         print(f"Error al preprocesar imagen para PyTorch: {e}")
         return None
 
-def clasificar_imagen_pytorch(img_path):
-    """Clasifica la imagen usando PyTorch y busca perros/gatos."""
+def clasificar_imagen_pytorch(imagen):
+    """Clasifica la imagen (ruta, PIL o array) usando PyTorch y busca perros/gatos.
+
+    Si 'imagen' es una lista (ráfaga), todas van en un solo lote y se
+    agregan sus predicciones según RAFAGA_AGREGACION.
+    """
     if pytorch_model is None or pytorch_labels is None or pytorch_device is None:
         return "Componentes IA (PyTorch) no cargados."
 
-    input_tensor = preprocesar_imagen_pytorch(img_path)
-    if input_tensor is None:
-        return "Error al preprocesar imagen para IA (PyTorch)."
+    imagenes = imagen if isinstance(imagen, list) else [imagen]
+    if pytorch_preprocesador is not None and all(isinstance(img, np.ndarray) for img in imagenes):
+        # Frames de la cámara: directo al tensor de entrada reutilizado (sin PIL ni copias intermedias)
+        input_tensor = pytorch_preprocesador.preparar_lote(imagenes).to(pytorch_device)
+    else:
+        tensores = [preprocesar_imagen_pytorch(img) for img in imagenes]
+        if any(t is None for t in tensores):
+            return "Error al preprocesar imagen para IA (PyTorch)."
+        input_tensor = torch.cat(tensores) # (K, C, H, W): un solo forward para toda la ráfaga
 
     try:
-        with torch.no_grad(): # ¡IMPORTANTE para inferencia!
-            output = pytorch_model(input_tensor)
-
-        # Aplicar Softmax para obtener probabilidades
-        probabilities = torch.nn.functional.softmax(output[0], dim=0)
-
-        # Obtener top 3 predicciones
-        top3_prob, top3_catid = torch.topk(probabilities, 3)
+        # Softmax por frame y agregación (con K=1 es la softmax de la única foto)
+        agregado = agregar(clasificar_lote_torch(pytorch_model, input_tensor), RAFAGA_AGREGACION)
+        probabilities = agregado["probabilidades"]
 
+        # Obtener top 3 predicciones (con votación, solo clases votadas; empates por la softmax media)
         results = []
-        for i in range(top3_prob.size(0)):
-            cat_id = top3_catid[i].item()
-            prob = top3_prob[i].item()
+        for cat_id in agregado["orden"][:3]:
+            cat_id = int(cat_id)
+            prob = float(probabilities[cat_id])
             if 0 <= cat_id < len(pytorch_labels):
                  results.append({'label': pytorch_labels[cat_id], 'score': prob})
             else:
@@ -173,6 +222,10 @@ def clasificar_imagen_pytorch(img_path):
         elif not results:
              resultado_final = "No se obtuvieron resultados válidos de IA (PyTorch)."
 
+        if len(imagenes) > 1:
+             print(f"Ráfaga de {len(imagenes)} ({RAFAGA_AGREGACION}): votos {agregado['votos']}")
+             resultado_final += f"\n[Ráfaga {len(imagenes)}, acuerdo {agregado['acuerdo']:.0%}]"
+
         return resultado_final
 
     except Exception as e:
@@ -180,61 +233,190 @@ def clasificar_imagen_pytorch(img_path):
         return "Error durante la clasificación IA (PyTorch)."
 
 
-def tomar_foto():
-    """Captura, guarda, muestra, CLASIFICA (PyTorch) y deshabilita botón."""
-    global last_photo_path
-    if not picamera2_available: actualizar_estado("Error: picamera2 no disponible.", error=True); return
-    if not pillow_available: actualizar_estado("Error: Pillow no disponible.", error=True); return
+def clasificar_con_tiempo(imagen):
+    """clasificar_imagen_pytorch() con el tiempo de inferencia añadido al resultado."""
+    start_time = time.monotonic()
+    clasificacion_result = clasificar_imagen_pytorch(imagen)
+    end_time = time.monotonic()
+    print(f"Resultado PyTorch: {clasificacion_result}")
+    print(f"Tiempo de Inferencia PyTorch: {end_time - start_time:.3f} segundos")
+    metricas.marcar("primera_clasificacion")
+    return clasificacion_result + f" ({(end_time - start_time):.2f}s)"
 
-    if not pytorch_model and pytorch_available: # Modelo no cargado pero PyTorch sí
-         if not cargar_modelo_pytorch():
-              actualizar_estado("Fallo al cargar modelo PyTorch. No se puede clasificar.", error=True)
+def clasificar_en_cola(imagen):
+    """Clasifica una foto tomada mientras el modelo cargaba (llamado por CargadorModelo)."""
+    if getattr(image_label, "image", None) is None: return # Se limpió antes de que terminara la carga
+    ejecutor.enviar(lambda tarea: clasificar_con_tiempo(imagen), al_terminar=clasificacion_en_cola_terminada)
 
-    clear_button.config(state=tk.DISABLED); take_photo_button.config(state=tk.DISABLED)
-    actualizar_estado("Iniciando cámara...", info=True); root.update_idletasks()
-    picam2 = None; success = False; clasificacion_result = "(Clasificación PyTorch no disp.)"
+def clasificacion_en_cola_terminada(clasificacion_result, error):
+    if isinstance(error, Cancelada) or getattr(image_label, "image", None) is None: return
+    if error: actualizar_estado(f"Error en clasificación PyTorch: {error}", error=True); return
+    actualizar_estado(f"Previsualización mostrada.\n{clasificacion_result}", success=True)
 
-    try:
-        picam2 = Picamera2(); save_dir = "fotos_capturadas"; os.makedirs(save_dir, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S"); nombre_archivo = f"foto_{timestamp}.jpg"
-        ruta_completa = os.path.join(save_dir, nombre_archivo)
-
-        config = picam2.create_still_configuration(main={"size": (1920, 1080)}, lores={"size": (640, 480)}, display="lores")
-        picam2.configure(config); picam2.start()
-
-        actualizar_estado("Ajustando...", info=True); root.update_idletasks(); time.sleep(1.5)
-        actualizar_estado(f"Capturando: {nombre_archivo}...", info=True); root.update_idletasks()
-
-        metadata = picam2.capture_file(ruta_completa); print("Metadatos:", metadata)
-        last_photo_path = ruta_completa; mostrar_imagen(ruta_completa)
-
-        actualizar_estado(f"Foto guardada.\nClasificando con PyTorch...", info=True)
-        root.update_idletasks()
-
-        if pytorch_available and pytorch_model:
-             start_time = time.monotonic()
-             clasificacion_result = clasificar_imagen_pytorch(ruta_completa)
-             end_time = time.monotonic()
-             print(f"Resultado PyTorch: {clasificacion_result}")
-             print(f"Tiempo de Inferencia PyTorch: {end_time - start_time:.3f} segundos")
-             clasificacion_result += f" ({(end_time - start_time):.2f}s)"
-        elif not pytorch_available:
-             clasificacion_result = "(PyTorch no instalado)"
-        else:
-             clasificacion_result = "(Modelo PyTorch no cargado)"
 
-        actualizar_estado(f"Previsualización mostrada.\n{clasificacion_result}", success=True)
-        success = True
+def tomar_foto():
+    """Pide la foto y su clasificación (PyTorch) al hilo de trabajo y deshabilita el botón.
+
+    La ventana sigue respondiendo mientras tanto; Limpiar o Escape cancelan
+    lo que esté en curso.
+    """
+    instante_clic = time.monotonic() # Para ZSL: el frame que se buscará en el anillo
+    if MODO_CONTINUO and MODO_EN_MEMORIA: alternar_continuo(); return
+    if not camara_available: actualizar_estado(f"Error: cámara ({BACKEND_CAMARA}) no disponible.", error=True); return
+    if not pillow_available: actualizar_estado("Error: Pillow no disponible.", error=True); return
 
-    except Exception as e:
-        mensaje_error = f"Error en toma/clasif. PyTorch: {e}"; print(mensaje_error)
-        actualizar_estado(mensaje_error, error=True); limpiar_imagen()
-        take_photo_button.config(state=tk.NORMAL if picamera2_available and pillow_available else tk.DISABLED)
+    if pytorch_available and cargador_modelo.error is not None: # La carga en segundo plano falló
+         actualizar_estado("Fallo al cargar modelo PyTorch. No se puede clasificar.", error=True)
+
+    take_photo_button.config(state=tk.DISABLED)
+    save_dir = "fotos_capturadas"; os.makedirs(save_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S"); nombre_archivo = f"foto_{timestamp}.jpg"
+    ruta_completa = os.path.join(save_dir, nombre_archivo)
+
+    # Cámara ya abierta y ajustada (sesión persistente)
+    actualizar_estado(f"Capturando: {nombre_archivo}...", info=True)
+    ejecutor.enviar(lambda tarea: capturar_y_clasificar(tarea, ruta_completa, instante_clic),
+                    al_terminar=lambda resultado, error: foto_terminada(ruta_completa, resultado, error),
+                    al_progresar=foto_capturada)
+
+def capturar_y_clasificar(tarea, ruta_completa, instante_clic):
+    """Captura, guarda y clasifica (en el hilo de trabajo); la foto va a la ventana con tarea.progreso().
+
+    Devuelve (resultado, None), o (None, lo que hay que clasificar) si el
+    modelo aún se está cargando.
+    """
+    imagen_ia = None # Lo que se clasifica (por defecto la misma imagen que se muestra)
+    ruta_guardada = None
+    if MODO_EN_MEMORIA:
+        # IA y pantalla usan el lores (ya escalado por el ISP); el main 1080p solo para archivar
+        if captura_zsl and captura_zsl.activa:
+            # Sin esperar a la cámara: frame del anillo más cercano al clic
+            resultado_zsl = captura_zsl.foto(instante_clic)
+            frames = dict(zip(captura_zsl.streams, resultado_zsl["frames"]))
+            print(f"ZSL: desfase {resultado_zsl['desfase_ms']:+.1f} ms, espera {resultado_zsl['espera_ms']:.1f} ms")
+        elif GUARDAR_JPEG:
+            frames = dict(zip(("main", "lores"), sesion_camara.capturar_arrays(("main", "lores"))))
+        else:
+            frames = {"lores": sesion_camara.capturar_array("lores")}
+        frame_lores = frames["lores"]
+        tarea.comprobar() # Cancelada: que no quede un JPEG sin mostrar
+        if GUARDAR_JPEG:
+            guardador_jpeg.guardar(frames["main"], ruta_completa); ruta_guardada = ruta_completa
+        imagen = array_a_imagen(frame_lores)
+        imagen_ia = frame_lores # El array va directo al tensor de entrada
+        if RAFAGA_K > 1:
+            # Ráfaga: K-1 frames lores más, clasificados junto al primero en un solo lote
+            imagen_ia = [frame_lores] + capturar_rafaga(sesion_camara, RAFAGA_K - 1)
+    else:
+        sesion_camara.capturar_archivo(ruta_completa)
+        piramides.obtener(ruta_completa) # Decodificada aquí: mostrar_imagen la toma de la caché
+        imagen = ruta_guardada = ruta_completa
+    tarea.progreso((imagen, ruta_guardada)) # → foto_capturada(), en el hilo de Tk
+
+    imagen_ia = imagen if imagen_ia is None else imagen_ia
+    if pytorch_available and not cargador_modelo.listo and cargador_modelo.error is None:
+         return None, imagen_ia
+    elif pytorch_available and pytorch_model:
+         return clasificar_con_tiempo(imagen_ia), None
+    elif not pytorch_available:
+         return "(PyTorch no instalado)", None
+    else:
+         return "(Modelo PyTorch no cargado)", None
 
-    finally:
-        if picam2 and picam2.started: picam2.stop(); picam2.close(); print("Cámara detenida.")
-        clear_button.config(state=tk.NORMAL)
-        # El botón Foto queda deshabilitado si success=True
+def foto_capturada(foto):
+    """Muestra la foto recién capturada mientras se clasifica (hilo de Tk)."""
+    global last_photo_path
+    imagen, last_photo_path = foto
+    mostrar_imagen(imagen)
+    actualizar_estado(f"Foto capturada.\nClasificando con PyTorch...", info=True)
+
+def foto_terminada(ruta_completa, resultado, error):
+    """Resultado de capturar_y_clasificar() (hilo de Tk); el botón Foto queda deshabilitado si salió bien."""
+    if isinstance(error, Cancelada):
+        if ruta_completa != last_photo_path: descartar_foto(ruta_completa) # Guardada pero nunca mostrada
+        actualizar_estado("Foto cancelada.", info=True, append=True)
+        take_photo_button.config(state=tk.NORMAL if camara_available and pillow_available else tk.DISABLED)
+        return
+    if error:
+        mensaje_error = f"Error en toma/clasif. PyTorch: {error}"; print(mensaje_error)
+        actualizar_estado(mensaje_error, error=True); limpiar_imagen()
+        take_photo_button.config(state=tk.NORMAL if camara_available and pillow_available else tk.DISABLED)
+        return
+
+    clasificacion_result, imagen_cola = resultado
+    if clasificacion_result is None:
+         # PyTorch aún importándose: esta foto se clasifica en cuanto el modelo esté listo
+         if cargador_modelo.cuando_listo(lambda modelo: clasificar_en_cola(imagen_cola)):
+              clasificacion_result = "Clasificando con PyTorch..." # El modelo terminó de cargar justo ahora
+         elif cargador_modelo.error is None:
+              clasificacion_result = "(Esperando al modelo PyTorch...)"
+         else:
+              clasificacion_result = "(Modelo PyTorch no cargado)"
+    actualizar_estado(f"Previsualización mostrada.\n{clasificacion_result}", success=True)
+
+def descartar_foto(ruta):
+    """Borra el JPEG de una foto cancelada antes de mostrarse (si llegó a guardarse)."""
+    if pillow_available: guardador_jpeg.esperar()
+    if os.path.exists(ruta):
+        os.remove(ruta); piramides.borrar(ruta); print(f"Descartada: {ruta}")
+
+def cancelar_foto(event=None):
+    """Cancela la captura o clasificación en curso (tecla Escape)."""
+    if ejecutor.ocupado:
+        ejecutor.cancelar_todo(); actualizar_estado("Cancelando...", info=True, append=True)
+
+def alternar_continuo():
+    """MODO_CONTINUO: arranca o para la captura y clasificación en cadena (ver pipeline_captura.py).
+
+    El frame N+1 se captura y se prepara en otro tensor de entrada mientras
+    el N está en el forward; Tk solo muestra lo que sale de la última etapa.
+    """
+    global pipeline_continuo
+    if pipeline_continuo is not None:
+        parar_continuo(); return
+    if not camara_available: actualizar_estado(f"Error: cámara ({BACKEND_CAMARA}) no disponible.", error=True); return
+    if not pillow_available: actualizar_estado("Error: Pillow no disponible.", error=True); return
+    if pytorch_model is None or pytorch_labels is None:
+        actualizar_estado("Modelo PyTorch aún no está listo.", info=True); return
+    anillo = AnilloBuffers(lambda n: [PreprocesadorTensor() for _ in range(n)]) # Doble buffer: ver pipeline_captura.py
+    pipeline_continuo = PipelineCaptura([
+        ("captura", lambda: sesion_camara.capturar_array("lores")),
+        ("preproceso", lambda frame: (frame, anillo.siguiente().preparar(frame).to(pytorch_device))),
+        ("inferencia", lambda par: (par[0], clasificar_lote_torch(pytorch_model, par[1])[0])),
+    ])
+    pipeline_continuo.atender_en_tk(root, frame_continuo, al_terminar=continuo_terminado)
+    pipeline_continuo.iniciar()
+    take_photo_button.config(text="Parar")
+    actualizar_estado("Clasificación continua...", info=True)
+
+def frame_continuo(resultado):
+    """Muestra un frame clasificado del pipeline (hilo de Tk)."""
+    if pipeline_continuo is None: return # Ya se paró
+    frame, probabilidades = resultado
+    mostrar_imagen(array_a_imagen(frame))
+    indice = int(probabilidades.argmax())
+    actualizar_estado(f"Detectado: {pytorch_labels[indice]} ({probabilidades[indice]:.2%})\n"
+                      f"[{pipeline_continuo.estadisticas()['fps']:.1f} frames/s]", success=True)
+    metricas.marcar("primera_clasificacion")
+
+def continuo_terminado(error):
+    """El pipeline se detuvo solo (fin del replay o error en una etapa)."""
+    parar_continuo()
+    if error: actualizar_estado(f"Error en clasificación continua: {error}", error=True, append=True)
+
+def parar_continuo(esperar=False):
+    """Para el pipeline; sin 'esperar', sus hilos terminan solos y Tk no se bloquea (el botón vuelve al terminar)."""
+    global pipeline_continuo
+    if pipeline_continuo is None: return
+    pipeline, pipeline_continuo = pipeline_continuo, None
+    def detenido():
+        print(pipeline.resumen())
+        actualizar_estado(pipeline.resumen(), info=True, append=True)
+        take_photo_button.config(text="Foto", state=tk.NORMAL)
+    if esperar:
+        pipeline.detener(); print(pipeline.resumen()); return # Al cerrar: que suelte la cámara antes de cerrarla
+    take_photo_button.config(state=tk.DISABLED) # Hasta que terminen el forward y la captura en curso
+    pipeline.detener_en_tk(root, detenido)
 
 
 # --- Funciones mostrar_imagen, limpiar_campos, limpiar_imagen, actualizar_estado (sin cambios lógicos) ---
@@ -243,32 +425,32 @@ def tomar_foto():
 def mostrar_imagen(ruta_imagen):
     if not pillow_available: return
     try:
-        img = Image.open(ruta_imagen); img_width, img_height = img.size
         image_label.update_idletasks(); label_width = image_label.winfo_width(); label_height = image_label.winfo_height()
         if label_width <= 1 or label_height <= 1: label_width, label_height = 600, 450
-        img_aspect = img_width / float(img_height); label_aspect = label_width / float(label_height)
-        target_width = label_width - 10; target_height = label_height - 10
-        if img_aspect > label_aspect: new_width = int(target_width); new_height = int(new_width / img_aspect)
-        else: new_height = int(target_height); new_width = int(new_height * img_aspect)
-        if new_width <= 0 : new_width = 1; if new_height <= 0 : new_height = 1
-        resized_img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        # Frame en memoria tal cual; una ruta, desde su pirámide en caché (1/2, 1/4, 1/8 de la foto)
+        niveles = [ruta_imagen] if isinstance(ruta_imagen, Image.Image) else piramides.obtener(ruta_imagen)
+        resized_img = miniatura(niveles, (label_width - 10, label_height - 10), ampliar=True)
         photo = ImageTk.PhotoImage(resized_img)
         image_label.configure(image=photo, text=""); image_label.image = photo
     except FileNotFoundError: print(f"Error: No se encontró: {ruta_imagen}"); actualizar_estado(f"Error: Archivo no encontrado {os.path.basename(ruta_imagen)}", error=True, append=True); limpiar_imagen()
     except Exception as e: print(f"Error al mostrar imagen: {e}"); actualizar_estado(f"Error al mostrar imagen: {e}", error=True, append=True); limpiar_imagen()
 
 def limpiar_campos():
-    global last_photo_path; path_to_delete = last_photo_path; confirm = True
+    global last_photo_path
+    ejecutor.cancelar_todo() # La foto o clasificación en curso ya no llega a la ventana
+    parar_continuo()
+    path_to_delete = last_photo_path; confirm = True
+    if pillow_available: guardador_jpeg.esperar() # Que el JPEG pendiente esté en disco antes de borrarlo
     if path_to_delete and os.path.exists(path_to_delete): confirm = messagebox.askyesno("Confirmar Limpieza", f"¿Limpiar campos y borrar '{os.path.basename(path_to_delete)}' del disco?")
     if not confirm: actualizar_estado("Limpieza cancelada.", info=True); return
     text_area.delete('1.0', tk.END); text_area.insert('1.0', "Listo. Campos limpiados."); text_area.tag_remove(tk.ALL, "1.0", tk.END); text_area.tag_add("info", "1.0", tk.END)
     limpiar_imagen(); deleted_msg = ""
     if path_to_delete:
         if os.path.exists(path_to_delete):
-            try: os.remove(path_to_delete); print(f"Eliminado: {path_to_delete}"); deleted_msg = f"\nArchivo '{os.path.basename(path_to_delete)}' eliminado."; last_photo_path = None
+            try: os.remove(path_to_delete); piramides.borrar(path_to_delete); print(f"Eliminado: {path_to_delete}"); deleted_msg = f"\nArchivo '{os.path.basename(path_to_delete)}' eliminado."; last_photo_path = None
             except Exception as e: print(f"Error al borrar {path_to_delete}: {e}"); deleted_msg = f"\nError al borrar {os.path.basename(path_to_delete)}: {e}"
         else: deleted_msg = f"\nAdvertencia: {os.path.basename(path_to_delete)} ya no existía."; last_photo_path = None
-    take_photo_button.config(state=tk.NORMAL if picamera2_available and pillow_available else tk.DISABLED)
+    take_photo_button.config(state=tk.NORMAL if camara_available and pillow_available else tk.DISABLED)
     if deleted_msg: actualizar_estado(deleted_msg, append=True, info=("Error" not in deleted_msg and "Advertencia" not in deleted_msg), error=("Error" in deleted_msg))
     text_area.see(tk.END)
 
@@ -281,7 +463,9 @@ def actualizar_estado(mensaje, error=False, success=False, info=False, append=Fa
     for tag_name, color in tags.items():
         if tag_name not in text_area.tag_names(): text_area.tag_configure(tag_name, foreground=color)
     tag_to_apply = None
-    if error: tag_to_apply = "error"; elif success: tag_to_apply = "success"; elif info: tag_to_apply = "info"
+    if error: tag_to_apply = "error"
+    elif success: tag_to_apply = "success"
+    elif info: tag_to_apply = "info"
     start_index = "1.0"
     if not append: text_area.delete("1.0", tk.END)
     else:
@@ -313,14 +497,37 @@ clear_button = ttk.Button(right_frame, text="Limpiar", command=limpiar_campos, s
 initial_message = "Listo."
 error_message = ""
 can_operate = True
-if not picamera2_available: error_message += "Error: picamera2 no disponible.\n"; can_operate = False
+if not camara_available: error_message += f"Error: cámara ({BACKEND_CAMARA}) no disponible.\n"; can_operate = False
 if not pillow_available: error_message += "Error: Pillow no disponible.\n"; can_operate = False
 if not pytorch_available: error_message += "Advertencia: PyTorch no disponible. No se clasificará.\n"
 
 if error_message: actualizar_estado(error_message + ("Funcionalidad limitada." if can_operate else "Componentes críticos faltan."), error=not can_operate, info=can_operate and "Advertencia" in error_message)
 
+# PyTorch se importa y el modelo se carga en un hilo: la ventana y la cámara no lo esperan
+metricas = MetricasArranque() # Tiempo hasta la primera ventana y la primera clasificación
+metricas.marcar_ventana(root)
+
+def progreso_modelo(mensaje):
+    if cargador_modelo.pendientes == 0: # Con una foto en cola el estado ya dice "Esperando..."
+        actualizar_estado(mensaje, append=True, info=True)
+
+def modelo_cargado(modelo, error):
+    if error:
+        actualizar_estado(f"Error cargando IA (PyTorch): {error}", error=True, append=True)
+    elif cargador_modelo.pendientes == 0:
+        actualizar_estado("Modelo PyTorch listo.", append=True, success=True)
+
+cargador_modelo = CargadorModelo(cargar_modelo_pytorch, al_progresar=progreso_modelo, al_terminar=modelo_cargado)
+
+# Cámara, archivo y modelo en un hilo de trabajo: la ventana responde mientras tanto (ver trabajo_fondo.py)
+ejecutor = EjecutorFondo(root)
+ejecutor.iniciar()
+monitor_bucle = MonitorBucleTk(root) # Latencia del bucle de Tk; se imprime al cerrar
+monitor_bucle.iniciar()
+root.bind("<Escape>", cancelar_foto)
+
 if pytorch_available:
-     root.after(200, cargar_modelo_pytorch) # Dar un poco más de tiempo para la GUI
+     cargador_modelo.iniciar(root)
      if not error_message: actualizar_estado(initial_message + "\nCargando modelo PyTorch...", info=True)
 elif not error_message:
      actualizar_estado(initial_message, info=True)
@@ -328,4 +535,40 @@ elif not error_message:
 if not can_operate: take_photo_button.config(state=tk.DISABLED)
 else: take_photo_button.config(state=tk.NORMAL)
 
+# --- Sesión de cámara: se abre una vez y se cierra al salir ---
+piramides = CachePiramides() if pillow_available else None # Miniaturas 1/2, 1/4, 1/8 de las fotos guardadas
+guardador_jpeg = GuardadorJPEG(piramides=piramides) if pillow_available else None # Arma la pirámide al guardar
+captura_zsl = CapturaZSL(sesion_camara, streams=("main", "lores") if GUARDAR_JPEG else ("lores",),
+                         profundidad=ZSL_PROFUNDIDAD, presupuesto_mb=ZSL_PRESUPUESTO_MB,
+                         politica=ZSL_POLITICA) if MODO_ZSL and MODO_EN_MEMORIA else None
+
+def iniciar_camara():
+    """Abre la sesión de cámara al arrancar la app (y el anillo ZSL si está activo), en el hilo de trabajo."""
+    def abrir(tarea):
+        sesion_camara.abrir()
+        if captura_zsl: captura_zsl.iniciar()
+    ejecutor.enviar(abrir, al_terminar=camara_abierta)
+
+def camara_abierta(resultado, error):
+    if error is None:
+        actualizar_estado("(Cámara lista)", append=True, info=True)
+    elif not isinstance(error, Cancelada):
+        # No es fatal: la sesión reintenta abrir la cámara en la siguiente captura
+        print(f"No se pudo abrir la cámara al inicio: {error}")
+        actualizar_estado(f"Advertencia: cámara no disponible aún ({error})", append=True, error=True)
+
+def cerrar_app():
+    """Cierra la cámara antes de destruir la ventana."""
+    ejecutor.detener() # Cancela lo pendiente y espera a que suelte la cámara
+    parar_continuo(esperar=True)
+    monitor_bucle.detener(); print(monitor_bucle.resumen())
+    if captura_zsl: captura_zsl.detener()
+    sesion_camara.cerrar()
+    if guardador_jpeg: guardador_jpeg.cerrar()
+    root.destroy()
+
+root.protocol("WM_DELETE_WINDOW", cerrar_app)
+if camara_available:
+    root.after(100, iniciar_camara)
+
 root.mainloop()
\ No newline at end of file
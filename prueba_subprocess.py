@@ -3,62 +3,47 @@ from tkinter import font
 import os
 from datetime import datetime
 from PIL import Image, ImageTk
-import torch
-from torchvision import models, transforms
-import subprocess  # Usaremos libcamera-jpeg desde bash
-
-# Modelo preentrenado
-model = models.resnet18(pretrained=True)
-model.eval()
-
-# Índices de ImageNet
-dog_indices = set(range(151, 269))    # Perros
-cat_indices = set([281, 282, 283, 284, 285])  # Gatos
-
-# Preprocesamiento
-def preprocess_image(image_path):
-    preprocess = transforms.Compose([
-        transforms.Resize(256),
-        transforms.CenterCrop(224),
-        transforms.ToTensor(),
-        transforms.Normalize(mean=[0.485, 0.456, 0.406],
-                             std=[0.229, 0.224, 0.225]),
-    ])
-    img = Image.open(image_path).convert('RGB')
-    return preprocess(img).unsqueeze(0)
-
-# Clasificación
-def classify_image(image_path):
-    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-    input_tensor = preprocess_image(image_path).to(device)
-    model.to(device)
-    with torch.no_grad():
-        outputs = model(input_tensor)
-        _, predicted = torch.max(outputs, 1)
-        idx = predicted.item()
-    if idx in dog_indices:
-        return "Perro"
-    elif idx in cat_indices:
-        return "Gato"
-    else:
-        return "Ni perro ni gato"
+from carga_modelo import CargadorModelo, ClasificacionEnTk, MetricasArranque, importar_diferido # torch se importa en segundo plano
+from trabajo_fondo import EjecutorFondo
+from libcamera_trabajador import TrabajadorLibcamera # Un solo libcamera-still vivo, no uno por foto
+
+# --- Modelo y Clasificación: motor residente, cargado en segundo plano al arrancar ---
+metricas = MetricasArranque() # Tiempo hasta la primera ventana y la primera clasificación
+
+def etiqueta_con_probabilidad(motor, ruta):
+    etiqueta, probabilidad = motor.classify_con_probabilidad(ruta)
+    return f"{etiqueta} ({probabilidad:.0%})"
+
+cargador_modelo = CargadorModelo(importar_diferido("motor_inferencia", "motor_compartido")) # Avisa en status_label vía ClasificacionEnTk
+
+ejecutor = EjecutorFondo() # El forward corre en un hilo de trabajo, no en el de Tk (ver trabajo_fondo.py)
+
+trabajador_camara = TrabajadorLibcamera()
 
 # Función para capturar imagen y clasificar
 def tomar_y_clasificar():
     status_label.config(text="Capturando imagen...")
-    root.update_idletasks()
+    boton.config(state=tk.DISABLED)
 
     save_dir = "fotos"
     os.makedirs(save_dir, exist_ok=True)
     nombre = f"captura_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
     ruta = os.path.join(save_dir, nombre)
 
-    # Captura con libcamera-jpeg usando subprocess
+    # Captura con el libcamera-still persistente (no bloquea la GUI)
     try:
-        subprocess.run(["libcamera-jpeg", "-o", ruta, "-t", "2000"], check=True)
-    except subprocess.CalledProcessError as e:
-        status_label.config(text=f"Error al capturar: {e}")
+        trabajador_camara.solicitar_foto(ruta, al_terminar=foto_capturada)
+    except FileNotFoundError:
+        status_label.config(text="Error: libcamera-still no encontrado.")
+        boton.config(state=tk.NORMAL)
+
+# Continúa cuando la foto está en disco (llamada desde el bucle de Tk)
+def foto_capturada(resultado):
+    boton.config(state=tk.NORMAL)
+    if resultado["error"]:
+        status_label.config(text=f"Error al capturar: {resultado['error']}")
         return
+    ruta = resultado["ruta"]
 
     # Mostrar imagen
     try:
@@ -72,8 +57,7 @@ def tomar_y_clasificar():
         return
 
     # Clasificar
-    resultado = classify_image(ruta)
-    status_label.config(text=f"Resultado: {resultado}")
+    clasificacion.clasificar(ruta, lambda resultado: status_label.config(text=f"Resultado: {resultado}"))
 
 # --- Interfaz con Tkinter ---
 root = tk.Tk()
@@ -92,4 +76,23 @@ boton.pack(pady=20)
 status_label = tk.Label(root, text="Esperando acción...", font=font.Font(size=12))
 status_label.pack(pady=10)
 
+# --- Cámara: un solo libcamera-still vivo durante toda la app ---
+def cerrar_app():
+    ejecutor.detener()
+    trabajador_camara.detener()
+    root.destroy()
+
+try:
+    trabajador_camara.iniciar()
+except FileNotFoundError:
+    print("Error: libcamera-still no encontrado.")
+trabajador_camara.atender_en_tk(root)
+root.protocol("WM_DELETE_WINDOW", cerrar_app)
+
+# --- Modelo: carga en segundo plano, con la ventana ya visible ---
+clasificacion = ClasificacionEnTk(cargador_modelo, ejecutor, etiqueta_con_probabilidad, status_label, metricas)
+metricas.marcar_ventana(root)
+cargador_modelo.iniciar(root)
+ejecutor.iniciar(root)
+
 root.mainloop()
@@ -0,0 +1,68 @@
+"""Modo ráfaga: K frames seguidos, un solo forward por lotes y predicción agregada.
+
+En CPU el coste fijo de cada llamada al modelo (despacho de capas,
+reserva de memoria) se reparte entre las K imágenes del lote, y
+agregar K predicciones da un resultado más estable que una sola foto.
+
+    frames = capturar_rafaga(backend, k=4)             # K arrays lores
+    probabilidades = clasificar_lote_torch(modelo, lote)  # (K, C)
+    resultado = agregar(probabilidades, "media")        # o "votacion"
+
+agregar() trabaja con arrays NumPy, así sirve igual para PyTorch que
+para TensorFlow/Keras.
+"""
+import numpy as np
+
+# --- Constantes ---
+RAFAGA_K = 4
+AGREGACION = "media"
+AGREGACIONES = ("media", "votacion")
+
+
+def capturar_rafaga(backend, k=RAFAGA_K, stream="lores"):
+    """Pide 'k' frames seguidos al backend. Devuelve una lista de arrays RGB."""
+    return [backend.capturar_array(stream) for _ in range(k)]
+
+
+def clasificar_lote_torch(modelo, lote, device=None):
+    """Un solo forward para el lote (K, 3, H, W). Devuelve softmax (K, C) en NumPy."""
+    import torch
+    if device is not None:
+        lote = lote.to(device)
+    with torch.no_grad():
+        salida = modelo(lote)
+    return torch.nn.functional.softmax(salida, dim=1).cpu().numpy()
+
+
+def agregar(probabilidades, metodo=AGREGACION):
+    """Combina las probabilidades (K, C) de una ráfaga en una sola predicción.
+
+    "media":    promedio de las softmax de los K frames.
+    "votacion": cada frame vota por su top-1; gana la clase más votada y
+                los empates se deciden por la softmax media.
+
+    Devuelve {"indice", "confianza", "probabilidades" (C,), "orden",
+    "votos" ({clase: n}) y "acuerdo" (fracción de frames cuyo top-1 es el
+    ganador)}. "orden" son las clases de mejor a peor (orden[0] == indice);
+    con "votacion" solo las que tuvieron votos, por votos y a igualdad por
+    la softmax media, y "probabilidades" es la fracción de votos.
+    """
+    probabilidades = np.asarray(probabilidades, dtype=np.float32)
+    if probabilidades.ndim == 1:
+        probabilidades = probabilidades[None, :]
+    if metodo not in AGREGACIONES:
+        raise ValueError(f"Agregación desconocida: {metodo} (opciones: {', '.join(AGREGACIONES)})")
+    media = probabilidades.mean(axis=0)
+    top1 = probabilidades.argmax(axis=1)
+    conteo = np.bincount(top1, minlength=probabilidades.shape[1])
+    if metodo == "media":
+        orden = np.argsort(-media, kind="stable")
+        combinadas = media
+    else:
+        votadas = np.flatnonzero(conteo)
+        orden = votadas[np.lexsort((-media[votadas], -conteo[votadas]))] # Votos; empates por la media
+        combinadas = conteo / float(len(top1))
+    indice = int(orden[0])
+    votos = {int(c): int(conteo[c]) for c in np.flatnonzero(conteo)}
+    return {"indice": indice, "confianza": float(combinadas[indice]), "probabilidades": combinadas,
+            "orden": orden, "votos": votos, "acuerdo": float(conteo[indice]) / len(top1)}
@@ -1,41 +1,75 @@
 import tkinter as tk
 from tkinter import font
 import os
+import sys
 from datetime import datetime
 from PIL import Image, ImageTk
-import torch
-import torch.nn as nn
-from torchvision import models, transforms
 import subprocess
 
-# Configurar dispositivo
-device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # Módulos compartidos del repo
+from carga_modelo import CargadorModelo, ClasificacionEnTk, MetricasArranque # torch/torchvision se importan al cargar el modelo
+from trabajo_fondo import Cancelada, EjecutorFondo
+from decodificacion_jpeg import abrir_reducida
 
 # Definir nombres de clases (9 clases)
 class_names = ['clase0', 'clase1', 'clase2', 'clase3', 'clase4', 'clase5', 'clase6', 'clase7', 'clase8']
 
-# Cargar modelo ResNet34 y ajustar capa final\ n
-model = models.resnet34(pretrained=False)
-model.fc = nn.Linear(model.fc.in_features, len(class_names))
-model.load_state_dict(torch.load('R23.pth', map_location=device))
-model.to(device)
-model.eval()
-
-# Transformaciones para la imagen
-transform = transforms.Compose([
-    transforms.Resize(256),
-    transforms.CenterCrop(224),
-    transforms.ToTensor(),
-    transforms.Normalize([0.485, 0.456, 0.406],
-                         [0.229, 0.224, 0.225])
-])
+# Modelo ResNet34 con la capa final ajustada: se carga en segundo plano (ver cargar_modelo)
+torch = None     # Se importa en cargar_modelo, con la ventana ya visible
+device = None
+transform = None
+model = None
+MODO_INT8 = False # Modelo cuantizado a int8 (calibrado con las fotos guardadas); ver benchmark_cuantizacion.py
+BACKEND_INFERENCIA = 'torchscript' # 'torch' (nn.Module) | 'torchscript' (compilado junto a R23.pth) | 'onnx' (ONNX Runtime)
+
+def cargar_modelo(progreso):
+    """Importa torch y carga la ResNet34 de 9 clases con R23.pth (corre en el hilo de CargadorModelo)."""
+    global torch, device, transform, model
+    progreso('Importando PyTorch...')
+    import torch
+    import torch.nn as nn
+    from torchvision import models, transforms
+
+    # Configurar dispositivo
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+
+    # Transformaciones para la imagen
+    transform = transforms.Compose([
+        transforms.Resize(256),
+        transforms.CenterCrop(224),
+        transforms.ToTensor(),
+        transforms.Normalize([0.485, 0.456, 0.406],
+                             [0.229, 0.224, 0.225])
+    ])
+
+    if MODO_INT8 or BACKEND_INFERENCIA != 'torch':
+        device = torch.device('cpu') # Modelo int8, TorchScript congelado y ONNX Runtime: corren en la CPU
+
+    def construir():
+        progreso('Cargando modelo ResNet34...')
+        red = models.resnet34(pretrained=False)
+        red.fc = nn.Linear(red.fc.in_features, len(class_names))
+        progreso('Cargando pesos R23.pth...')
+        red.load_state_dict(torch.load('R23.pth', map_location=device))
+        red.to(device)
+        red.eval()
+        if MODO_INT8:
+            from cuantizacion import cuantizar, imagenes_calibracion
+            progreso('Cuantizando modelo a int8...')
+            red = cuantizar(red, (transform(abrir_reducida(r, lado_menor=256).convert('RGB')).unsqueeze(0) for r in imagenes_calibracion('fotos')))
+        return red
+
+    # Arranques siguientes: modelo ya compilado/exportado junto a R23.pth (se rehace si R23.pth cambia)
+    from cache_modelos import cargar_modelo
+    model = cargar_modelo(construir, 'R23.pth', BACKEND_INFERENCIA, 'int8' if MODO_INT8 else 'float32', progreso=progreso)
+    return model
 
 # Variables globales
 last_photo_path = None
 
 # Función de clasificación usando el modelo de 9 clases
 def classify_image(image_path):
-    image = Image.open(image_path).convert('RGB')
+    image = abrir_reducida(image_path, lado_menor=256).convert('RGB') # JPEG decodificado reducido para Resize(256)
     tensor = transform(image).unsqueeze(0).to(device)
     with torch.no_grad():
         outputs = model(tensor)
@@ -43,45 +77,64 @@ def classify_image(image_path):
         idx = pred.item()
     return class_names[idx]
 
+# --- Carga del modelo en segundo plano: la ventana responde mientras tanto ---
+metricas = MetricasArranque() # Tiempo hasta la primera ventana y la primera clasificación
+
+cargador_modelo = CargadorModelo(cargar_modelo) # Avisa en status_label vía ClasificacionEnTk
+
+ejecutor = EjecutorFondo() # Captura y forward en un hilo de trabajo, no en el de Tk (ver trabajo_fondo.py)
+
 # Función para capturar imagen y clasificar
 def tomar_y_clasificar():
-    global last_photo_path
     status_label.config(text='Capturando imagen...')
-    root.update_idletasks()
+    boton.config(state=tk.DISABLED) # Evitar pedir otra foto mientras llega esta
+    limpiar_boton.config(state=tk.NORMAL) # Limpiar cancela la captura en curso
 
     save_dir = 'fotos'
     os.makedirs(save_dir, exist_ok=True)
     nombre = f"captura_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
     ruta = os.path.join(save_dir, nombre)
 
-    # Captura con libcamera-jpeg usando subprocess
-    try:
-        subprocess.run(['libcamera-jpeg', '-o', ruta, '-t', '2000'], check=True)
-    except subprocess.CalledProcessError as e:
-        status_label.config(text=f"Error al capturar: {e}")
+    # libcamera-jpeg (unos 2 s) y la imagen a mostrar en el hilo de trabajo: la ventana no se congela
+    ejecutor.enviar(lambda tarea: capturar(tarea, ruta),
+                    al_terminar=lambda img, error: foto_capturada(ruta, img, error))
+
+def capturar(tarea, ruta):
+    """Captura con libcamera-jpeg y prepara la imagen a mostrar (en el hilo de trabajo)."""
+    subprocess.run(['libcamera-jpeg', '-o', ruta, '-t', '2000'], check=True)
+    tarea.comprobar()
+    img = abrir_reducida(ruta, tamano=(500, 400))
+    return img.resize((500, 400))
+
+def foto_capturada(ruta, img, error):
+    global last_photo_path
+    if isinstance(error, Cancelada): # Se limpió durante la captura
+        if os.path.exists(ruta): os.remove(ruta)
+        return
+    if error:
+        if isinstance(error, (subprocess.CalledProcessError, FileNotFoundError)):
+            status_label.config(text=f"Error al capturar: {error}")
+        else:
+            status_label.config(text=f"Error al mostrar imagen: {error}")
+        boton.config(state=tk.NORMAL)
+        limpiar_boton.config(state=tk.DISABLED)
         return
 
     # Mostrar imagen más grande
-    try:
-        img = Image.open(ruta)
-        img = img.resize((500, 400))
-        tk_img = ImageTk.PhotoImage(img)
-        img_label.config(image=tk_img)
-        img_label.image = tk_img
-        last_photo_path = ruta
-    except Exception as e:
-        status_label.config(text=f"Error al mostrar imagen: {e}")
-        return
+    tk_img = ImageTk.PhotoImage(img)
+    img_label.config(image=tk_img)
+    img_label.image = tk_img
+    last_photo_path = ruta
 
-    # Clasificar y mostrar resultado
-    resultado = classify_image(ruta)
-    status_label.config(text=f"Predicción: {resultado}")
+    # Clasificar y mostrar resultado (en cola si el modelo aún carga)
+    clasificacion.clasificar(ruta, lambda resultado: status_label.config(text=f"Predicción: {resultado}"))
     boton.config(state=tk.DISABLED)
     limpiar_boton.config(state=tk.NORMAL)
 
 # Función para limpiar interfaz
 def limpiar():
     global last_photo_path
+    ejecutor.cancelar_todo() # La captura o clasificación en curso ya no llega a la ventana
     img_label.config(image='')
     img_label.image = None
     status_label.config(text='Esperando acción...')
@@ -115,4 +168,10 @@ limpiar_boton.pack(pady=5)
 status_label = tk.Label(root, text='Esperando acción...', font=fuente_estado)
 status_label.pack(pady=10)
 
+# --- Modelo: carga en segundo plano, con la ventana ya visible ---
+clasificacion = ClasificacionEnTk(cargador_modelo, ejecutor, lambda modelo, ruta: classify_image(ruta), status_label, metricas)
+metricas.marcar_ventana(root)
+cargador_modelo.iniciar(root)
+ejecutor.iniciar(root)
+
 root.mainloop()
\ No newline at end of file
@@ -1,29 +1,70 @@
 import tkinter as tk
 from tkinter import font
 import os
+import sys
 from datetime import datetime
 from PIL import Image, ImageTk
-import torch
-import torch.nn as nn
-from torchvision import models, transforms
-import subprocess
 
-# --- Configuración modelo ---
-device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # Módulos compartidos del repo
+from libcamera_trabajador import TrabajadorLibcamera
+from carga_modelo import CargadorModelo, ClasificacionEnTk, MetricasArranque # torch/torchvision se importan al cargar el modelo
+from trabajo_fondo import EjecutorFondo
+from decodificacion_jpeg import abrir_reducida
+
+# --- Configuración modelo (se carga en segundo plano, ver cargar_modelo) ---
 class_names = ['clase0','clase1','clase2','clase3','clase4','clase5','clase6','clase7','clase8']
-model = models.resnet34(pretrained=False)
-model.fc = nn.Linear(model.fc.in_features, len(class_names))
-model.load_state_dict(torch.load('R23.pth', map_location=device))
-model.to(device)
-model.eval()
-
-# --- Transformación de imagen ---
-transform = transforms.Compose([
-    transforms.Resize(256),
-    transforms.CenterCrop(224),
-    transforms.ToTensor(),
-    transforms.Normalize([0.485, 0.456, 0.406], [0.229, 0.224, 0.225])
-])
+torch = None     # Se importa en cargar_modelo, con la ventana ya visible
+device = None
+transform = None
+model = None
+MODO_INT8 = False # Modelo cuantizado a int8 (calibrado con las fotos guardadas); ver benchmark_cuantizacion.py
+BACKEND_INFERENCIA = 'torchscript' # 'torch' (nn.Module) | 'torchscript' (compilado junto a R23.pth) | 'onnx' (ONNX Runtime)
+MODO_MULTICABEZA = False # Un forward del backbone de R23 para las 9 clases y el chequeo perro/gato (ver multicabeza.py)
+
+def cargar_modelo(progreso):
+    """Importa torch y carga la ResNet34 de 9 clases con R23.pth (corre en el hilo de CargadorModelo)."""
+    global torch, device, transform, model
+    progreso('Importando PyTorch...')
+    import torch
+    import torch.nn as nn
+    from torchvision import models, transforms
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+
+    # --- Transformación de imagen ---
+    transform = transforms.Compose([
+        transforms.Resize(256),
+        transforms.CenterCrop(224),
+        transforms.ToTensor(),
+        transforms.Normalize([0.485, 0.456, 0.406], [0.229, 0.224, 0.225])
+    ])
+
+    if MODO_INT8 or BACKEND_INFERENCIA != 'torch':
+        device = torch.device('cpu') # Modelo int8, TorchScript congelado y ONNX Runtime: corren en la CPU
+
+    if MODO_MULTICABEZA:
+        from multicabeza import MotorMulticabeza
+        model = MotorMulticabeza(progreso=progreso, int8=MODO_INT8,
+                                 backend='torch' if BACKEND_INFERENCIA == 'torch' else 'torchscript')
+        return model
+
+    def construir():
+        progreso('Cargando modelo ResNet34...')
+        red = models.resnet34(pretrained=False)
+        red.fc = nn.Linear(red.fc.in_features, len(class_names))
+        progreso('Cargando pesos R23.pth...')
+        red.load_state_dict(torch.load('R23.pth', map_location=device))
+        red.to(device)
+        red.eval()
+        if MODO_INT8:
+            from cuantizacion import cuantizar, imagenes_calibracion
+            progreso('Cuantizando modelo a int8...')
+            red = cuantizar(red, (transform(abrir_reducida(r, lado_menor=256).convert('RGB')).unsqueeze(0) for r in imagenes_calibracion('fotos')))
+        return red
+
+    # Arranques siguientes: modelo ya compilado/exportado junto a R23.pth (se rehace si R23.pth cambia)
+    from cache_modelos import cargar_modelo
+    model = cargar_modelo(construir, 'R23.pth', BACKEND_INFERENCIA, 'int8' if MODO_INT8 else 'float32', progreso=progreso)
+    return model
 
 # --- Interfaz Tkinter ---
 BASE_FONT_SIZE = 14
@@ -77,29 +118,48 @@ clear_btn.grid(row=1, column=0, sticky="ew")
 root.update_idletasks()
 
 last_photo_path = None
+trabajador_camara = TrabajadorLibcamera() # libcamera-still persistente (modo keypress)
 
 def classify_image(path):
-    img = Image.open(path).convert('RGB')
+    if MODO_MULTICABEZA:
+        resultado = model.classify(path) # {cabeza: (etiqueta, probabilidad)}
+        etiqueta, probabilidad = resultado['perro_gato']
+        return f"{resultado['r23'][0]} · {etiqueta} ({probabilidad:.0%})"
+    img = abrir_reducida(path, lado_menor=256).convert('RGB') # JPEG decodificado reducido para Resize(256)
     tensor = transform(img).unsqueeze(0).to(device)
     with torch.no_grad():
         out = model(tensor)
         _, pred = torch.max(out,1)
     return class_names[pred.item()]
 
+# --- Carga del modelo en segundo plano: la ventana responde mientras tanto ---
+metricas = MetricasArranque() # Tiempo hasta la primera ventana y la primera clasificación
+
+cargador_modelo = CargadorModelo(cargar_modelo) # Avisa en status_label vía ClasificacionEnTk
+
+ejecutor = EjecutorFondo() # Captura y forward en un hilo de trabajo, no en el de Tk (ver trabajo_fondo.py)
+
 def tomar_y_clasificar():
-    global last_photo_path
     status_label.config(text='Capturando imagen...')
-    root.update_idletasks()
+    capture_btn.config(state=tk.DISABLED)
 
     save_dir = 'fotos'
     os.makedirs(save_dir, exist_ok=True)
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     ruta = os.path.join(save_dir, f'captura_{timestamp}.jpg')
     try:
-        subprocess.run(['libcamera-jpeg','-n','-o',ruta,'-t','200'], check=True)
+        trabajador_camara.solicitar_foto(ruta, al_terminar=foto_capturada)
     except Exception as e:
         status_label.config(text=f'Error captura: {e}')
+        capture_btn.config(state=tk.NORMAL)
+
+def foto_capturada(resultado):
+    global last_photo_path
+    if resultado['error']:
+        status_label.config(text=f"Error captura: {resultado['error']}")
+        capture_btn.config(state=tk.NORMAL)
         return
+    ruta = resultado['ruta']
 
     # Mostrar imagen
     try:
@@ -113,17 +173,18 @@ def tomar_y_clasificar():
         image_label.image = tk_img
     except Exception as e:
         status_label.config(text=f'Error mostrar: {e}')
+        capture_btn.config(state=tk.NORMAL)
         return
 
-    # Clasificar
-    res = classify_image(ruta)
-    status_label.config(text=f'Predicción: {res}')
+    # Clasificar (en cola si el modelo aún carga)
+    clasificacion.clasificar(ruta, lambda res: status_label.config(text=f'Predicción: {res}'))
     capture_btn.config(state=tk.DISABLED)
     clear_btn.config(state=tk.NORMAL)
     last_photo_path = ruta
 
 def limpiar():
     global last_photo_path
+    ejecutor.cancelar_todo() # La clasificación en curso ya no llega a la ventana
     if last_photo_path and os.path.exists(last_photo_path):
         try: os.remove(last_photo_path)
         except: pass
@@ -134,4 +195,23 @@ def limpiar():
     capture_btn.config(state=tk.NORMAL)
     clear_btn.config(state=tk.DISABLED)
 
+# --- Cámara: un solo libcamera-still vivo durante toda la app ---
+def cerrar_app():
+    ejecutor.detener()
+    trabajador_camara.detener()
+    root.destroy()
+
+try:
+    trabajador_camara.iniciar()
+except FileNotFoundError:
+    print("Error: libcamera-still no encontrado.")
+trabajador_camara.atender_en_tk(root)
+root.protocol("WM_DELETE_WINDOW", cerrar_app)
+
+# --- Modelo: carga en segundo plano, con la ventana ya visible ---
+clasificacion = ClasificacionEnTk(cargador_modelo, ejecutor, lambda modelo, ruta: classify_image(ruta), status_label, metricas)
+metricas.marcar_ventana(root)
+cargador_modelo.iniciar(root)
+ejecutor.iniciar(root)
+
 root.mainloop()
\ No newline at end of file
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Sustituto de libcamera-still / libcamera-jpeg para probar sin cámara.
+
+Imita lo que usan nuestros scripts:
+  - Foto única:  stub_libcamera_still.py -n -o foto.jpg -t 200
+    (simula el arranque del sensor, espera -t ms y escribe un JPEG).
+  - Modo --keypress: con -t 0 queda vivo; cada línea por stdin toma una
+    foto en el patrón de -o (p. ej. captura_%04d.jpg); "x" termina.
+  - Modo --signal: SIGUSR1 toma una foto, SIGUSR2 termina. Como el
+    real, escribe por stderr al abrir la cámara ANTES de instalar los
+    manejadores (un SIGUSR1 temprano lo mata) y, con --verbose=2, escribe
+    "Viewfinder frame" recién con los manejadores puestos.
+
+--stub-arranque-ms simula el coste de abrir y configurar el sensor
+(lo que paga cada subprocess.run por foto). Las imágenes son sintéticas.
+"""
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+
+from PIL import Image
+
+ARRANQUE_MS = 300 # Coste simulado de inicializar cámara + pipeline
+
+
+def escribir_jpeg(ruta, ancho, alto, numero):
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    color = ((numero * 53) % 256, (numero * 97) % 256, (numero * 151) % 256)
+    temporal = ruta + ".parcial"
+    Image.new("RGB", (ancho, alto), color).save(temporal, "JPEG", quality=85)
+    os.replace(temporal, ruta)
+
+
+def main():
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("-o", "--output", required=True)
+    parser.add_argument("-t", "--timeout", type=int, default=5000)
+    parser.add_argument("-n", "--nopreview", action="store_true")
+    parser.add_argument("-k", "--keypress", action="store_true")
+    parser.add_argument("-s", "--signal", action="store_true")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--framestart", type=int, default=0)
+    parser.add_argument("-v", "--verbose", type=int, nargs="?", const=2, default=1)
+    parser.add_argument("--stub-arranque-ms", type=int, default=ARRANQUE_MS)
+    args, _ = parser.parse_known_args()
+
+    salir = threading.Event()
+    pedidas = []
+    numero = args.framestart
+    # Como libcamera-still, escribe por stderr al configurar la cámara, bastante antes de atender señales
+    time.sleep(args.stub_arranque_ms / 2000.0)
+    print(f"Stub libcamera-still: mode selection for {args.width}:{args.height}", file=sys.stderr, flush=True)
+    time.sleep(args.stub_arranque_ms / 2000.0)
+
+    if args.signal:
+        signal.signal(signal.SIGUSR1, lambda *_: pedidas.append(1))
+        signal.signal(signal.SIGUSR2, lambda *_: salir.set())
+    if args.verbose >= 2 and (args.keypress or args.signal):
+        # El real la escribe en cada frame del visor; el stub, una vez (ya atiende señales)
+        print("Viewfinder frame 0", file=sys.stderr, flush=True)
+
+    if not (args.keypress or args.signal):
+        time.sleep(args.timeout / 1000.0)
+        escribir_jpeg(args.output, args.width, args.height, numero)
+        return 0
+
+    def capturar():
+        nonlocal numero
+        ruta = args.output % numero if "%" in args.output else args.output
+        escribir_jpeg(ruta, args.width, args.height, numero)
+        numero += 1
+
+    if args.signal:
+        while not salir.wait(0.005):
+            while pedidas:
+                pedidas.pop()
+                capturar()
+        return 0
+
+    for linea in sys.stdin:
+        if linea.strip().lower() == "x":
+            break
+        capturar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
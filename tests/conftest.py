@@ -0,0 +1,5 @@
+"""Los módulos del proyecto están en la raíz del repo: se agregan al path como en resnet34/."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
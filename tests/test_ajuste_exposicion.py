@@ -0,0 +1,60 @@
+"""Convergencia de AE/AWB y tope de espera, con metadatos simulados (sin cámara ni sleeps)."""
+import pytest
+
+from ajuste_exposicion import MetadatosSimulados, esperar_convergencia
+
+
+def test_converge_en_pocos_frames_con_un_sensor_rapido():
+    flujo = MetadatosSimulados(paso=0.7)
+    resultado = esperar_convergencia(flujo, reloj=flujo.reloj)
+    assert resultado["convergido"]
+    assert resultado["frames"] < 20
+    assert resultado["segundos"] < 1.0 # Mucho menos que el sleep fijo de 2 s
+    error = abs(resultado["metadatos"]["ExposureTime"] - flujo.exposicion_objetivo) / flujo.exposicion_objetivo
+    assert error < 0.01
+
+
+def test_ya_convergido_necesita_la_ventana_completa():
+    flujo = MetadatosSimulados(paso=1.0)
+    resultado = esperar_convergencia(flujo, frames_estables=3, reloj=flujo.reloj)
+    assert resultado["convergido"]
+    assert resultado["frames"] == 4 # frames_estables + 1
+
+
+def test_rampa_lenta_no_converge_lejos_del_objetivo():
+    # Cada frame cambia menos que la tolerancia, pero la rampa aún tiene mucho por recorrer
+    flujo = MetadatosSimulados(paso=0.005)
+    resultado = esperar_convergencia(flujo, espera_maxima=2.0, reloj=flujo.reloj)
+    assert not resultado["convergido"]
+
+
+def test_rampa_convergida_solo_cerca_del_objetivo():
+    flujo = MetadatosSimulados(paso=0.2)
+    resultado = esperar_convergencia(flujo, espera_maxima=10.0, reloj=flujo.reloj)
+    assert resultado["convergido"]
+    error = abs(resultado["metadatos"]["ExposureTime"] - flujo.exposicion_objetivo) / flujo.exposicion_objetivo
+    assert error < 0.02
+
+
+def test_tope_de_espera():
+    flujo = MetadatosSimulados(paso=0.001)
+    resultado = esperar_convergencia(flujo, espera_maxima=0.5, reloj=flujo.reloj)
+    assert not resultado["convergido"]
+    assert resultado["segundos"] == pytest.approx(0.5, abs=flujo.intervalo)
+    assert resultado["frames"] == flujo.frames
+
+
+def test_ae_locked_manda():
+    flujo = MetadatosSimulados(paso=0.3, informar_ae_locked=True)
+    resultado = esperar_convergencia(flujo, reloj=flujo.reloj)
+    assert resultado["convergido"]
+    assert resultado["metadatos"]["AeLocked"] is True
+
+
+def test_sin_metadatos_de_ajuste_espera_hasta_el_tope():
+    reloj = MetadatosSimulados()
+    def sin_exposicion():
+        reloj() # Solo avanza el reloj simulado
+        return {"AnalogueGain": 2.0, "ColourGains": (1.8, 1.5)}
+    resultado = esperar_convergencia(sin_exposicion, espera_maxima=0.3, reloj=reloj.reloj)
+    assert not resultado["convergido"]
@@ -0,0 +1,101 @@
+"""Políticas de selección del anillo ZSL, con el backend replay como cámara."""
+import time
+
+import numpy as np
+import pytest
+
+from backends_captura import crear_backend
+from buffer_zsl import AnilloFrames, CapturaZSL
+
+FPS = 50
+PERIODO = 1.0 / FPS
+HOLGURA = 0.5 * PERIODO  # Margen para el planificador (la rejilla del replay no es exacta)
+
+
+@pytest.fixture
+def replay(tmp_path):
+    """.npy de 8 frames; cada uno lleno con su índice para reconocerlo."""
+    pila = np.stack([np.full((48, 64, 3), i, dtype=np.uint8) for i in range(8)])
+    ruta = tmp_path / "replay.npy"
+    np.save(ruta, pila)
+    return str(ruta)
+
+
+def anillo_con(instantes):
+    anillo = AnilloFrames([(2, 2, 1)], profundidad=len(instantes), presupuesto_mb=None)
+    for i, instante in enumerate(instantes):
+        anillo.escribir([np.full((2, 2, 1), i, dtype=np.uint8)], instante)
+    return anillo
+
+
+@pytest.mark.parametrize("politica, clic, esperado", [
+    ("anterior", 0.25, 2),
+    ("anterior", 0.3, 3),     # Justo en el clic cuenta como anterior
+    ("posterior", 0.25, 3),
+    ("posterior", 0.2, 2),
+    ("cercano", 0.21, 2),
+    ("cercano", 0.29, 3),
+])
+def test_anillo_elige_segun_politica(politica, clic, esperado):
+    base = time.monotonic() - 10 # En el pasado: "cercano" no espera al siguiente frame
+    anillo = anillo_con([base + 0.1 * i for i in range(5)])
+    frames, instante = anillo.seleccionar(base + clic, politica, timeout=0)
+    assert frames[0][0, 0, 0] == esperado
+    assert instante == pytest.approx(base + 0.1 * esperado)
+
+
+def test_anillo_sin_frame_posterior_devuelve_none():
+    base = time.monotonic() - 10
+    anillo = anillo_con([base, base + 0.1])
+    assert anillo.seleccionar(base + 1.0, "posterior", timeout=0.01) is None
+
+
+def test_anillo_recorta_profundidad_al_presupuesto():
+    anillo = AnilloFrames([(1024, 1024, 1)], profundidad=8, presupuesto_mb=3)
+    assert anillo.profundidad == 3
+
+
+def test_politica_desconocida():
+    with pytest.raises(ValueError):
+        CapturaZSL(None, politica="mas_nitido")
+
+
+@pytest.mark.parametrize("politica", ["anterior", "posterior", "cercano"])
+def test_captura_zsl_con_replay(replay, politica):
+    backend = crear_backend("replay", origen=replay, fps=FPS)
+    zsl = CapturaZSL(backend, streams=("main", "lores"), profundidad=4, politica=politica)
+    try:
+        zsl.iniciar()
+        time.sleep(4 * PERIODO) # Llenar el anillo
+        resultado = zsl.foto(time.monotonic() - PERIODO / 3)
+    finally:
+        zsl.detener()
+        backend.cerrar()
+
+    main, lores = resultado["frames"]
+    assert main.shape == (48, 64, 3)
+    assert lores[0, 0, 0] == main[0, 0, 0] # Los dos streams son del mismo frame
+    desfase = resultado["desfase_ms"] / 1000
+    if politica == "anterior":
+        assert -PERIODO - HOLGURA <= desfase <= 0
+        assert resultado["espera_ms"] < 1000 * HOLGURA # Ya estaba en el anillo
+    elif politica == "posterior":
+        assert 0 <= desfase <= PERIODO + HOLGURA
+    else:
+        assert abs(desfase) <= PERIODO / 2 + HOLGURA
+
+
+def test_captura_zsl_para_al_terminar_el_replay(replay):
+    backend = crear_backend("replay", origen=replay, fps=None, bucle=False)
+    zsl = CapturaZSL(backend, streams=("main",), profundidad=4)
+    try:
+        zsl.iniciar()
+        zsl._hilo.join(timeout=2.0) # ReplayTerminado termina el hilo sin contarlo como error
+        assert not zsl.activa
+        assert zsl.errores == 0
+        assert zsl.anillo.escritos == 8
+        frames, _ = zsl.anillo.seleccionar(time.monotonic(), "anterior", timeout=0)
+        assert frames[0][0, 0, 0] == 7
+    finally:
+        zsl.detener()
+        backend.cerrar()
@@ -0,0 +1,84 @@
+"""TrabajadorLibcamera contra stub_libcamera_still.py (sin cámara)."""
+import os
+import sys
+
+import pytest
+from PIL import Image
+
+import libcamera_trabajador
+from libcamera_trabajador import TrabajadorLibcamera
+
+STUB = [sys.executable, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                     "stub_libcamera_still.py")]
+TAMANO = ["--width", "64", "--height", "48"]
+
+
+@pytest.fixture
+def trabajadores():
+    creados = []
+    def crear(modo="keypress", argumentos_extra=(), **opciones):
+        trabajador = TrabajadorLibcamera(STUB, modo=modo, argumentos_extra=TAMANO + list(argumentos_extra),
+                                         **opciones)
+        creados.append(trabajador)
+        return trabajador
+    yield crear
+    for trabajador in creados:
+        trabajador.detener()
+
+
+def resultados(trabajador, cantidad, timeout=10.0):
+    return [trabajador.obtener_resultado(timeout=timeout) for _ in range(cantidad)]
+
+
+@pytest.mark.parametrize("modo", ["keypress", "signal"])
+def test_fotos_en_orden(trabajadores, tmp_path, modo):
+    trabajador = trabajadores(modo)
+    rutas = [str(tmp_path / "fotos" / f"foto_{i}.jpg") for i in range(3)]
+    numeros = [trabajador.solicitar_foto(ruta) for ruta in rutas] # Pedidas antes de que arranque
+    obtenidos = resultados(trabajador, 3)
+    assert [r["numero"] for r in obtenidos] == numeros
+    assert [r["error"] for r in obtenidos] == [None] * 3
+    for ruta in rutas:
+        with Image.open(ruta) as imagen:
+            assert imagen.size == (64, 48)
+    assert trabajador.vivo # Un solo proceso para todas las fotos
+
+
+def test_callbacks_con_despachar(trabajadores, tmp_path):
+    trabajador = trabajadores()
+    recibidos = []
+    trabajador.solicitar_foto(str(tmp_path / "a.jpg"), al_terminar=recibidos.append)
+    trabajador.solicitar_foto(str(tmp_path / "b.jpg"), al_terminar=recibidos.append)
+    pendientes = resultados(trabajador, 2)
+    for resultado in pendientes: # despachar() lee de la misma cola: devolverlos
+        trabajador.resultados.put(resultado)
+    trabajador.despachar()
+    assert [os.path.basename(r["ruta"]) for r in recibidos] == ["a.jpg", "b.jpg"]
+
+
+def test_modo_senal_espera_la_marca_de_listo(trabajadores, tmp_path):
+    # El stub escribe por stderr antes de instalar su manejador: disparar ahí lo mataría
+    trabajador = trabajadores("signal", ["--stub-arranque-ms", "600"])
+    trabajador.solicitar_foto(str(tmp_path / "foto.jpg"))
+    resultado, = resultados(trabajador, 1)
+    assert resultado["error"] is None
+    assert trabajador._reinicios == 0 # No se cayó ni hubo que relanzarlo
+
+
+def test_modo_senal_sin_marca_falla_sin_disparar(trabajadores, tmp_path, monkeypatch):
+    monkeypatch.setattr(libcamera_trabajador, "ESPERA_LISTO", 0.5)
+    trabajador = trabajadores("signal", ["--verbose=1"]) # El último --verbose gana: sin "Viewfinder frame"
+    trabajador.solicitar_foto(str(tmp_path / "foto.jpg"))
+    resultado, = resultados(trabajador, 1)
+    assert "no indicó que estaba listo" in resultado["error"]
+    assert trabajador.vivo # No se le mandó SIGUSR1
+
+
+def test_relanza_si_el_proceso_se_cae(trabajadores, tmp_path, capsys):
+    trabajador = trabajadores("keypress", ["--stub-arranque-ms", "500"])
+    trabajador.solicitar_foto(str(tmp_path / "foto.jpg"))
+    trabajador.proceso.kill() # Se cae con la foto pendiente
+    resultado, = resultados(trabajador, 1)
+    assert resultado["error"] is None
+    assert os.path.exists(tmp_path / "foto.jpg")
+    assert "relanzando" in capsys.readouterr().out
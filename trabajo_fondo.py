@@ -0,0 +1,228 @@
+"""Trabajo pesado (cámara, archivo, decodificación, modelo) fuera del hilo de Tk.
+
+tomar_foto() hacía en el hilo de Tk la captura, la escritura, la
+decodificación y el forward del modelo, con root.update_idletasks() entre
+pasos: la ventana quedaba congelada hasta que terminaba todo. EjecutorFondo
+corre esas etapas en un hilo de trabajo (torch, PIL y picamera2 sueltan
+el GIL en lo pesado) y devuelve el progreso y el resultado por una cola
+thread-safe que Tk revisa con root.after(), como CargadorModelo:
+
+    ejecutor = EjecutorFondo(root)
+    tarea = ejecutor.enviar(trabajo, al_terminar=listo, al_progresar=paso)
+
+    trabajo(tarea)             corre en el hilo de trabajo; puede llamar a
+                               tarea.progreso(valor) → paso(valor) en Tk
+                               tarea.comprobar()     → Cancelada si se canceló
+    listo(resultado, error)    en el hilo de Tk; error es None, la excepción
+                               o Cancelada
+
+    tarea.cancelar()           o ejecutor.cancelar_todo() (p. ej. al limpiar)
+
+La cancelación es cooperativa: una captura o un forward ya en marcha
+terminan, pero las etapas siguientes no corren y su resultado no llega a
+la ventana.
+
+MonitorBucleTk mide si la ventana responde: programa un tick cada
+'periodo_ms' con root.after() y registra cuánto llega tarde (latencia del
+bucle de eventos) y el tiempo entre ticks (frame time de la UI).
+benchmark_bucle_tk.py compara las dos formas de tomar la foto.
+"""
+import collections
+import queue
+import threading
+import time
+
+# --- Constantes ---
+INTERVALO_MS = 20        # Cada cuánto revisa Tk la cola de resultados
+HILOS = 1                # La cámara y el modelo se usan de a uno (tienen su lock)
+PERIODO_MONITOR_MS = 16  # Un tick por frame a 60 Hz
+HISTORIA_MONITOR = 2000  # Ticks que se guardan para las estadísticas
+
+
+class Cancelada(Exception):
+    """La tarea se canceló antes de entregar su resultado."""
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100.0 * (len(ordenados) - 1))))]
+
+
+class Tarea:
+    """Un trabajo enviado a EjecutorFondo; se cancela con cancelar()."""
+
+    def __init__(self, ejecutor, trabajo, al_terminar=None, al_progresar=None):
+        self._mensajes = ejecutor._mensajes
+        self.trabajo = trabajo
+        self.al_terminar = al_terminar
+        self.al_progresar = al_progresar
+        self.enviada = time.monotonic()
+        self.segundos = None # Desde enviar() hasta entregar el resultado en Tk
+        self._cancelada = threading.Event()
+
+    @property
+    def cancelada(self):
+        return self._cancelada.is_set()
+
+    def cancelar(self):
+        self._cancelada.set()
+
+    def comprobar(self):
+        """Lanza Cancelada si se canceló (llamar entre etapas del trabajo)."""
+        if self.cancelada:
+            raise Cancelada()
+
+    def progreso(self, valor):
+        """Entrega 'valor' a al_progresar en el hilo de Tk (desde el hilo de trabajo)."""
+        self.comprobar()
+        self._mensajes.put((self, "progreso", valor))
+
+
+class EjecutorFondo:
+    """Hilos de trabajo con los resultados entregados en el hilo de Tk."""
+
+    def __init__(self, root=None, hilos=HILOS, intervalo_ms=INTERVALO_MS):
+        self.root = root
+        self.hilos = hilos
+        self.intervalo_ms = intervalo_ms
+        self._cola = queue.Queue()     # Tareas por hacer
+        self._mensajes = queue.Queue() # (tarea, tipo, valor) hacia el hilo de Tk
+        self._activas = set()          # Enviadas y aún sin entregar
+        self._lock = threading.Lock()
+        self._hilos = []
+        self._after_id = None
+
+    @property
+    def ocupado(self):
+        with self._lock:
+            return len(self._activas)
+
+    def iniciar(self, root=None):
+        """Arranca los hilos; con 'root' los resultados se atienden desde el bucle de Tk."""
+        if root is not None:
+            self.root = root
+        if not self._hilos:
+            for i in range(self.hilos):
+                hilo = threading.Thread(target=self._trabajar, name=f"EjecutorFondo-{i}", daemon=True)
+                hilo.start()
+                self._hilos.append(hilo)
+        if self.root is not None and self._after_id is None:
+            self._after_id = self.root.after(self.intervalo_ms, self._atender_en_tk)
+
+    def enviar(self, trabajo, al_terminar=None, al_progresar=None):
+        """Encola trabajo(tarea) y devuelve la Tarea (para cancelarla)."""
+        self.iniciar()
+        tarea = Tarea(self, trabajo, al_terminar, al_progresar)
+        with self._lock:
+            self._activas.add(tarea)
+        self._cola.put(tarea)
+        return tarea
+
+    def cancelar_todo(self):
+        with self._lock:
+            for tarea in self._activas:
+                tarea.cancelar()
+
+    def detener(self, timeout=2.0):
+        """Cancela lo pendiente y termina los hilos (espera a lo sumo 'timeout' a cada uno)."""
+        self.cancelar_todo()
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        for _ in self._hilos:
+            self._cola.put(None)
+        for hilo in self._hilos:
+            hilo.join(timeout)
+        self._hilos = []
+
+    def _trabajar(self):
+        while True:
+            tarea = self._cola.get()
+            if tarea is None:
+                return
+            resultado = error = None
+            try:
+                tarea.comprobar()
+                resultado = tarea.trabajo(tarea)
+            except Exception as e:
+                error = e
+                if not isinstance(e, Cancelada):
+                    print(f"Error en trabajo de fondo: {e}")
+            self._mensajes.put((tarea, "fin", (resultado, error)))
+
+    def _atender_en_tk(self):
+        self.atender()
+        self._after_id = self.root.after(self.intervalo_ms, self._atender_en_tk)
+
+    def atender(self):
+        """Entrega progreso y resultados (llamar desde el hilo de Tk)."""
+        while True:
+            try:
+                tarea, tipo, valor = self._mensajes.get_nowait()
+            except queue.Empty:
+                return
+            if tipo == "progreso":
+                if not tarea.cancelada and tarea.al_progresar:
+                    tarea.al_progresar(valor)
+                continue
+            with self._lock:
+                self._activas.discard(tarea)
+            resultado, error = valor
+            if tarea.cancelada and not isinstance(error, Cancelada): # Terminó, pero ya no se quiere
+                resultado, error = None, Cancelada()
+            tarea.segundos = time.monotonic() - tarea.enviada
+            if tarea.al_terminar:
+                tarea.al_terminar(resultado, error)
+
+
+class MonitorBucleTk:
+    """Latencia del bucle de eventos y frame time de la UI, con un tick periódico de root.after."""
+
+    def __init__(self, root, periodo_ms=PERIODO_MONITOR_MS, historia=HISTORIA_MONITOR):
+        self.root = root
+        self.periodo_ms = periodo_ms
+        self.retrasos_ms = collections.deque(maxlen=historia)   # Cuánto tarde llega cada tick
+        self.intervalos_ms = collections.deque(maxlen=historia) # Tiempo entre ticks
+        self._esperado = None
+        self._anterior = None
+        self._after_id = None
+
+    def iniciar(self):
+        if self._after_id is None:
+            self._anterior = None
+            self._esperado = time.monotonic() + self.periodo_ms / 1000
+            self._after_id = self.root.after(self.periodo_ms, self._tick)
+
+    def detener(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def reiniciar(self):
+        self.retrasos_ms.clear()
+        self.intervalos_ms.clear()
+
+    def _tick(self):
+        ahora = time.monotonic()
+        self.retrasos_ms.append(max(0.0, (ahora - self._esperado) * 1000))
+        if self._anterior is not None:
+            self.intervalos_ms.append((ahora - self._anterior) * 1000)
+        self._anterior = ahora
+        self._esperado = ahora + self.periodo_ms / 1000
+        self._after_id = self.root.after(self.periodo_ms, self._tick)
+
+    def estadisticas(self):
+        """Latencia (p50, p95, máx.) y frame time (p95, máx.) en ms de los últimos ticks."""
+        if not self.intervalos_ms:
+            return None
+        return {"ticks": len(self.retrasos_ms),
+                "latencia_p50": percentil(self.retrasos_ms, 50), "latencia_p95": percentil(self.retrasos_ms, 95),
+                "latencia_max": max(self.retrasos_ms),
+                "frame_p95": percentil(self.intervalos_ms, 95), "frame_max": max(self.intervalos_ms)}
+
+    def resumen(self):
+        e = self.estadisticas()
+        if e is None:
+            return "Bucle de Tk: sin datos"
+        return (f"Bucle de Tk: latencia p50 {e['latencia_p50']:.1f} ms, p95 {e['latencia_p95']:.1f} ms, "
+                f"máx. {e['latencia_max']:.0f} ms; frame p95 {e['frame_p95']:.1f} ms, máx. {e['frame_max']:.0f} ms")
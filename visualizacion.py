@@ -0,0 +1,161 @@
+"""Previsualización en vivo dentro de un Label de Tk, descartando frames viejos.
+
+Un hilo pide frames lores a la cámara y los deja en una única ranura:
+si llega uno nuevo antes de que Tk muestre el anterior, el anterior se
+descarta (nunca se encolan frames viejos). Tk, con root.after() al ritmo
+objetivo, toma el más reciente y lo pega en un ÚNICO PhotoImage
+reutilizado (solo se recrea si cambia el tamaño del label).
+
+estadisticas() expone fps mostrados, frames descartados y el retraso de
+los ticks de Tk, para comprobar que el bucle de eventos va sobrado.
+"""
+import threading
+import time
+
+from PIL import Image, ImageTk
+
+from captura_memoria import array_a_imagen
+
+# --- Constantes ---
+FPS_OBJETIVO = 15
+MARGEN = 10              # Píxeles de margen dentro del label (como mostrar_imagen)
+TAMANO_POR_DEFECTO = (600, 450)
+ESPERA_TRAS_ERROR = 0.5  # Segundos antes de reintentar si la cámara falla
+REINTENTO_INICIO_MS = 20 # Cada cuánto revisa iniciar() si ya salió el hilo anterior
+VENTANA_FPS = 2.0        # Segundos de historia para calcular los fps mostrados
+
+
+class VistaPreviaEnVivo:
+    """Muestra en 'label' los frames que devuelve capturar() (array RGB)."""
+
+    def __init__(self, root, label, capturar, fps_objetivo=FPS_OBJETIVO, margen=MARGEN):
+        self.root = root
+        self.label = label
+        self.capturar = capturar
+        self.fps_objetivo = fps_objetivo
+        self.margen = margen
+        self._lock = threading.Lock()
+        self._frame = None      # Ranura única: solo el frame más reciente
+        self._detener = threading.Event()
+        self._hilo = None
+        self._after_id = None
+        self._inicio_id = None  # iniciar() pendiente de que salga el hilo anterior
+        self._photo = None      # PhotoImage reutilizado
+        self._tick_esperado = None
+        self._mostrados_t = []  # Instantes de los últimos frames mostrados
+        self.capturados = 0
+        self.mostrados = 0
+        self.descartados = 0
+        self.errores = 0
+        self.retraso_tick_ms = 0.0 # Media móvil del retraso de root.after respecto al ritmo
+        self.ultimo_error = None
+
+    @property
+    def activa(self):
+        return self._hilo is not None and self._hilo.is_alive() and not self._detener.is_set()
+
+    def iniciar(self):
+        """Arranca la vista previa; si el hilo anterior aún termina su captura, arranca cuando salga."""
+        self._inicio_id = None
+        if self.activa:
+            return
+        if self._hilo is not None and self._hilo.is_alive():
+            # Nunca dos hilos pidiendo frames a la vez: se reintenta sin bloquear Tk
+            self._inicio_id = self.root.after(REINTENTO_INICIO_MS, self.iniciar)
+            return
+        self._detener.clear()
+        with self._lock:
+            self._frame = None
+        self._hilo = threading.Thread(target=self._bucle_captura, name="VistaPrevia", daemon=True)
+        self._hilo.start()
+        self._programar_tick()
+
+    def detener(self):
+        """Para la captura y los ticks sin esperar al hilo. La última imagen queda en el label.
+
+        El hilo sale solo al terminar el frame en curso (que se descarta).
+        """
+        self._detener.set()
+        for after_id in (self._after_id, self._inicio_id):
+            if after_id is not None:
+                self.root.after_cancel(after_id)
+        self._after_id = self._inicio_id = None
+
+    def esperar(self, timeout=1.0):
+        """Espera a que salga el hilo tras detener() (al cerrar, antes de soltar la cámara)."""
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+
+    def olvidar_imagen(self):
+        """Suelta el PhotoImage (p. ej. cuando otro código cambia la imagen del label)."""
+        self._photo = None
+
+    def estadisticas(self):
+        ahora = time.monotonic()
+        recientes = [t for t in self._mostrados_t if ahora - t <= VENTANA_FPS]
+        fps = (len(recientes) - 1) / (recientes[-1] - recientes[0]) if len(recientes) > 1 else 0.0
+        return {"fps": fps, "capturados": self.capturados, "mostrados": self.mostrados,
+                "descartados": self.descartados, "errores": self.errores,
+                "retraso_tick_ms": self.retraso_tick_ms}
+
+    # --- Hilo de captura ---
+    def _bucle_captura(self):
+        while not self._detener.is_set():
+            try:
+                frame = self.capturar()
+            except Exception as e:
+                self.errores += 1
+                self.ultimo_error = e
+                print(f"Error en la vista previa: {e}")
+                self._detener.wait(ESPERA_TRAS_ERROR)
+                continue
+            with self._lock:
+                if self._detener.is_set():
+                    break # Detenida durante la captura: este frame ya no se muestra
+                if self._frame is not None:
+                    self.descartados += 1 # Tk no llegó a mostrarlo: se pisa
+                self._frame = frame
+                self.capturados += 1
+
+    # --- Hilo de Tk ---
+    def _programar_tick(self):
+        intervalo_ms = max(1, int(1000 / self.fps_objetivo))
+        self._tick_esperado = time.monotonic() + intervalo_ms / 1000.0
+        self._after_id = self.root.after(intervalo_ms, self._tick)
+
+    def _tick(self):
+        retraso = max(0.0, time.monotonic() - self._tick_esperado) * 1000.0
+        self.retraso_tick_ms = 0.9 * self.retraso_tick_ms + 0.1 * retraso
+        with self._lock:
+            frame, self._frame = self._frame, None
+        if frame is not None:
+            try:
+                self._mostrar(frame)
+            except Exception as e:
+                print(f"Error al mostrar vista previa: {e}")
+        if not self._detener.is_set():
+            self._programar_tick()
+
+    def _mostrar(self, frame):
+        imagen = array_a_imagen(frame)
+        ancho_label = self.label.winfo_width()
+        alto_label = self.label.winfo_height()
+        if ancho_label <= 1 or alto_label <= 1:
+            ancho_label, alto_label = TAMANO_POR_DEFECTO
+        ancho, alto = imagen.size
+        escala = min((ancho_label - self.margen) / ancho, (alto_label - self.margen) / alto)
+        tamano = (max(1, int(ancho * escala)), max(1, int(alto * escala)))
+        if tamano != imagen.size:
+            # BILINEAR: la vista previa prima la velocidad; LANCZOS queda para la foto final
+            imagen = imagen.resize(tamano, Image.Resampling.BILINEAR)
+
+        if self._photo is not None and (self._photo.width(), self._photo.height()) == tamano:
+            self._photo.paste(imagen) # Reutilizar el mismo PhotoImage: sin crear imágenes Tk nuevas
+        else:
+            self._photo = ImageTk.PhotoImage(imagen)
+            self.label.configure(image=self._photo, text="")
+            self.label.image = self._photo
+        self.mostrados += 1
+        self._mostrados_t.append(time.monotonic())
+        if len(self._mostrados_t) > 4 * self.fps_objetivo * VENTANA_FPS:
+            del self._mostrados_t[:len(self._mostrados_t) // 2]